@@ -10,7 +10,11 @@ https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 import os
 
 from django.core.asgi import get_asgi_application
+from optimizer.apps import OptimizerConfig
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
+# This process serves requests: warm up on startup (WARMUP_ON_STARTUP)
+OptimizerConfig.server_process = True
+
 application = get_asgi_application()
@@ -70,6 +70,22 @@ DATABASES = {
     }
 }
 
+# Caches
+# 'upstream' holds geocoding and routing responses. It is file based so every
+# worker process (web, plan_routes, pool workers) shares the same entries.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'upstream': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('UPSTREAM_CACHE_DIR', default=str(BASE_DIR / 'cache' / 'upstream')),
+        'TIMEOUT': config('UPSTREAM_CACHE_TTL_SECONDS', default=7 * 24 * 3600, cast=int),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -140,4 +156,65 @@ OPENROUTE_API_KEY = config('OPENROUTE_API_KEY', default='')
 MAX_STATIONS_TO_GEOCODE = config('MAX_STATIONS_TO_GEOCODE', default=1000, cast=int)
 GEOCODING_RATE_LIMIT_SECONDS = config('GEOCODING_RATE_LIMIT_SECONDS', default=1.0, cast=float)
 FUEL_EFFICIENCY_MPG = config('FUEL_EFFICIENCY_MPG', default=10, cast=int)
-TANK_RANGE_MILES = config('TANK_RANGE_MILES', default=500, cast=int)
\ No newline at end of file
+TANK_RANGE_MILES = config('TANK_RANGE_MILES', default=500, cast=int)
+
+# Optimization worker pool (bulk lane planning)
+OPTIMIZATION_POOL_MODE = config('OPTIMIZATION_POOL_MODE', default='process')  # 'process' or 'thread'
+OPTIMIZATION_POOL_WORKERS = config('OPTIMIZATION_POOL_WORKERS', default=0, cast=int)  # 0 = CPU count
+
+# Upstream services (point both at `manage.py mock_upstreams` for offline/load testing)
+OSRM_BASE_URL = config('OSRM_BASE_URL', default='http://router.project-osrm.org')
+NOMINATIM_BASE_URL = config('NOMINATIM_BASE_URL', default='https://nominatim.openstreetmap.org')
+
+# In-memory station index used by API requests (reloaded when older than this, 0 = query the DB per request)
+STATION_INDEX_MAX_AGE_SECONDS = config('STATION_INDEX_MAX_AGE_SECONDS', default=300, cast=int)
+
+# Startup warmup (station index + top lanes); /api/v1/health returns 503 until done
+WARMUP_ON_STARTUP = config('WARMUP_ON_STARTUP', default=False, cast=bool)
+WARMUP_LANES_FILE = config('WARMUP_LANES_FILE', default='')
+WARMUP_TOP_LANES = config('WARMUP_TOP_LANES', default=100, cast=int)
+
+# Persisted corridors for repeated lanes (newest N kept, 0 disables)
+LANE_CORRIDOR_CACHE_MAX_LANES = config('LANE_CORRIDOR_CACHE_MAX_LANES', default=1000, cast=int)
+
+# Start corridors narrow (fewer candidates) and widen them only around coverage gaps
+ADAPTIVE_CORRIDOR = config('ADAPTIVE_CORRIDOR', default=False, cast=bool)
+
+# Weight of a station's off-route round trip when ranking stops (1.0 = its fuel cost, 0 = ignore detours)
+DETOUR_PENALTY = config('DETOUR_PENALTY', default=1.0, cast=float)
+
+# Upstream rate limits in requests/second per host, shared by all processes through
+# RATE_LIMIT_DB. Hosts not listed (self-hosted OSRM, mock_upstreams) are not limited.
+RATE_LIMIT_DB = config('RATE_LIMIT_DB', default=str(BASE_DIR / 'cache' / 'rate_limits.sqlite3'))
+UPSTREAM_RATE_LIMITS = {
+    'nominatim.openstreetmap.org': 1 / GEOCODING_RATE_LIMIT_SECONDS,
+    'router.project-osrm.org': config('OSRM_RATE_LIMIT_PER_SECOND', default=1.0, cast=float),
+}
+UPSTREAM_RATE_LIMIT_TIMEOUT_SECONDS = config('UPSTREAM_RATE_LIMIT_TIMEOUT_SECONDS', default=10.0, cast=float)
+
+# Request coalescing: identical concurrent lookups share one computation per process.
+# Set a lock directory to also coalesce across worker processes (POSIX only).
+SINGLEFLIGHT_LOCK_DIR = config('SINGLEFLIGHT_LOCK_DIR', default='')
+SINGLEFLIGHT_HANDOFF_SECONDS = config('SINGLEFLIGHT_HANDOFF_SECONDS', default=30, cast=int)
+
+# Routing backend: 'osrm' (public/self-hosted OSRM server) or 'local' (prebuilt road graph)
+ROUTING_BACKEND = config('ROUTING_BACKEND', default='osrm')
+ROAD_GRAPH_DIR = config('ROAD_GRAPH_DIR', default=str(BASE_DIR / 'data' / 'road_graph'))
+
+# Append-only price history, one columnar partition per feed date
+PRICE_HISTORY_DIR = config('PRICE_HISTORY_DIR', default=str(BASE_DIR / 'data' / 'price_history'))
+
+# Materialized price statistics (per state / grid cell), re-read from the database after this many seconds
+PRICE_STATS_MAX_AGE_SECONDS = config('PRICE_STATS_MAX_AGE_SECONDS', default=60, cast=int)
+
+# Background job queue (run_workers); failed attempts wait JOB_RETRY_BACKOFF_SECONDS * 2^(attempt-1)
+JOB_WORKER_CONCURRENCY = config('JOB_WORKER_CONCURRENCY', default=2, cast=int)
+JOB_POLL_INTERVAL_SECONDS = config('JOB_POLL_INTERVAL_SECONDS', default=2.0, cast=float)
+JOB_MAX_ATTEMPTS = config('JOB_MAX_ATTEMPTS', default=3, cast=int)
+JOB_RETRY_BACKOFF_SECONDS = config('JOB_RETRY_BACKOFF_SECONDS', default=30, cast=int)
+JOB_STALE_SECONDS = config('JOB_STALE_SECONDS', default=600, cast=int)
+
+# Binary station snapshot published by load_fuel_stations / geocode_stations and memory-mapped
+# by API processes and optimization workers ('' = always load stations from the database)
+STATION_SNAPSHOT_DIR = config('STATION_SNAPSHOT_DIR', default=str(BASE_DIR / 'data' / 'station_snapshot'))
+STATION_SNAPSHOT_CHECK_SECONDS = config('STATION_SNAPSHOT_CHECK_SECONDS', default=5, cast=int)
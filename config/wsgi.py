@@ -10,7 +10,11 @@ https://docs.djangoproject.com/en/5.0/howto/deployment/wsgi/
 import os
 
 from django.core.wsgi import get_wsgi_application
+from optimizer.apps import OptimizerConfig
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
+# This process serves requests: warm up on startup (WARMUP_ON_STARTUP)
+OptimizerConfig.server_process = True
+
 application = get_wsgi_application()
@@ -1,5 +1,7 @@
+from django import forms
 from django.contrib import admin
-from .models import FuelStation
+from .models import FuelStation, Job
+from .services.job_service import JobService
 
 
 @admin.register(FuelStation)
@@ -58,4 +60,98 @@ class FuelStationAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         """Optimize queryset for admin list view."""
         queryset = super().get_queryset(request)
-        return queryset.select_related()
\ No newline at end of file
+        return queryset.select_related()
+
+class JobAdminForm(forms.ModelForm):
+
+    class Meta:
+        model = Job
+        fields = ['kind', 'params', 'max_attempts']
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if 'kind' in cleaned_data:
+            try:
+                JobService().validate(cleaned_data['kind'], cleaned_data.get('params') or {})
+            except ValueError as e:
+                raise forms.ValidationError(str(e))
+        if cleaned_data.get('max_attempts') is not None:
+            try:
+                JobService.validate_max_attempts(cleaned_data['max_attempts'])
+            except ValueError as e:
+                self.add_error('max_attempts', str(e))
+        return cleaned_data
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """
+    Admin interface for background jobs: submit, follow, cancel and retry.
+    """
+    
+    form = JobAdminForm
+    
+    list_display = [
+        'id',
+        'kind',
+        'status',
+        'progress_display',
+        'attempts',
+        'worker',
+        'created_at',
+        'finished_at'
+    ]
+    
+    list_filter = [
+        'status',
+        'kind'
+    ]
+    
+    readonly_fields = [
+        'status',
+        'progress_display',
+        'progress_message',
+        'attempts',
+        'cancel_requested',
+        'worker',
+        'error',
+        'log',
+        'run_after',
+        'created_at',
+        'started_at',
+        'heartbeat_at',
+        'finished_at'
+    ]
+    
+    actions = ['cancel_jobs', 'retry_jobs']
+    
+    list_per_page = 50
+    
+    def get_fields(self, request, obj=None):
+        """New jobs only need what to run; existing ones show their state."""
+        if obj is None:
+            return ['kind', 'params', 'max_attempts']
+        return ['kind', 'params', 'max_attempts'] + self.readonly_fields
+    
+    def get_readonly_fields(self, request, obj=None):
+        if obj is None:
+            return []
+        return ['kind', 'params', 'max_attempts'] + self.readonly_fields
+    
+    @admin.display(description='Progress')
+    def progress_display(self, obj):
+        if obj.progress_total:
+            return f"{obj.progress_current}/{obj.progress_total} ({obj.progress_percent}%)"
+        return str(obj.progress_current) if obj.progress_current else '-'
+    
+    @admin.action(description='Cancel selected jobs')
+    def cancel_jobs(self, request, queryset):
+        service = JobService()
+        cancelled = sum(service.cancel(job.pk) for job in queryset)
+        self.message_user(request, f'{cancelled} job(s) cancelled or asked to stop.')
+    
+    @admin.action(description='Retry selected jobs')
+    def retry_jobs(self, request, queryset):
+        service = JobService()
+        retried = sum(service.retry(job.pk) for job in queryset)
+        self.message_user(request, f'{retried} job(s) queued again.')
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from optimizer.utils.constants import MAX_ROUTE_WAYPOINTS
 
 
 class RouteOptimizationRequestSerializer(serializers.Serializer):
@@ -21,6 +22,27 @@ class RouteOptimizationRequestSerializer(serializers.Serializer):
         help_text="Destination location (e.g., 'New York, NY')"
     )
     
+    waypoints = serializers.ListField(
+        child=serializers.CharField(max_length=200, trim_whitespace=True),
+        required=False,
+        default=list,
+        max_length=MAX_ROUTE_WAYPOINTS,
+        help_text="Ordered intermediate stops (e.g., ['Denver, CO', 'Chicago, IL'])"
+    )
+    
+    alternatives = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Compare OSRM alternative routes and return the cheapest trip"
+    )
+    
+    cost_per_mile = serializers.FloatField(
+        required=False,
+        default=0.0,
+        min_value=0.0,
+        help_text="Cost added per mile driven when comparing alternatives (e.g., 0.85)"
+    )
+    
     def validate_start_location(self, value):
         #Validate start location is not empty.
         if not value or len(value.strip()) < 3:
@@ -39,10 +61,19 @@ class RouteOptimizationRequestSerializer(serializers.Serializer):
     
     def validate(self, data):
         #Cross-field validation.
-        if data['start_location'].lower() == data['end_location'].lower():
+        if not data.get('waypoints') and data['start_location'].lower() == data['end_location'].lower():
             raise serializers.ValidationError(
                 "Start and end locations must be different."
             )
+        if data.get('alternatives') and data.get('waypoints'):
+            raise serializers.ValidationError(
+                "Alternatives cannot be combined with waypoints."
+            )
+        locations = [data['start_location'], *data.get('waypoints', []), data['end_location']]
+        if any(a.lower() == b.lower() for a, b in zip(locations[:-1], locations[1:])):
+            raise serializers.ValidationError(
+                "Consecutive locations must be different."
+            )
         return data
 
 
@@ -60,6 +91,16 @@ class FuelStopSerializer(serializers.Serializer):
     cost = serializers.FloatField()
 
 
+class RouteLegSerializer(serializers.Serializer):
+
+    #Serializes one leg of a multi-waypoint route.
+
+    start = serializers.CharField()
+    end = serializers.CharField()
+    distance_miles = serializers.FloatField()
+    duration_hours = serializers.FloatField()
+
+
 class RouteInfoSerializer(serializers.Serializer):
     
     #Serializes route information.
@@ -69,6 +110,23 @@ class RouteInfoSerializer(serializers.Serializer):
     distance_miles = serializers.FloatField()
     duration_hours = serializers.FloatField()
     geometry = serializers.DictField()
+    waypoints = serializers.ListField(child=serializers.CharField(), required=False)
+    legs = RouteLegSerializer(many=True, required=False)
+
+
+class RouteAlternativeSerializer(serializers.Serializer):
+
+    #Serializes one row of the alternatives comparison.
+
+    index = serializers.IntegerField()
+    distance_miles = serializers.FloatField()
+    duration_hours = serializers.FloatField()
+    stops = serializers.IntegerField(required=False)
+    fuel_cost = serializers.FloatField(required=False)
+    mileage_cost = serializers.FloatField(required=False)
+    trip_cost = serializers.FloatField(required=False)
+    error = serializers.CharField(required=False)
+    selected = serializers.BooleanField()
 
 
 class RouteOptimizationResponseSerializer(serializers.Serializer):
@@ -79,6 +137,10 @@ class RouteOptimizationResponseSerializer(serializers.Serializer):
     stops = FuelStopSerializer(many=True)
     total_cost = serializers.FloatField()
     fuel_consumed_gallons = serializers.FloatField()
+    solver_stats = serializers.DictField(required=False)
+    trip_cost = serializers.FloatField(required=False)
+    cost_per_mile = serializers.FloatField(required=False)
+    alternatives = RouteAlternativeSerializer(many=True, required=False)
 
 
 class StationsNearRequestSerializer(serializers.Serializer):
@@ -1,9 +1,19 @@
 from django.urls import path
-from .views import RouteOptimizationView, StationsNearView
+from .views import (
+    RouteOptimizationView, StationsNearView, StationTileView, HealthView, PriceStatsView,
+    JobListView, JobDetailView, JobActionView
+)
 
 app_name = 'optimizer_api'
 
 urlpatterns = [
     path('route/optimize', RouteOptimizationView.as_view(), name='route-optimize'),
     path('stations/near', StationsNearView.as_view(), name='stations-near'),
+    path('stations/tiles/<int:z>/<int:x>/<int:y>', StationTileView.as_view(), name='station-tiles'),
+    path('health', HealthView.as_view(), name='health'),
+    path('stats', PriceStatsView.as_view(), name='price-stats'),
+    path('jobs', JobListView.as_view(), name='jobs'),
+    path('jobs/<int:job_id>', JobDetailView.as_view(), name='job-detail'),
+    path('jobs/<int:job_id>/cancel', JobActionView.as_view(action='cancel'), name='job-cancel'),
+    path('jobs/<int:job_id>/retry', JobActionView.as_view(action='retry'), name='job-retry'),
 ]
\ No newline at end of file
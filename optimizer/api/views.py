@@ -1,8 +1,29 @@
+import json
+import math
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from optimizer.services.routing_service import RoutingService
-from optimizer.models import FuelStation
+from rest_framework.permissions import IsAdminUser
+from optimizer.services.warmup_service import WarmupService
+from optimizer.models import FuelStation, Job, PriceStatistic, StationTile
+from optimizer.utils.constants import (
+    JOB_LIST_LIMIT,
+    MAX_ROUTE_WAYPOINTS,
+    TILE_MIN_ZOOM,
+    TILE_MAX_ZOOM,
+    TILE_CACHE_MAX_AGE_SECONDS,
+)
+from optimizer.utils.grid import grid_cell_for
+from optimizer.utils.tiles import is_valid_tile
+
+# ?stream= formats of the optimize endpoint
+STREAM_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream',
+}
 
 
 class RouteOptimizationView(APIView):
@@ -15,6 +36,12 @@ class RouteOptimizationView(APIView):
     
     def post(self, request):
 
+        if not isinstance(request.data, dict):
+            return Response(
+                {'error': 'Request body must be an object.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         start_location = request.data.get('start_location')
         end_location = request.data.get('end_location')
         
@@ -23,15 +50,109 @@ class RouteOptimizationView(APIView):
                 {'error': 'Both start_location and end_location are required.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        if not isinstance(start_location, str) or not isinstance(end_location, str):
+            return Response(
+                {'error': 'start_location and end_location must be strings.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Optional ordered intermediate stops, fuel state carries across legs
+        waypoints = request.data.get('waypoints') or []
+        if (not isinstance(waypoints, list) or len(waypoints) > MAX_ROUTE_WAYPOINTS
+                or not all(isinstance(w, str) and w.strip() for w in waypoints)):
+            return Response(
+                {'error': f'waypoints must be a list of up to {MAX_ROUTE_WAYPOINTS} locations.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        locations = [start_location, *waypoints, end_location]
+        if any(a.strip().lower() == b.strip().lower() for a, b in zip(locations[:-1], locations[1:])):
+            return Response(
+                {'error': 'Consecutive locations must be different.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+            
+        # Optional: compare OSRM alternatives and keep the cheapest trip, where
+        # a trip costs its fuel plus cost_per_mile for every mile driven
+        alternatives = request.data.get('alternatives', False)
+        cost_per_mile = request.data.get('cost_per_mile', 0)
+        if not isinstance(alternatives, bool):
+            return Response(
+                {'error': 'alternatives must be true or false.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if isinstance(cost_per_mile, bool) or not isinstance(cost_per_mile, (int, float)) or cost_per_mile < 0:
+            return Response(
+                {'error': 'cost_per_mile must be a non-negative number.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if alternatives and waypoints:
+            return Response(
+                {'error': 'alternatives cannot be combined with waypoints.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Optional: ?stream=ndjson|sse sends each stage as soon as it is done
+        stream = request.query_params.get('stream')
+        if stream is not None and stream not in STREAM_CONTENT_TYPES:
+            return Response(
+                {'error': f"stream must be one of: {', '.join(STREAM_CONTENT_TYPES)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if stream and alternatives:
+            return Response(
+                {'error': 'alternatives cannot be streamed.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
             
+        # Imported on first use: the routing stack (NumPy, requests) is not
+        # needed to load the URLconf, e.g. for manage.py commands
+        from optimizer.services.routing_service import RoutingService
         service = RoutingService()
-        result = service.calculate_optimal_route(start_location, end_location)
+        
+        if stream:
+            events = service.stream_optimal_route(start_location, end_location, [w.strip() for w in waypoints])
+            response = StreamingHttpResponse(
+                _encode_events(events, stream),
+                content_type=STREAM_CONTENT_TYPES[stream]
+            )
+            # Keep proxies from buffering the stream
+            response['Cache-Control'] = 'no-cache'
+            response['X-Accel-Buffering'] = 'no'
+            return response
+        
+        result = service.calculate_optimal_route(
+            start_location,
+            end_location,
+            [w.strip() for w in waypoints],
+            alternatives=alternatives,
+            cost_per_mile=float(cost_per_mile)
+        )
         
         if 'error' in result:
             return Response(result, status=status.HTTP_400_BAD_REQUEST)
             
         return Response(result, status=status.HTTP_200_OK)
 
+def _encode_events(events, stream):
+
+    # The status line is already sent, failures become a final error event
+    try:
+        for event, data in events:
+            yield _encode_event(event, data, stream)
+    except Exception as e:
+        print(f"Error streaming route: {e}")
+        yield _encode_event('error', {'error': 'Route planning failed'}, stream)
+
+
+def _encode_event(event, data, stream):
+
+    # NDJSON: one {"event": ..., ...data} object per line; SSE: event/data frames
+    if stream == 'sse':
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({'event': event, **data}) + '\n'
+
+
 class StationsNearView(APIView):
 
     authentication_classes = []
@@ -57,8 +178,8 @@ class StationsNearView(APIView):
         
         candidates = FuelStation.objects.filter(
             geocoded=True,
-            latitude__gte=min_lat, latitude__lte=max_lat,
-            longitude__gte=min_lon, longitude__lte=max_lon
+            lat__gte=min_lat, lat__lte=max_lat,
+            lon__gte=min_lon, lon__lte=max_lon
         )
         
         stations = []
@@ -71,9 +192,207 @@ class StationsNearView(APIView):
                 'city': station.city,
                 'state': station.state,
                 'price': float(station.retail_price),
-                'lat': float(station.latitude),
-                'lon': float(station.longitude),
+                'lat': station.lat,
+                'lon': station.lon,
                 'address': station.address
             })
             
         return Response({'stations': stations}, status=status.HTTP_200_OK)
+
+
+class StationTileView(APIView):
+
+    #Serves precomputed station tiles (clusters at low zoom, stations at high zoom).
+
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request, z, x, y):
+        if not (TILE_MIN_ZOOM <= z <= TILE_MAX_ZOOM) or not is_valid_tile(z, x, y):
+            return Response(
+                {'error': f'Invalid tile {z}/{x}/{y}. Zoom must be between {TILE_MIN_ZOOM} and {TILE_MAX_ZOOM}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        tile = StationTile.objects.filter(zoom=z, x=x, y=y).only('content', 'etag').first()
+        if tile is not None:
+            content, etag = tile.content, tile.etag
+        else:
+            # Empty tiles are not stored, they all share the same payload
+            from optimizer.services.tile_service import TileService
+            content = TileService.empty_tile_content()
+            etag = TileService.compute_etag(content)
+
+        quoted_etag = f'"{etag}"'
+        if_none_match = request.headers.get('If-None-Match', '')
+        if quoted_etag in [tag.strip() for tag in if_none_match.split(',')]:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type='application/json')
+
+        response['ETag'] = quoted_etag
+        patch_cache_control(response, public=True, max_age=TILE_CACHE_MAX_AGE_SECONDS)
+        return response
+
+
+class HealthView(APIView):
+
+    # Readiness probe: 503 until the startup warmup has finished
+
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        if not getattr(settings, 'WARMUP_ON_STARTUP', False):
+            payload, ready = {'status': 'ready', 'warmup': 'disabled'}, True
+        else:
+            WarmupService.resume_after_fork()
+            payload = WarmupService.status()
+            ready = payload['status'] == 'ready'
+
+        # Waits and rejections of the shared upstream rate limits, all processes
+        from optimizer.utils.rate_limiter import read_rate_limit_stats
+        payload['upstream_rate_limits'] = read_rate_limit_stats(settings.RATE_LIMIT_DB)
+        return Response(
+            payload,
+            status=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+
+class PriceStatsView(APIView):
+
+    # Materialized price statistics: national and per state, or one state / grid cell
+
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        # Imported on first use, like the routing stack (the repository needs NumPy)
+        from optimizer.repositories import FuelStationRepository
+        repository = FuelStationRepository()
+
+        state = request.query_params.get('state')
+        lat, lon = request.query_params.get('lat'), request.query_params.get('lon')
+
+        if state:
+            stats = repository.get_price_statistics(PriceStatistic.SCOPE_STATE, state)
+            body = {'state': state.upper()}
+        elif lat is not None or lon is not None:
+            try:
+                lat, lon = float(lat), float(lon)
+            except (TypeError, ValueError):
+                lat = lon = math.nan
+            # inf would overflow the grid cell, out-of-range points have no cell
+            if not (math.isfinite(lat) and math.isfinite(lon) and -90 <= lat <= 90 and -180 <= lon <= 180):
+                return Response(
+                    {'error': 'Invalid lat or lon parameters.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            cell = grid_cell_for(lat, lon)
+            stats = repository.get_price_statistics(PriceStatistic.SCOPE_CELL, cell)
+            body = {'cell': cell}
+        else:
+            national = repository.get_price_statistics()
+            if national is None:
+                return Response(
+                    {'error': 'Price statistics have not been built yet.'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            return Response({
+                'all': national,
+                'states': repository.get_all_price_statistics(PriceStatistic.SCOPE_STATE)
+            }, status=status.HTTP_200_OK)
+
+        if stats is None:
+            return Response(
+                {'error': 'No geocoded stations in this area.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response({**body, **stats}, status=status.HTTP_200_OK)
+
+
+def _job_payload(job):
+
+    return {
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'params': job.params,
+        'progress': {
+            'current': job.progress_current,
+            'total': job.progress_total,
+            'percent': job.progress_percent,
+            'message': job.progress_message
+        },
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'cancel_requested': job.cancel_requested,
+        'error': job.error,
+        'worker': job.worker,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at
+    }
+
+
+class JobListView(APIView):
+
+    # Background jobs (admin only): list recent ones or submit a new one
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        jobs = Job.objects.all()
+        if request.query_params.get('status'):
+            jobs = jobs.filter(status=request.query_params['status'])
+        return Response({'jobs': [_job_payload(job) for job in jobs[:JOB_LIST_LIMIT]]}, status=status.HTTP_200_OK)
+
+    def post(self, request):
+        from optimizer.services.job_service import JobService
+
+        try:
+            job = JobService().submit(
+                request.data.get('kind'),
+                request.data.get('params') or {},
+                request.data.get('max_attempts')
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(_job_payload(job), status=status.HTTP_202_ACCEPTED)
+
+
+class JobDetailView(APIView):
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, job_id):
+        job = Job.objects.filter(pk=job_id).first()
+        if job is None:
+            return Response({'error': 'Job not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(_job_payload(job), status=status.HTTP_200_OK)
+
+
+class JobActionView(APIView):
+
+    # POST /jobs/<id>/cancel or /jobs/<id>/retry
+
+    permission_classes = [IsAdminUser]
+    action = None
+
+    def post(self, request, job_id):
+        from optimizer.services.job_service import JobService
+
+        job = Job.objects.filter(pk=job_id).first()
+        if job is None:
+            return Response({'error': 'Job not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        service = JobService()
+        changed = service.cancel(job.pk) if self.action == 'cancel' else service.retry(job.pk)
+        job.refresh_from_db()
+        if not changed:
+            return Response(
+                {'error': f"Cannot {self.action} a job that is {job.status}.", 'job': _job_payload(job)},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(_job_payload(job), status=status.HTTP_200_OK)
@@ -1,8 +1,35 @@
+import os
+import sys
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class OptimizerConfig(AppConfig):
 
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'optimizer'
-    verbose_name = 'Fuel Route Optimizer'
\ No newline at end of file
+    verbose_name = 'Fuel Route Optimizer'
+
+    # Set by the WSGI/ASGI entrypoints (config/wsgi.py, config/asgi.py)
+    # before Django is set up. Management commands, tests and scripts that
+    # call django.setup() leave it unset and never warm up.
+    server_process = False
+
+    def ready(self):
+        # Warm caches in the background on server boot; /api/v1/health
+        # answers 503 until it is done
+        if getattr(settings, 'WARMUP_ON_STARTUP', False) and self._is_server_process():
+            from optimizer.services.warmup_service import WarmupService
+            WarmupService().start_background()
+
+    @classmethod
+    def _is_server_process(cls):
+
+        if cls.server_process:
+            return True
+        # runserver sets Django up before loading the WSGI app, so it is
+        # recognized here. Under its autoreloader only the child (RUN_MAIN)
+        # serves requests.
+        if os.path.basename(sys.argv[0]) != 'manage.py' or sys.argv[1:2] != ['runserver']:
+            return False
+        return os.environ.get('RUN_MAIN') == 'true' or '--noreload' in sys.argv
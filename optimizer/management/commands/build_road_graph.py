@@ -0,0 +1,86 @@
+import csv
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from optimizer.services.local_routing_engine import RoadGraph
+
+
+class Command(BaseCommand):
+    help = (
+        'Build the memory-mapped road graph used by ROUTING_BACKEND=local '
+        'from node and edge CSV extracts'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--nodes',
+            type=str,
+            required=True,
+            help='CSV with id, lat, lon columns'
+        )
+
+        parser.add_argument(
+            '--edges',
+            type=str,
+            required=True,
+            help='CSV with source, target, distance_m, duration_s and optional oneway (0/1) columns'
+        )
+
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Graph directory (default: ROAD_GRAPH_DIR setting)'
+        )
+
+    def handle(self, *args, **options):
+        nodes_file = Path(options['nodes'])
+        edges_file = Path(options['edges'])
+        for path in (nodes_file, edges_file):
+            if not path.exists():
+                raise CommandError(f'File not found: {path}')
+
+        output = options['output'] or settings.ROAD_GRAPH_DIR
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Building Road Graph'))
+
+        # Node ids in the extract are arbitrary, the graph uses 0..n-1
+        node_ids, lats, lons = {}, [], []
+        with open(nodes_file, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                node_ids[row['id']] = len(lats)
+                lats.append(float(row['lat']))
+                lons.append(float(row['lon']))
+
+        sources, targets, distances, durations = [], [], [], []
+        skipped = 0
+        with open(edges_file, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                source = node_ids.get(row['source'])
+                target = node_ids.get(row['target'])
+                if source is None or target is None:
+                    skipped += 1
+                    continue
+
+                distance = float(row['distance_m'])
+                duration = float(row['duration_s'])
+                sources.append(source)
+                targets.append(target)
+                distances.append(distance)
+                durations.append(duration)
+
+                if row.get('oneway', '0').strip() not in ('1', 'true', 'yes'):
+                    sources.append(target)
+                    targets.append(source)
+                    distances.append(distance)
+                    durations.append(duration)
+
+        if not sources:
+            raise CommandError('No usable edges found')
+
+        meta = RoadGraph.build(output, lats, lons, sources, targets, distances, durations)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✓ Graph written to {output}: {meta['nodes']} nodes, {meta['edges']} edges")
+        )
+        if skipped:
+            self.stdout.write(self.style.WARNING(f'✗ {skipped} edges referenced unknown nodes'))
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from optimizer.services.station_index import StationIndex
+
+
+class Command(BaseCommand):
+    help = (
+        'Publish the geocoded stations as a binary snapshot that API processes and '
+        'optimization workers memory-map (load_fuel_stations and geocode_stations do this too)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Snapshot directory (default: STATION_SNAPSHOT_DIR setting)'
+        )
+
+    def handle(self, *args, **options):
+        directory = options['output'] or getattr(settings, 'STATION_SNAPSHOT_DIR', '')
+        if not directory:
+            raise CommandError('STATION_SNAPSHOT_DIR is empty, pass --output')
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Building Station Snapshot'))
+
+        index = StationIndex.from_database()
+        version = index.write_snapshot(directory)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Published version {version}: {len(index)} stations -> {directory}'
+        ))
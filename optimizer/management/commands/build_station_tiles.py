@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from optimizer.services.tile_service import TileService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the precomputed station map tiles (only changed tiles are written)'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.MIGRATE_HEADING('Building Station Tiles'))
+
+        stats = TileService().rebuild_tiles()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ Tiles created: {stats['created']}, updated: {stats['updated']}, "
+                f"deleted: {stats['deleted']}, unchanged: {stats['unchanged']}"
+            )
+        )
@@ -0,0 +1,137 @@
+import os
+import re
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# name -> (code run in a fresh interpreter, default budget in ms, modules that must not load)
+SCENARIOS = {
+    'setup': (
+        'import django; django.setup()',
+        400,
+        ('numpy', 'requests', 'geopy', 'pandas', 'folium'),
+    ),
+    'urls': (
+        'import django; django.setup(); import config.urls',
+        600,
+        ('numpy', 'geopy', 'pandas', 'folium'),
+    ),
+    'optimizer': (
+        'import django; django.setup(); from optimizer.services.optimization_service import OptimizationService',
+        800,
+        ('geopy', 'pandas', 'folium'),
+    ),
+}
+
+# "import time:       146 |        146 |     django.contrib.sites.requests"
+IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)\s*$')
+
+
+def measure_import_time(code):
+    """Run code in a fresh interpreter, returns (total microseconds, {module: (cumulative us, depth)})."""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True,
+        text=True,
+        env={**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE},
+        cwd=settings.BASE_DIR
+    )
+    if completed.returncode != 0:
+        raise CommandError(f'Import failed:\n{completed.stderr[-2000:]}')
+    return parse_import_time(completed.stderr)
+
+
+def parse_import_time(stderr):
+    """(total microseconds, {module: (cumulative us, depth)}) from python -X importtime output."""
+    modules = {}
+    total_us = 0
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, module = int(match.group(2)), len(match.group(3)), match.group(4)
+        # Nested imports are indented two spaces per level below the top one
+        depth = max(0, (indent - 1) // 2)
+        modules[module] = (cumulative, depth)
+        if depth == 0:
+            total_us += cumulative
+
+    return total_us, modules
+
+
+def forbidden_imports(modules, forbidden):
+    """The forbidden packages that show up (themselves or a submodule) among the imported modules."""
+    return sorted(
+        module for module in forbidden
+        if any(m == module or m.startswith(module + '.') for m in modules)
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure cold import time of the app in fresh interpreters (python -X importtime) '
+        'and fail when a startup budget is exceeded or a heavy module is imported too early'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=sorted(SCENARIOS),
+            help='Scenario to check, repeatable (default: all)'
+        )
+
+        parser.add_argument(
+            '--budget-ms',
+            type=float,
+            help='Override the budget of every checked scenario'
+        )
+
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Runs per scenario, the fastest one is reported (default: 3)'
+        )
+
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=10,
+            help='Heaviest top-level imports to list (default: 10)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.MIGRATE_HEADING('Checking Import Time'))
+
+        failures = []
+        for name in options['scenario'] or SCENARIOS:
+            code, budget_ms, forbidden = SCENARIOS[name]
+            if options['budget_ms'] is not None:
+                budget_ms = options['budget_ms']
+
+            runs = [measure_import_time(code) for _ in range(max(1, options['repeat']))]
+            total_us, modules = min(runs, key=lambda run: run[0])
+            total_ms = total_us / 1000
+
+            self.stdout.write(f'\n{name}: {total_ms:.0f}ms (budget {budget_ms:.0f}ms)')
+            top_level = sorted(
+                ((us, module) for module, (us, depth) in modules.items() if depth == 0),
+                reverse=True
+            )
+            for us, module in top_level[:options['top']]:
+                self.stdout.write(f'  {us / 1000:8.1f}ms  {module}')
+
+            loaded = forbidden_imports(modules, forbidden)
+            if loaded:
+                failures.append(f"{name} imports {', '.join(loaded)}")
+                self.stdout.write(self.style.WARNING(f"  ✗ Imports {', '.join(loaded)}"))
+            if total_ms > budget_ms:
+                failures.append(f'{name} took {total_ms:.0f}ms (budget {budget_ms:.0f}ms)')
+                self.stdout.write(self.style.WARNING('  ✗ Over budget'))
+            if not loaded and total_ms <= budget_ms:
+                self.stdout.write(self.style.SUCCESS('  ✓ Within budget'))
+
+        if failures:
+            raise CommandError('; '.join(failures))
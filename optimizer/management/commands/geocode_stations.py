@@ -1,11 +1,17 @@
 from django.core.management.base import BaseCommand
 from django.db.models import Q
 from optimizer.models import FuelStation
+from optimizer.services.corridor_cache_service import CorridorCacheService
 from optimizer.services.geocoding_service import GeocodingService
+from optimizer.services.price_stats_service import PriceStatsService
+from optimizer.services.station_index import publish_station_snapshot
+from optimizer.services.tile_service import TileService
 
 
 class Command(BaseCommand):
     help = 'Geocode fuel stations to get latitude/longitude coordinates'
+    # progress(current, total, message) callback, passed by background jobs
+    stealth_options = ('progress',)
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -34,12 +40,19 @@ class Command(BaseCommand):
             action='store_true',
             help='Re-geocode stations that already have coordinates'
         )
+        
+        parser.add_argument(
+            '--skip-tiles',
+            action='store_true',
+            help='Do not refresh the precomputed station map tiles'
+        )
 
     def handle(self, *args, **options):
         limit = options['limit']
         strategy = options['strategy']
         state_filter = options['state']
         force = options['force']
+        progress = options.get('progress') or (lambda *args: None)
         
         self.stdout.write(self.style.MIGRATE_HEADING('Geocoding Fuel Stations'))
         
@@ -76,8 +89,11 @@ class Command(BaseCommand):
         # Geocode by city (not by station)
         successful = 0
         failed = 0
+        dirty_states, dirty_cells = set(), set()
         
         for i, (city_key, city_stations) in enumerate(cities_map.items(), 1):
+            progress(i - 1, unique_cities, city_key)
+            
             # Progress indicator
             if i % 10 == 0 or i == 1:
                 self.stdout.write(
@@ -95,10 +111,15 @@ class Command(BaseCommand):
                 
                 # Apply coordinates to ALL stations in this city
                 for station in city_stations:
+                    # Re-geocoded stations may leave a cell, both need new stats
+                    if station.grid_cell is not None:
+                        dirty_cells.add(station.grid_cell)
                     station.latitude = lat
                     station.longitude = lng
                     station.geocoded = True
                     station.save()
+                    dirty_states.add(station.state)
+                    dirty_cells.add(station.grid_cell)
                     successful += 1
                 
                 # Show some successful geocodings
@@ -141,6 +162,29 @@ class Command(BaseCommand):
             f'Total geocoded stations in database: {geocoded_stations}/{total_stations} '
             f'({(geocoded_stations/total_stations)*100:.1f}%)'
         )
+        
+        # Only the states and cells that gained stations are recomputed
+        if successful > 0:
+            stats = PriceStatsService().refresh(states=dirty_states, cells=dirty_cells)
+            self.stdout.write(f"Price statistics refreshed: {stats['written']} groups")
+            
+            # Station coordinates changed, cached lane corridors are stale
+            cleared = CorridorCacheService.invalidate()
+            if cleared:
+                self.stdout.write(f'Lane corridors cleared: {cleared}')
+            
+            # Newly geocoded stations become candidates once in the snapshot
+            version = publish_station_snapshot()
+            if version:
+                self.stdout.write(f'Station snapshot published: version {version}')
+        
+        # Newly geocoded stations change what the map tiles contain
+        if successful > 0 and not options['skip_tiles']:
+            stats = TileService().rebuild_tiles()
+            self.stdout.write(
+                f"Map tiles refreshed: {stats['created']} created, {stats['updated']} updated, "
+                f"{stats['deleted']} deleted"
+            )
     
     def _get_stations_to_geocode(self, strategy, state_filter, force, limit):
 
@@ -1,12 +1,21 @@
 import csv
+from datetime import datetime
 from pathlib import Path
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 from optimizer.models import FuelStation
+from optimizer.services.corridor_cache_service import CorridorCacheService
+from optimizer.services.price_stats_service import PriceStatsService
+from optimizer.services.station_index import publish_station_snapshot
+from optimizer.services.tile_service import TileService
+from optimizer.utils.price_history import get_price_history_store
 
 
 class Command(BaseCommand):
     help = 'Load fuel stations from CSV file into the database'
+    # progress(current, total, message) callback, passed by background jobs
+    stealth_options = ('progress',)
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -21,10 +30,35 @@ class Command(BaseCommand):
             action='store_true',
             help='Clear existing fuel stations before loading'
         )
+        
+        parser.add_argument(
+            '--no-dedupe',
+            action='store_true',
+            help='Keep duplicate rows instead of collapsing them into one site per OPIS ID + address'
+        )
+        
+        parser.add_argument(
+            '--skip-tiles',
+            action='store_true',
+            help='Do not refresh the precomputed station map tiles'
+        )
+        
+        parser.add_argument(
+            '--as-of',
+            type=datetime.fromisoformat,
+            help='Feed date/time for the price history, ISO format in UTC (default: now)'
+        )
+        
+        parser.add_argument(
+            '--skip-history',
+            action='store_true',
+            help='Do not append this feed to the price history'
+        )
 
     def handle(self, *args, **options):
         file_path = options['file']
         clear_existing = options['clear']
+        progress = options.get('progress') or (lambda *args: None)
         
         # Validate file exists
         csv_file = Path(file_path)
@@ -34,6 +68,9 @@ class Command(BaseCommand):
         self.stdout.write(self.style.MIGRATE_HEADING('Loading Fuel Stations'))
         self.stdout.write(f'Reading from: {file_path}')
         
+        # Last chance to cancel: once rows start changing the load runs to the end
+        progress(0, None, 'Starting')
+        
         # Clear existing data if requested
         if clear_existing:
             count = FuelStation.objects.count()
@@ -44,6 +81,7 @@ class Command(BaseCommand):
         
         # Load CSV data
         stations_to_create = []
+        feed = []
         errors = []
         
         try:
@@ -58,6 +96,7 @@ class Command(BaseCommand):
                         # Parse and validate data
                         station = self._create_station_from_row(row)
                         stations_to_create.append(station)
+                        feed.append(station)
                         
                         # Progress indicator every 1000 rows
                         if len(stations_to_create) % 1000 == 0:
@@ -67,40 +106,118 @@ class Command(BaseCommand):
                         errors.append(f'Row {row_num}: {str(e)}')
                         # Continue processing other rows
                         continue
+        except Exception as e:
+            raise CommandError(f'Error reading CSV file: {str(e)}')
+        
+        # Collapse duplicate rows (same OPIS ID + address) into canonical sites
+        if stations_to_create and not options['no_dedupe']:
+            row_count = len(stations_to_create)
+            stations_to_create = self._collapse_to_sites(stations_to_create)
+            self.stdout.write(
+                f'Collapsed {row_count} rows into {len(stations_to_create)} sites '
+                f'({row_count - len(stations_to_create)} duplicates dropped)'
+            )
+        
+        # Bulk create stations
+        if stations_to_create:
+            self.stdout.write(f'\nInserting {len(stations_to_create)} stations into database...')
             
-            # Bulk create stations
-            if stations_to_create:
-                self.stdout.write(f'\nInserting {len(stations_to_create)} stations into database...')
-                
-                with transaction.atomic():
-                    FuelStation.objects.bulk_create(
-                        stations_to_create,
-                        batch_size=500,
-                        ignore_conflicts=True
-                    )
-                
-                self.stdout.write(
-                    self.style.SUCCESS(f'✓ Successfully loaded {len(stations_to_create)} fuel stations')
-                )
-            else:
-                self.stdout.write(self.style.WARNING('No stations to load'))
-            
-            # Report errors if any
-            if errors:
-                self.stdout.write(
-                    self.style.WARNING(f'\n⚠ Encountered {len(errors)} errors:')
+            with transaction.atomic():
+                FuelStation.objects.bulk_create(
+                    stations_to_create,
+                    batch_size=500,
+                    ignore_conflicts=True
                 )
-                for error in errors[:10]:  # Show first 10 errors
-                    self.stdout.write(f'  - {error}')
-                if len(errors) > 10:
-                    self.stdout.write(f'  ... and {len(errors) - 10} more')
             
-            # Summary
-            total_count = FuelStation.objects.count()
-            self.stdout.write(f'\nTotal stations in database: {total_count}')
-            
-        except Exception as e:
-            raise CommandError(f'Error reading CSV file: {str(e)}')
+            self.stdout.write(
+                self.style.SUCCESS(f'✓ Successfully loaded {len(stations_to_create)} fuel stations')
+            )
+        else:
+            self.stdout.write(self.style.WARNING('No stations to load'))
+        
+        # Report errors if any
+        if errors:
+            self.stdout.write(
+                self.style.WARNING(f'\n⚠ Encountered {len(errors)} errors:')
+            )
+            for error in errors[:10]:  # Show first 10 errors
+                self.stdout.write(f'  - {error}')
+            if len(errors) > 10:
+                self.stdout.write(f'  ... and {len(errors) - 10} more')
+        
+        # Rows are already committed: a history failure must not skip the refreshes below
+        if feed and not options['skip_history']:
+            try:
+                self._append_history(feed, options['as_of'])
+            except (ValueError, OSError) as e:
+                self.stdout.write(self.style.WARNING(f'⚠ Price history not updated: {e}'))
+        
+        # A cleared table rebuilds every group, otherwise only the feed's states
+        stats = PriceStatsService().refresh(
+            states=None if clear_existing else {station.state for station in feed}
+        )
+        self.stdout.write(
+            f"Price statistics refreshed: {stats['written']} groups written, {stats['removed']} removed"
+        )
+        
+        # Summary
+        total_count = FuelStation.objects.count()
+        self.stdout.write(f'\nTotal stations in database: {total_count}')
+
+        # Station ids and coordinates changed, cached lane corridors are stale
+        cleared = CorridorCacheService.invalidate()
+        if cleared:
+            self.stdout.write(f'Lane corridors cleared: {cleared}')
+
+        # Workers pick up the new prices from the snapshot
+        version = publish_station_snapshot()
+        if version:
+            self.stdout.write(f'Station snapshot published: version {version}')
+
+        if not options['skip_tiles']:
+            self._rebuild_tiles()
+    
+    def _collapse_to_sites(self, stations):
+
+        # The feed lists the same physical site several times under different
+        # names (e.g. "PILOT TRAVEL CENTER #1243" and "PILOT #1243"). Keep one
+        # row per OPIS ID + address, with the lowest price seen for it.
+        sites = {}
+        for station in stations:
+            key = (station.opis_id, ' '.join(station.address.upper().split()))
+            current = sites.get(key)
+            if current is None or station.retail_price < current.retail_price:
+                sites[key] = station
+        
+        return list(sites.values())
+    
+    def _append_history(self, stations, as_of):
+
+        # Every row of the feed is kept (not just the collapsed sites); the
+        # store keeps the lowest price per OPIS ID. It is keyed by numeric ID,
+        # so rows with any other ID are left out of the history
+        keyed = [station for station in stations if station.opis_id.isdigit()]
+        skipped = len(stations) - len(keyed)
+        if skipped:
+            self.stdout.write(self.style.WARNING(f'⚠ Price history: {skipped} rows with a non-numeric OPIS ID skipped'))
+        if not keyed:
+            return
+        
+        store = get_price_history_store(getattr(settings, 'PRICE_HISTORY_DIR', 'data/price_history'))
+        when = store.append(
+            [int(station.opis_id) for station in keyed],
+            [station.retail_price for station in keyed],
+            when=as_of
+        )
+        self.stdout.write(f'Price history: feed of {when:%Y-%m-%d %H:%M} UTC appended')
+    
+    def _rebuild_tiles(self):
+
+        stats = TileService().rebuild_tiles()
+        self.stdout.write(
+            f"Map tiles refreshed: {stats['created']} created, {stats['updated']} updated, "
+            f"{stats['deleted']} deleted"
+        )
     
     def _create_station_from_row(self, row):
         
@@ -0,0 +1,206 @@
+import csv
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urljoin
+import numpy as np
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_LANES = [
+    ('Los Angeles, CA', 'Las Vegas, NV'),
+    ('Dallas, TX', 'Chicago, IL'),
+    ('New York, NY', 'Miami, FL'),
+    ('Seattle, WA', 'Denver, CO'),
+    ('Atlanta, GA', 'Houston, TX'),
+    ('Phoenix, AZ', 'Salt Lake City, UT'),
+    ('Boston, MA', 'Cleveland, OH'),
+    ('San Francisco, CA', 'Portland, OR'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive the route optimization API at a target request rate and report '
+        'latency percentiles (run against mock_upstreams to keep it offline)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            type=str,
+            default='http://127.0.0.1:8000/api/v1/route/optimize',
+            help='Endpoint to POST lanes to (default: local runserver)'
+        )
+
+        parser.add_argument(
+            '--rps',
+            type=float,
+            default=5.0,
+            help='Target requests per second (default: 5)'
+        )
+
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=30.0,
+            help='Test length in seconds (default: 30)'
+        )
+
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=32,
+            help='Max requests in flight (default: 32)'
+        )
+
+        parser.add_argument(
+            '--lanes',
+            type=str,
+            help='CSV or JSONL with start_location/end_location (default: built-in city pairs)'
+        )
+
+        parser.add_argument(
+            '--health-url',
+            type=str,
+            help='Health endpoint to read upstream rate limit stats from (default: /api/v1/health on the --url host)'
+        )
+
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=60.0,
+            help='Per-request timeout in seconds (default: 60)'
+        )
+
+    def handle(self, *args, **options):
+        if options['rps'] <= 0 or options['duration'] <= 0:
+            raise CommandError('--rps and --duration must be positive')
+
+        lanes = self._load_lanes(options['lanes']) if options['lanes'] else DEFAULT_LANES
+        total = max(1, int(options['rps'] * options['duration']))
+        interval = 1.0 / options['rps']
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Load Test'))
+        self.stdout.write(
+            f"{options['url']} | {options['rps']:g} rps for {options['duration']:g}s "
+            f"({total} requests, {len(lanes)} lanes, concurrency {options['concurrency']})"
+        )
+
+        health_url = options['health_url'] or urljoin(options['url'], '/api/v1/health')
+        limits_before = self._rate_limit_stats(health_url)
+
+        local = threading.local()
+        results = []
+        results_lock = threading.Lock()
+
+        def send(scheduled_at, start, end):
+            # Open loop: latency counts from the scheduled send time, so a
+            # slow server shows up as queueing instead of a lower request rate
+            session = getattr(local, 'session', None)
+            if session is None:
+                session = local.session = requests.Session()
+            sent_at = time.monotonic()
+            try:
+                response = session.post(
+                    options['url'],
+                    json={'start_location': start, 'end_location': end},
+                    timeout=options['timeout']
+                )
+                status = response.status_code
+            except requests.RequestException:
+                status = None
+            finished_at = time.monotonic()
+            with results_lock:
+                results.append((finished_at - scheduled_at, finished_at - sent_at, status))
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            for i, (start, end) in zip(range(total), itertools.cycle(lanes)):
+                scheduled_at = started + i * interval
+                delay = scheduled_at - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(send, scheduled_at, start, end)
+        elapsed = time.monotonic() - started
+
+        self._report(results, elapsed)
+        self._report_rate_limits(limits_before, self._rate_limit_stats(health_url))
+
+    def _rate_limit_stats(self, health_url):
+
+        # Shared by every server process, so the difference over the run is
+        # what this test caused (plus anything else hitting the upstreams)
+        try:
+            return requests.get(health_url, timeout=5).json().get('upstream_rate_limits')
+        except (requests.RequestException, ValueError):
+            return None
+
+    def _report_rate_limits(self, before, after):
+
+        if before is None or after is None:
+            self.stdout.write('  Upstream rate limits: health endpoint unavailable')
+            return
+        if not after:
+            self.stdout.write('  Upstream rate limits: none hit')
+            return
+
+        for key, stats in after.items():
+            previous = before.get(key, {})
+            acquired = stats['acquired'] - previous.get('acquired', 0)
+            rejected = stats['rejected'] - previous.get('rejected', 0)
+            waited = stats['wait_total'] - previous.get('wait_total', 0.0)
+            average = waited / acquired if acquired else 0.0
+            self.stdout.write(
+                f'  Rate limit {key}: {acquired} acquired | {rejected} rejected | '
+                f'avg wait {average * 1000:.0f}ms | max wait {stats["wait_max"] * 1000:.0f}ms (all time)'
+            )
+
+    def _load_lanes(self, path):
+
+        lanes_file = Path(path)
+        if not lanes_file.exists():
+            raise CommandError(f'File not found: {lanes_file}')
+
+        with open(lanes_file, 'r', encoding='utf-8') as f:
+            if lanes_file.suffix.lower() == '.jsonl':
+                rows = [json.loads(line) for line in f if line.strip()]
+            else:
+                rows = list(csv.DictReader(f))
+
+        try:
+            lanes = [(row['start_location'].strip(), row['end_location'].strip()) for row in rows]
+        except (KeyError, AttributeError):
+            raise CommandError('Every lane needs start_location and end_location')
+        if not lanes:
+            raise CommandError('No lanes found')
+        return lanes
+
+    def _report(self, results, elapsed):
+
+        latencies = np.array([r[0] for r in results]) * 1000
+        service_times = np.array([r[1] for r in results]) * 1000
+        statuses = [r[2] for r in results]
+        ok = sum(1 for s in statuses if s == 200)
+        failed = len(statuses) - ok
+
+        self.stdout.write(f'Completed {len(results)} requests in {elapsed:.1f}s ({len(results) / elapsed:.1f} rps)')
+        for label, values in (('Latency', latencies), ('Service time', service_times)):
+            p50, p90, p99 = np.percentile(values, [50, 90, 99])
+            self.stdout.write(
+                f'  {label:<13} p50 {p50:.0f}ms | p90 {p90:.0f}ms | p99 {p99:.0f}ms | max {values.max():.0f}ms'
+            )
+
+        codes = {}
+        for status in statuses:
+            key = str(status) if status is not None else 'connection error'
+            codes[key] = codes.get(key, 0) + 1
+        self.stdout.write('  Status codes: ' + ', '.join(f'{k}: {v}' for k, v in sorted(codes.items())))
+
+        if failed:
+            self.stdout.write(self.style.WARNING(f'✗ {failed} requests failed'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✓ All {ok} requests succeeded'))
@@ -0,0 +1,125 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Avg
+from optimizer.models import FuelStation
+from optimizer.services.map_service import MapService
+from optimizer.services.mock_upstream_server import MockUpstreamServer
+
+
+class Command(BaseCommand):
+    help = (
+        'Run a local stand-in for OSRM and Nominatim that replays recorded '
+        'fixtures or synthetic responses, with optional latency and errors'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--host',
+            type=str,
+            default='127.0.0.1',
+            help='Bind address (default: 127.0.0.1)'
+        )
+
+        parser.add_argument(
+            '--port',
+            type=int,
+            default=8089,
+            help='Port (default: 8089)'
+        )
+
+        parser.add_argument(
+            '--fixtures',
+            type=str,
+            help='Directory of recorded responses to replay (and to write with --record)'
+        )
+
+        parser.add_argument(
+            '--record',
+            action='store_true',
+            help='Proxy fixture misses to the real upstreams and save the responses'
+        )
+
+        parser.add_argument(
+            '--latency-ms',
+            type=float,
+            default=0.0,
+            help='Mean added latency per response in milliseconds (default: 0)'
+        )
+
+        parser.add_argument(
+            '--jitter-ms',
+            type=float,
+            default=0.0,
+            help='Uniform +/- jitter around the latency in milliseconds (default: 0)'
+        )
+
+        parser.add_argument(
+            '--error-rate',
+            type=float,
+            default=0.0,
+            help='Fraction of requests answered with HTTP 503 (default: 0)'
+        )
+
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Random seed for latency and error injection'
+        )
+
+        parser.add_argument(
+            '--no-station-places',
+            action='store_true',
+            help='Do not geocode "City, ST" queries to the mean location of geocoded stations there'
+        )
+
+    def handle(self, *args, **options):
+        if options['record'] and not options['fixtures']:
+            self.stdout.write(self.style.WARNING('--record has no effect without --fixtures'))
+
+        known_places = {} if options['no_station_places'] else self._station_places()
+
+        server = MockUpstreamServer(
+            host=options['host'],
+            port=options['port'],
+            fixtures_dir=options['fixtures'],
+            record=options['record'],
+            # The real services, never the (possibly mocked) configured ones
+            osrm_upstream=MapService.OSRM_BASE_URL,
+            nominatim_upstream=MapService.NOMINATIM_BASE_URL,
+            known_places=known_places,
+            latency_ms=options['latency_ms'],
+            jitter_ms=options['jitter_ms'],
+            error_rate=options['error_rate'],
+            seed=options['seed']
+        )
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Mock Upstreams'))
+        self.stdout.write(f'Listening on {server.address} ({len(known_places)} known places)')
+        self.stdout.write(f'  OSRM_BASE_URL={server.address}')
+        self.stdout.write(f'  NOMINATIM_BASE_URL={server.address}')
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+
+        stats = server.stats
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Served {stats['requests']} requests: {stats['fixtures']} fixtures, "
+            f"{stats['recorded']} recorded, {stats['synthetic']} synthetic, {stats['errors']} injected errors"
+        ))
+
+    def _station_places(self):
+
+        # Synthetic geocodes land near real stations, so synthetic routes are plannable
+        places = (
+            FuelStation.objects
+            .filter(geocoded=True)
+            .values('city', 'state')
+            .annotate(lat=Avg('lat'), lon=Avg('lon'))
+        )
+        return {
+            f"{place['city'].strip().lower()}, {place['state'].strip().lower()}": (place['lat'], place['lon'])
+            for place in places
+        }
@@ -0,0 +1,296 @@
+import csv
+import json
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from optimizer.services.routing_service import RoutingService
+from optimizer.services.worker_pool import OptimizationWorkerPool
+
+RESULT_COLUMNS = [
+    'row', 'start_location', 'end_location', 'distance_miles', 'duration_hours',
+    'total_cost', 'fuel_consumed_gallons', 'stops', 'solver_stats', 'error'
+]
+
+
+class JsonlResultWriter:
+
+    # One JSON object per line, flushed per lane so a crash loses nothing
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def last_completed_row(self):
+
+        if not self.path.exists():
+            return None
+
+        last_row = None
+        valid_bytes = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                # A crash can leave a half-written last line behind
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    last_row = json.loads(line)['row']
+                except (ValueError, KeyError):
+                    break
+                valid_bytes += len(line)
+
+        with open(self.path, 'r+b') as f:
+            f.truncate(valid_bytes)
+        return last_row
+
+    def open(self, append):
+        self._file = open(self.path, 'a' if append else 'w', encoding='utf-8')
+
+    def write(self, record):
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetResultWriter:
+
+    # A directory of part files, one per flushed batch (requires pyarrow)
+
+    def __init__(self, path, batch_size=1000):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise CommandError('Parquet output requires pyarrow (pip install pyarrow)')
+
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.schema = pyarrow.schema([
+            ('row', pyarrow.int64()),
+            ('start_location', pyarrow.string()),
+            ('end_location', pyarrow.string()),
+            ('distance_miles', pyarrow.float64()),
+            ('duration_hours', pyarrow.float64()),
+            ('total_cost', pyarrow.float64()),
+            ('fuel_consumed_gallons', pyarrow.float64()),
+            ('stops', pyarrow.string()),  # JSON encoded list
+            ('solver_stats', pyarrow.string()),  # JSON encoded dict
+            ('error', pyarrow.string()),
+        ])
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self._buffer = []
+
+    def _parts(self):
+        return sorted(self.path.glob('part-*.parquet'))
+
+    def last_completed_row(self):
+
+        parts = self._parts()
+        if not parts:
+            return None
+        rows = self.pq.read_table(parts[-1], columns=['row']).column('row').to_pylist()
+        return max(rows) if rows else None
+
+    def open(self, append):
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        if not append:
+            for part in self._parts():
+                part.unlink()
+        self._next_part = len(self._parts())
+
+    def write(self, record):
+
+        record = dict(
+            record,
+            stops=json.dumps(record['stops']),
+            solver_stats=json.dumps(record['solver_stats']) if record['solver_stats'] is not None else None
+        )
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+
+        if not self._buffer:
+            return
+        table = self.pa.Table.from_pylist(self._buffer, schema=self.schema)
+        part = self.path / f'part-{self._next_part:05d}.parquet'
+        tmp = part.with_suffix('.tmp')
+        self.pq.write_table(table, tmp)
+        tmp.replace(part)  # a part is either complete or absent
+        self._next_part += 1
+        self._buffer = []
+
+    def close(self):
+        self._flush()
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream lanes (CSV or JSONL with start_location/end_location) through '
+        'geocode -> route -> optimize and write results incrementally'
+    )
+    # progress(current, total, message) callback, passed by background jobs
+    stealth_options = ('progress',)
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'lanes',
+            type=str,
+            help='Input .csv or .jsonl file with start_location and end_location fields'
+        )
+
+        parser.add_argument(
+            '--output',
+            type=str,
+            required=True,
+            help='Output .jsonl file, or a directory of Parquet parts with --format parquet'
+        )
+
+        parser.add_argument(
+            '--format',
+            type=str,
+            choices=['jsonl', 'parquet'],
+            default='jsonl',
+            help='Output format (default: jsonl)'
+        )
+
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Skip lanes already present in the output and append the rest'
+        )
+
+        parser.add_argument(
+            '--mode',
+            type=str,
+            choices=OptimizationWorkerPool.MODES,
+            help='Worker pool type (default: OPTIMIZATION_POOL_MODE setting)'
+        )
+
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Optimization workers (default: OPTIMIZATION_POOL_WORKERS setting or CPU count)'
+        )
+
+        parser.add_argument(
+            '--upstream-concurrency',
+            type=int,
+            default=4,
+            help='Max concurrent geocoding/routing lookups (default: 4)'
+        )
+
+        parser.add_argument(
+            '--max-in-flight',
+            type=int,
+            help='Max lanes held in memory at once (default: derived from concurrency)'
+        )
+
+        parser.add_argument(
+            '--include-geometry',
+            action='store_true',
+            help='Include the route geometry in each JSONL record'
+        )
+
+        parser.add_argument(
+            '--progress-every',
+            type=int,
+            default=100,
+            help='Report progress every N lanes (default: 100)'
+        )
+
+    def handle(self, *args, **options):
+        lanes_file = Path(options['lanes'])
+        if not lanes_file.exists():
+            raise CommandError(f'File not found: {lanes_file}')
+
+        if options['format'] == 'parquet':
+            writer = ParquetResultWriter(options['output'])
+        else:
+            writer = JsonlResultWriter(options['output'])
+
+        progress = options.get('progress') or (lambda *args: None)
+        resume_after = writer.last_completed_row() if options['resume'] else None
+        include_geometry = options['include_geometry'] and options['format'] == 'jsonl'
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Planning Routes'))
+        if resume_after is not None:
+            self.stdout.write(f'Resuming after row {resume_after}')
+
+        lanes = self._read_lanes(lanes_file, resume_after)
+        writer.open(append=options['resume'])
+
+        planned = failed = 0
+        started = time.monotonic()
+        try:
+            with OptimizationWorkerPool(mode=options['mode'], workers=options['workers']) as pool:
+                self.stdout.write(
+                    f'Pool: {pool.mode} x {pool.workers} | '
+                    f'Upstream concurrency: {options["upstream_concurrency"]}'
+                )
+                service = RoutingService(optimization_pool=pool)
+                results = service.iter_optimal_routes(
+                    lanes,
+                    upstream_concurrency=max(1, options['upstream_concurrency']),
+                    max_in_flight=options['max_in_flight']
+                )
+
+                for (start, end, row), result in results:
+                    writer.write(self._record(row, start, end, result, include_geometry))
+                    planned += 1
+                    failed += 'error' in result
+                    progress(planned, None, f'Row {row}, {failed} failed')
+
+                    if planned % options['progress_every'] == 0:
+                        rate = planned / max(time.monotonic() - started, 1e-9)
+                        self.stdout.write(f'  Row {row}: {planned} lanes planned ({rate:.1f} lanes/s, {failed} failed)')
+        finally:
+            writer.close()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Planned {planned} lanes in {elapsed:.1f}s -> {options["output"]}'
+        ))
+        if failed:
+            self.stdout.write(self.style.WARNING(f'✗ {failed} lanes failed'))
+
+    def _read_lanes(self, lanes_file, resume_after):
+
+        # Generator: lanes are read lazily so the input never sits in memory
+        with open(lanes_file, 'r', encoding='utf-8') as f:
+            if lanes_file.suffix.lower() == '.jsonl':
+                rows = (json.loads(line) for line in f if line.strip())
+            else:
+                rows = csv.DictReader(f)
+
+            for row_number, row in enumerate(rows, start=1):
+                if resume_after is not None and row_number <= resume_after:
+                    continue
+                try:
+                    yield (row['start_location'].strip(), row['end_location'].strip(), row_number)
+                except (KeyError, AttributeError):
+                    raise CommandError(f'Row {row_number}: start_location and end_location are required')
+
+    def _record(self, row, start, end, result, include_geometry):
+
+        record = dict.fromkeys(RESULT_COLUMNS)
+        record.update({'row': row, 'start_location': start, 'end_location': end, 'stops': []})
+
+        if 'error' in result:
+            record['error'] = result['error']
+            return record
+
+        record.update({
+            'distance_miles': result['route']['distance_miles'],
+            'duration_hours': result['route']['duration_hours'],
+            'total_cost': result['total_cost'],
+            'fuel_consumed_gallons': result['fuel_consumed_gallons'],
+            'stops': result['stops'],
+            'solver_stats': result.get('solver_stats')
+        })
+        if include_geometry:
+            record['geometry'] = result['route']['geometry']
+        return record
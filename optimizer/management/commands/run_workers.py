@@ -0,0 +1,101 @@
+import os
+import socket
+import threading
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from optimizer.models import Job
+from optimizer.services.job_service import JobService
+
+
+class Command(BaseCommand):
+    help = (
+        'Run background jobs (geocoding, re-ingestion, bulk planning) from the '
+        'database queue; start as many of these processes as needed'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            help='Jobs run at once by this process (default: JOB_WORKER_CONCURRENCY setting)'
+        )
+
+        parser.add_argument(
+            '--kind',
+            action='append',
+            choices=[kind for kind, _ in Job.KIND_CHOICES],
+            help='Only run jobs of this kind, repeatable (default: all kinds)'
+        )
+
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            help='Seconds between queue polls when idle (default: JOB_POLL_INTERVAL_SECONDS setting)'
+        )
+
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty instead of waiting for new jobs'
+        )
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency'] or getattr(settings, 'JOB_WORKER_CONCURRENCY', 2)
+        poll_interval = options['poll_interval'] or getattr(settings, 'JOB_POLL_INTERVAL_SECONDS', 2.0)
+        self.stop = threading.Event()
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Job Workers'))
+        self.stdout.write(
+            f"Concurrency: {concurrency} | Kinds: {', '.join(options['kind'] or ['all'])}"
+        )
+
+        threads = [
+            threading.Thread(
+                target=self._work,
+                args=(f'{socket.gethostname()}:{os.getpid()}:{slot}', options['kind'], poll_interval, options['once']),
+                name=f'job-worker-{slot}',
+                daemon=True
+            )
+            for slot in range(max(1, concurrency))
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=1)
+        except KeyboardInterrupt:
+            # Running jobs finish first; a second Ctrl-C kills them and their
+            # heartbeat goes stale, so another worker picks them up later
+            self.stdout.write(self.style.WARNING('Stopping after the running jobs...'))
+            self.stop.set()
+            for thread in threads:
+                thread.join()
+
+        self.stdout.write(self.style.SUCCESS('✓ Workers stopped'))
+
+    def _work(self, worker, kinds, poll_interval, once):
+
+        service = JobService()
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                service.requeue_stale()
+
+                job = service.claim(worker, kinds)
+                if job is None:
+                    if once:
+                        return
+                    self.stop.wait(poll_interval)
+                    continue
+
+                self.stdout.write(f'→ {worker} started {job}')
+                job = service.run(job)
+                if job.status == Job.STATUS_SUCCEEDED:
+                    self.stdout.write(self.style.SUCCESS(f'✓ {worker} {job}'))
+                else:
+                    self.stdout.write(self.style.WARNING(f'✗ {worker} {job}: {job.error or job.status}'))
+        finally:
+            connections.close_all()
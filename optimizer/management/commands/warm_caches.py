@@ -0,0 +1,57 @@
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from optimizer.services.warmup_service import WarmupService
+
+
+class Command(BaseCommand):
+    help = (
+        'Preload the station index and the geocodes, routes and corridors of '
+        'the most requested lanes into the shared caches (run before taking traffic)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lanes',
+            type=str,
+            help='CSV/JSONL lanes file or request log (default: WARMUP_LANES_FILE setting)'
+        )
+
+        parser.add_argument(
+            '--top',
+            type=int,
+            help='Number of most frequent lanes to warm (default: WARMUP_TOP_LANES setting)'
+        )
+
+        parser.add_argument(
+            '--upstream-concurrency',
+            type=int,
+            default=2,
+            help='Max concurrent geocoding/routing lookups (default: 2)'
+        )
+
+    def handle(self, *args, **options):
+        lanes_file = options['lanes'] or getattr(settings, 'WARMUP_LANES_FILE', '')
+        if lanes_file and not Path(lanes_file).exists():
+            raise CommandError(f'File not found: {lanes_file}')
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Warming Caches'))
+
+        result = WarmupService(
+            lanes_file=lanes_file,
+            top_lanes=options['top'],
+            upstream_concurrency=options['upstream_concurrency']
+        ).run()
+
+        if result['status'] != 'ready':
+            raise CommandError(f"Warmup failed: {result['error']}")
+
+        elapsed = result['finished_at'] - result['started_at']
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Warm in {elapsed:.1f}s: {result['stations']} stations indexed, "
+            f"{result['lanes_warmed']} lanes warmed"
+        ))
+        if result['lanes_failed']:
+            self.stdout.write(self.style.WARNING(f"✗ {result['lanes_failed']} lanes failed"))
+        if result['lanes_error']:
+            self.stdout.write(self.style.WARNING(f"✗ Lanes not warmed: {result['lanes_error']}"))
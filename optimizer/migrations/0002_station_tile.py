@@ -0,0 +1,34 @@
+# Generated by Django 5.0.1 on 2026-10-19 08:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('optimizer', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StationTile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zoom', models.PositiveSmallIntegerField(verbose_name='Zoom')),
+                ('x', models.PositiveIntegerField(verbose_name='Tile X')),
+                ('y', models.PositiveIntegerField(verbose_name='Tile Y')),
+                ('content', models.TextField(help_text='Serialized JSON payload (clusters or individual stations)', verbose_name='Content')),
+                ('etag', models.CharField(help_text='Hash of the content, changes only when the tile changes', max_length=64, verbose_name='ETag')),
+                ('station_count', models.PositiveIntegerField(default=0, verbose_name='Station Count')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+            ],
+            options={
+                'verbose_name': 'Station Tile',
+                'verbose_name_plural': 'Station Tiles',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='stationtile',
+            constraint=models.UniqueConstraint(fields=('zoom', 'x', 'y'), name='unique_station_tile'),
+        ),
+    ]
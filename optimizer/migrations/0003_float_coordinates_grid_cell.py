@@ -0,0 +1,64 @@
+# Generated by Django 5.0.1 on 2026-10-19 08:45
+
+import django.core.validators
+from django.db import migrations, models
+
+from optimizer.utils.grid import grid_cell_for
+
+
+def backfill_spatial_fields(apps, schema_editor):
+    FuelStation = apps.get_model('optimizer', 'FuelStation')
+
+    stations = []
+    queryset = FuelStation.objects.exclude(latitude__isnull=True).exclude(longitude__isnull=True)
+    for station in queryset.only('id', 'latitude', 'longitude').iterator(chunk_size=2000):
+        station.lat = float(station.latitude)
+        station.lon = float(station.longitude)
+        station.grid_cell = grid_cell_for(station.lat, station.lon)
+        stations.append(station)
+
+    FuelStation.objects.bulk_update(stations, ['lat', 'lon', 'grid_cell'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('optimizer', '0002_station_tile'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='fuelstation',
+            name='optimizer_f_latitud_5b4a28_idx',
+        ),
+        migrations.AddField(
+            model_name='fuelstation',
+            name='grid_cell',
+            field=models.IntegerField(blank=True, editable=False, help_text='Spatial grid cell id (see utils.grid)', null=True, verbose_name='Grid Cell'),
+        ),
+        migrations.AddField(
+            model_name='fuelstation',
+            name='lat',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Latitude (float)'),
+        ),
+        migrations.AddField(
+            model_name='fuelstation',
+            name='lon',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Longitude (float)'),
+        ),
+        migrations.AlterField(
+            model_name='fuelstation',
+            name='latitude',
+            field=models.DecimalField(blank=True, decimal_places=6, help_text='Latitude in decimal degrees', max_digits=9, null=True, validators=[django.core.validators.MinValueValidator(-90.0), django.core.validators.MaxValueValidator(90.0)], verbose_name='Latitude'),
+        ),
+        migrations.AlterField(
+            model_name='fuelstation',
+            name='longitude',
+            field=models.DecimalField(blank=True, decimal_places=6, help_text='Longitude in decimal degrees', max_digits=9, null=True, validators=[django.core.validators.MinValueValidator(-180.0), django.core.validators.MaxValueValidator(180.0)], verbose_name='Longitude'),
+        ),
+        migrations.AddIndex(
+            model_name='fuelstation',
+            index=models.Index(fields=['geocoded', 'grid_cell', 'retail_price', 'lat', 'lon'], name='optimizer_f_geocode_82fedf_idx'),
+        ),
+        migrations.RunPython(backfill_spatial_fields, migrations.RunPython.noop),
+    ]
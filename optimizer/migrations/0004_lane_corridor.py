@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-19 09:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('optimizer', '0003_float_coordinates_grid_cell'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LaneCorridor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(help_text='Hash of the route geometry and corridor parameters', max_length=40, unique=True, verbose_name='Route Fingerprint')),
+                ('route_length_miles', models.FloatField(verbose_name='Route Length (miles)')),
+                ('station_count', models.PositiveIntegerField(default=0, verbose_name='Station Count')),
+                ('stations', models.BinaryField(help_text='Packed CORRIDOR_DTYPE records (id, lat, lon, milepost, lateral), sorted by id', verbose_name='Stations')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+            ],
+            options={
+                'verbose_name': 'Lane Corridor',
+                'verbose_name_plural': 'Lane Corridors',
+                'indexes': [models.Index(fields=['created_at'], name='optimizer_l_created_123dfb_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.1 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('optimizer', '0004_lane_corridor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceStatistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('all', 'All stations'), ('state', 'State'), ('cell', 'Grid cell')], max_length=5, verbose_name='Scope')),
+                ('key', models.CharField(blank=True, help_text='State code or grid cell id (empty for all stations)', max_length=20, verbose_name='Key')),
+                ('station_count', models.PositiveIntegerField(default=0, verbose_name='Station Count')),
+                ('min_price', models.FloatField(verbose_name='Min Price')),
+                ('max_price', models.FloatField(verbose_name='Max Price')),
+                ('mean_price', models.FloatField(verbose_name='Mean Price')),
+                ('p10_price', models.FloatField(verbose_name='10th Percentile')),
+                ('p25_price', models.FloatField(verbose_name='25th Percentile')),
+                ('median_price', models.FloatField(verbose_name='Median Price')),
+                ('p75_price', models.FloatField(verbose_name='75th Percentile')),
+                ('p90_price', models.FloatField(verbose_name='90th Percentile')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+            ],
+            options={
+                'verbose_name': 'Price Statistic',
+                'verbose_name_plural': 'Price Statistics',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='pricestatistic',
+            constraint=models.UniqueConstraint(fields=('scope', 'key'), name='unique_price_statistic_group'),
+        ),
+    ]
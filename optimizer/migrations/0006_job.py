@@ -0,0 +1,43 @@
+# Generated by Django 5.0.1 on 2026-10-19 09:15
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('optimizer', '0005_price_statistic'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('geocode_stations', 'Geocode stations'), ('load_fuel_stations', 'Load fuel stations'), ('plan_routes', 'Plan routes')], max_length=40, verbose_name='Kind')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='queued', max_length=10, verbose_name='Status')),
+                ('params', models.JSONField(blank=True, default=dict, help_text='Command options, e.g. {"limit": 500, "state": "TX"}', verbose_name='Parameters')),
+                ('progress_current', models.PositiveIntegerField(default=0, verbose_name='Progress')),
+                ('progress_total', models.PositiveIntegerField(blank=True, help_text='Empty when the amount of work is not known up front', null=True, verbose_name='Progress Total')),
+                ('progress_message', models.CharField(blank=True, max_length=255, verbose_name='Progress Message')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Attempts')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3, verbose_name='Max Attempts')),
+                ('cancel_requested', models.BooleanField(default=False, verbose_name='Cancel Requested')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('log', models.TextField(blank=True, help_text='Tail of the command output', verbose_name='Log')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='Worker')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, help_text='Retries wait until this time', verbose_name='Run After')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Started At')),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True, verbose_name='Heartbeat At')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+            ],
+            options={
+                'verbose_name': 'Job',
+                'verbose_name_plural': 'Jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='optimizer_j_status_fb3fb6_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-19 09:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('optimizer', '0006_job'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='lanecorridor',
+            name='optimizer_l_created_123dfb_idx',
+        ),
+        migrations.AddField(
+            model_name='lanecorridor',
+            name='last_used_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Refreshed on cache hits, the least recently used lanes are evicted first', verbose_name='Last Used At'),
+        ),
+        migrations.AddIndex(
+            model_name='lanecorridor',
+            index=models.Index(fields=['last_used_at'], name='optimizer_l_last_us_968636_idx'),
+        ),
+    ]
@@ -1,3 +1,7 @@
 from .fuel_station import FuelStation
+from .station_tile import StationTile
+from .lane_corridor import LaneCorridor
+from .price_statistic import PriceStatistic
+from .job import Job
 
-__all__ = ['FuelStation']
\ No newline at end of file
+__all__ = ['FuelStation', 'StationTile', 'LaneCorridor', 'PriceStatistic', 'Job']
\ No newline at end of file
@@ -1,5 +1,6 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from optimizer.utils.grid import grid_cell_for
 
 
 class FuelStation(models.Model):
@@ -64,7 +65,6 @@ class FuelStation(models.Model):
             MinValueValidator(-90.0),
             MaxValueValidator(90.0)
         ],
-        db_index=True,
         help_text='Latitude in decimal degrees'
     )
     
@@ -78,10 +78,34 @@ class FuelStation(models.Model):
             MinValueValidator(-180.0),
             MaxValueValidator(180.0)
         ],
-        db_index=True,
         help_text='Longitude in decimal degrees'
     )
     
+    # Float copies of the coordinates plus their grid cell, kept in sync on
+    # save(). Spatial queries and bulk array loads read these instead of the
+    # Decimal columns so they never pay for Decimal conversion.
+    lat = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Latitude (float)'
+    )
+    
+    lon = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Longitude (float)'
+    )
+    
+    grid_cell = models.IntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Grid Cell',
+        help_text='Spatial grid cell id (see utils.grid)'
+    )
+    
     geocoded = models.BooleanField(
         default=False,
         verbose_name='Geocoded',
@@ -107,13 +131,31 @@ class FuelStation(models.Model):
         indexes = [
             models.Index(fields=['geocoded', 'retail_price']),
             models.Index(fields=['state', 'city']),
-            models.Index(fields=['latitude', 'longitude']),
+            # (geocoded, cell, price) prefix, lat/lon make it covering for
+            # corridor loads that only read id, coordinates and price
+            models.Index(fields=['geocoded', 'grid_cell', 'retail_price', 'lat', 'lon']),
         ]
     
     def __str__(self):
         """String representation of the fuel station."""
         return f"{self.name} - {self.city}, {self.state} (${self.retail_price}/gal)"
     
+    def save(self, *args, **kwargs):
+        self.sync_spatial_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and ({'latitude', 'longitude'} & set(update_fields)):
+            kwargs['update_fields'] = set(update_fields) | {'lat', 'lon', 'grid_cell'}
+        super().save(*args, **kwargs)
+    
+    def sync_spatial_fields(self):
+        """Refresh lat/lon/grid_cell from the Decimal coordinates (needed before bulk_update)."""
+        if self.latitude is not None and self.longitude is not None:
+            self.lat = float(self.latitude)
+            self.lon = float(self.longitude)
+            self.grid_cell = grid_cell_for(self.lat, self.lon)
+        else:
+            self.lat = self.lon = self.grid_cell = None
+    
     def get_coordinates(self):
 
         if self.geocoded and self.latitude and self.longitude:
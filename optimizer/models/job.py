@@ -0,0 +1,149 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+
+    # Background work (geocoding, re-ingestion, bulk planning) queued in the
+    # database and claimed row by row by run_workers (see JobService)
+
+    KIND_GEOCODE_STATIONS = 'geocode_stations'
+    KIND_LOAD_FUEL_STATIONS = 'load_fuel_stations'
+    KIND_PLAN_ROUTES = 'plan_routes'
+    KIND_CHOICES = [
+        (KIND_GEOCODE_STATIONS, 'Geocode stations'),
+        (KIND_LOAD_FUEL_STATIONS, 'Load fuel stations'),
+        (KIND_PLAN_ROUTES, 'Plan routes'),
+    ]
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+        (STATUS_CANCELLED, 'Cancelled'),
+    ]
+    FINISHED_STATUSES = (STATUS_SUCCEEDED, STATUS_FAILED, STATUS_CANCELLED)
+
+    kind = models.CharField(
+        max_length=40,
+        choices=KIND_CHOICES,
+        verbose_name='Kind'
+    )
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_QUEUED,
+        verbose_name='Status'
+    )
+
+    params = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Parameters',
+        help_text='Command options, e.g. {"limit": 500, "state": "TX"}'
+    )
+
+    progress_current = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Progress'
+    )
+
+    progress_total = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Progress Total',
+        help_text='Empty when the amount of work is not known up front'
+    )
+
+    progress_message = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='Progress Message'
+    )
+
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Attempts'
+    )
+
+    max_attempts = models.PositiveSmallIntegerField(
+        default=3,
+        verbose_name='Max Attempts'
+    )
+
+    cancel_requested = models.BooleanField(
+        default=False,
+        verbose_name='Cancel Requested'
+    )
+
+    error = models.TextField(
+        blank=True,
+        verbose_name='Error'
+    )
+
+    log = models.TextField(
+        blank=True,
+        verbose_name='Log',
+        help_text='Tail of the command output'
+    )
+
+    worker = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='Worker'
+    )
+
+    run_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Run After',
+        help_text='Retries wait until this time'
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Created At'
+    )
+
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Started At'
+    )
+
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Heartbeat At'
+    )
+
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Finished At'
+    )
+
+    class Meta:
+        verbose_name = 'Job'
+        verbose_name_plural = 'Jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+
+    def __str__(self):
+        """String representation of the job."""
+        return f"#{self.pk} {self.kind} ({self.status})"
+
+    @property
+    def progress_percent(self):
+
+        if not self.progress_total:
+            return None
+        return round(100 * min(self.progress_current, self.progress_total) / self.progress_total, 1)
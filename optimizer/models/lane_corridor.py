@@ -0,0 +1,51 @@
+from django.db import models
+from django.utils import timezone
+
+
+class LaneCorridor(models.Model):
+
+    # Stations within the corridor of one route, with their along-route
+    # position, so repeated lanes skip the geometry work (see CorridorCacheService)
+
+    fingerprint = models.CharField(
+        max_length=40,
+        unique=True,
+        verbose_name='Route Fingerprint',
+        help_text='Hash of the route geometry and corridor parameters'
+    )
+
+    route_length_miles = models.FloatField(
+        verbose_name='Route Length (miles)'
+    )
+
+    station_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Station Count'
+    )
+
+    stations = models.BinaryField(
+        verbose_name='Stations',
+        help_text='Packed CORRIDOR_DTYPE records (id, lat, lon, milepost, lateral), sorted by id'
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Created At'
+    )
+
+    last_used_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Last Used At',
+        help_text='Refreshed on cache hits, the least recently used lanes are evicted first'
+    )
+
+    class Meta:
+        verbose_name = 'Lane Corridor'
+        verbose_name_plural = 'Lane Corridors'
+        indexes = [
+            models.Index(fields=['last_used_at']),
+        ]
+
+    def __str__(self):
+        """String representation of the corridor."""
+        return f"Corridor {self.fingerprint[:10]} ({self.station_count} stations, {self.route_length_miles:.0f} mi)"
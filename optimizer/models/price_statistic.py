@@ -0,0 +1,60 @@
+from django.db import models
+
+
+class PriceStatistic(models.Model):
+
+    # Price distribution of the geocoded stations in one group (all stations,
+    # a state or a grid cell), refreshed at ingest time (see PriceStatsService)
+
+    SCOPE_ALL = 'all'
+    SCOPE_STATE = 'state'
+    SCOPE_CELL = 'cell'
+    SCOPE_CHOICES = [
+        (SCOPE_ALL, 'All stations'),
+        (SCOPE_STATE, 'State'),
+        (SCOPE_CELL, 'Grid cell'),
+    ]
+
+    scope = models.CharField(
+        max_length=5,
+        choices=SCOPE_CHOICES,
+        verbose_name='Scope'
+    )
+
+    key = models.CharField(
+        max_length=20,
+        blank=True,
+        verbose_name='Key',
+        help_text='State code or grid cell id (empty for all stations)'
+    )
+
+    station_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Station Count'
+    )
+
+    min_price = models.FloatField(verbose_name='Min Price')
+    max_price = models.FloatField(verbose_name='Max Price')
+    mean_price = models.FloatField(verbose_name='Mean Price')
+    p10_price = models.FloatField(verbose_name='10th Percentile')
+    p25_price = models.FloatField(verbose_name='25th Percentile')
+    median_price = models.FloatField(verbose_name='Median Price')
+    p75_price = models.FloatField(verbose_name='75th Percentile')
+    p90_price = models.FloatField(verbose_name='90th Percentile')
+
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Updated At'
+    )
+
+    class Meta:
+        verbose_name = 'Price Statistic'
+        verbose_name_plural = 'Price Statistics'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='unique_price_statistic_group'),
+        ]
+
+    def __str__(self):
+        """String representation of the statistic."""
+        label = f"{self.scope} {self.key}".strip()
+        return f"{label}: ${self.mean_price:.3f} mean over {self.station_count} stations"
@@ -0,0 +1,50 @@
+from django.db import models
+
+
+class StationTile(models.Model):
+
+    # Pre-aggregated station data for one z/x/y map tile, served as-is by the API
+
+    zoom = models.PositiveSmallIntegerField(
+        verbose_name='Zoom'
+    )
+
+    x = models.PositiveIntegerField(
+        verbose_name='Tile X'
+    )
+
+    y = models.PositiveIntegerField(
+        verbose_name='Tile Y'
+    )
+
+    content = models.TextField(
+        verbose_name='Content',
+        help_text='Serialized JSON payload (clusters or individual stations)'
+    )
+
+    etag = models.CharField(
+        max_length=64,
+        verbose_name='ETag',
+        help_text='Hash of the content, changes only when the tile changes'
+    )
+
+    station_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Station Count'
+    )
+
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Updated At'
+    )
+
+    class Meta:
+        verbose_name = 'Station Tile'
+        verbose_name_plural = 'Station Tiles'
+        constraints = [
+            models.UniqueConstraint(fields=['zoom', 'x', 'y'], name='unique_station_tile'),
+        ]
+
+    def __str__(self):
+        """String representation of the tile."""
+        return f"Tile {self.zoom}/{self.x}/{self.y} ({self.station_count} stations)"
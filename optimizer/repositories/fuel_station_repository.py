@@ -3,9 +3,27 @@ Repository pattern for FuelStation data access.
 Abstracts database queries from business logic.
 """
 
-from typing import List, Optional, Tuple
-from optimizer.models import FuelStation
-from django.db.models import QuerySet
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from optimizer.models import FuelStation, PriceStatistic
+from optimizer.utils.grid import grid_cells_for_box
+from django.conf import settings
+from django.db.models import Count, FloatField, Q, QuerySet, Sum
+from django.db.models.functions import Cast
+
+# Materialized price statistics, loaded once per process (see get_price_statistics)
+_price_stats = None
+_price_stats_loaded_at = 0.0
+_price_stats_lock = threading.Lock()
+
+
+def reset_price_statistics():
+    """Drop this process's copy of the price statistics (after a refresh)."""
+    global _price_stats
+    with _price_stats_lock:
+        _price_stats = None
 
 
 class FuelStationRepository:
@@ -53,10 +71,10 @@ class FuelStationRepository:
         """
         queryset = FuelStation.objects.filter(
             geocoded=True,
-            latitude__gte=min_lat,
-            latitude__lte=max_lat,
-            longitude__gte=min_lon,
-            longitude__lte=max_lon
+            lat__gte=min_lat,
+            lat__lte=max_lat,
+            lon__gte=min_lon,
+            lon__lte=max_lon
         )
         
         if order_by_price:
@@ -64,6 +82,124 @@ class FuelStationRepository:
         
         return queryset
     
+    def get_stations_in_bounding_boxes(self, boxes: List[Dict[str, float]]) -> QuerySet:
+        """
+        Get stations inside any of several bounding boxes in a single query.
+        
+        Args:
+            boxes: List of dicts with min_lat, max_lat, min_lng and max_lng keys
+                   (the format returned by utils.distance.calculate_bounding_box)
+        
+        Returns:
+            QuerySet of geocoded FuelStation objects inside at least one box
+        
+        Note:
+            Boxes are OR-ed together, so a station covered by overlapping
+            boxes is still returned only once.
+        """
+        if not boxes:
+            return FuelStation.objects.none()
+        
+        # The grid cell IN-list lets the (geocoded, grid_cell, ...) index do the
+        # coarse work, the float ranges then trim each box exactly
+        cells = set()
+        condition = Q()
+        for box in boxes:
+            cells.update(grid_cells_for_box(box))
+            condition |= Q(
+                lat__gte=box['min_lat'],
+                lat__lte=box['max_lat'],
+                lon__gte=box['min_lng'],
+                lon__lte=box['max_lng']
+            )
+        
+        return FuelStation.objects.filter(condition, geocoded=True, grid_cell__in=sorted(cells))
+    
+    def get_station_arrays_in_bounding_boxes(self, boxes: List[Dict[str, float]]) -> Dict[str, np.ndarray]:
+        """
+        Load id, coordinates and price of the stations in any of the boxes as
+        NumPy arrays, without instantiating models or Decimals.
+        
+        Args:
+            boxes: Bounding boxes, see get_stations_in_bounding_boxes
+        
+        Returns:
+            Dict with 'ids' (int64), 'lats', 'lons' and 'prices' (float64) arrays
+        """
+        rows = list(
+            self.get_stations_in_bounding_boxes(boxes)
+            .annotate(price=Cast('retail_price', FloatField()))
+            .values_list('id', 'lat', 'lon', 'price')
+        )
+        
+        if not rows:
+            return {
+                'ids': np.empty(0, dtype=np.int64),
+                'lats': np.empty(0, dtype=np.float64),
+                'lons': np.empty(0, dtype=np.float64),
+                'prices': np.empty(0, dtype=np.float64)
+            }
+        
+        ids, lats, lons, prices = zip(*rows)
+        return {
+            'ids': np.array(ids, dtype=np.int64),
+            'lats': np.array(lats, dtype=np.float64),
+            'lons': np.array(lons, dtype=np.float64),
+            'prices': np.array(prices, dtype=np.float64)
+        }
+    
+    def get_station_prices(self, station_ids: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Current prices for known station ids, in the default (price, name)
+        ordering so ties break like get_station_arrays_in_bounding_boxes.
+        
+        Args:
+            station_ids: Primary keys to look up
+        
+        Returns:
+            Dict with 'ids' (int64) and 'prices' (float64) arrays; ids that no
+            longer exist or are not geocoded are left out
+        """
+        rows = list(
+            FuelStation.objects.filter(id__in=[int(i) for i in station_ids], geocoded=True)
+            .annotate(price=Cast('retail_price', FloatField()))
+            .values_list('id', 'price')
+        )
+        
+        if not rows:
+            return {'ids': np.empty(0, dtype=np.int64), 'prices': np.empty(0, dtype=np.float64)}
+        
+        ids, prices = zip(*rows)
+        return {'ids': np.array(ids, dtype=np.int64), 'prices': np.array(prices, dtype=np.float64)}
+    
+    def get_opis_ids(self, station_ids: np.ndarray) -> np.ndarray:
+        """
+        OPIS Truckstop IDs (the price history key) of the given stations.
+        
+        Args:
+            station_ids: Primary keys to look up
+        
+        Returns:
+            int32 array aligned with station_ids, -1 for unknown stations
+        """
+        keys = dict(
+            FuelStation.objects.filter(id__in=[int(i) for i in station_ids]).values_list('id', 'opis_id')
+        )
+        return np.array([int(keys.get(int(i), -1)) for i in station_ids], dtype=np.int32)
+    
+    def get_station_details(self, station_ids: List[int]) -> Dict[int, Dict]:
+        """
+        Get display fields for a handful of stations (e.g. the chosen stops).
+        
+        Args:
+            station_ids: Primary keys to fetch
+        
+        Returns:
+            Dict mapping station id to a dict with name, city and state
+        """
+        rows = FuelStation.objects.filter(id__in=list(station_ids)).values('id', 'name', 'city', 'state')
+        return {row['id']: row for row in rows}
+    
     def get_cheapest_stations(self, limit: int = 100) -> QuerySet:
         """
         Get the cheapest fuel stations.
@@ -116,10 +252,26 @@ class FuelStationRepository:
         """
         return FuelStation.objects.filter(
             geocoded=True,
-            latitude__gte=latitude - radius_degrees,
-            latitude__lte=latitude + radius_degrees,
-            longitude__gte=longitude - radius_degrees,
-            longitude__lte=longitude + radius_degrees
+            lat__gte=latitude - radius_degrees,
+            lat__lte=latitude + radius_degrees,
+            lon__gte=longitude - radius_degrees,
+            lon__lte=longitude + radius_degrees
+        )
+    
+    def get_station_layout_version(self) -> str:
+        """
+        Token that changes whenever the set of geocoded stations or their
+        coordinates change (prices don't count). Cached lane corridors are
+        keyed by it, so they never outlive the station data they came from.
+        
+        Returns:
+            Short string built from one aggregate query
+        """
+        totals = FuelStation.objects.filter(
+            geocoded=True, lat__isnull=False, lon__isnull=False
+        ).aggregate(count=Count('id'), ids=Sum('id'), lats=Sum('lat'), lons=Sum('lon'))
+        return 'db:{}:{}:{:.9f}:{:.9f}'.format(
+            totals['count'], totals['ids'] or 0, totals['lats'] or 0.0, totals['lons'] or 0.0
         )
     
     def count_geocoded_stations(self) -> int:
@@ -155,6 +307,57 @@ class FuelStationRepository:
         except FuelStation.DoesNotExist:
             return None
     
+    def get_price_statistics(self, scope: str = PriceStatistic.SCOPE_ALL, key='') -> Optional[Dict]:
+        """
+        Materialized price statistics of one group, O(1) from memory.
+        
+        The table is loaded once per process and reloaded when older than
+        PRICE_STATS_MAX_AGE_SECONDS (refreshes in this process drop it at once).
+        
+        Args:
+            scope: 'all', 'state' or 'cell'
+            key: State code or grid cell id (ignored for 'all')
+        
+        Returns:
+            Dict with station_count, min, max, mean, p10, p25, median, p75, p90
+            and updated_at, or None when the group has no geocoded stations
+        """
+        if scope == PriceStatistic.SCOPE_ALL:
+            key = ''
+        elif scope == PriceStatistic.SCOPE_STATE:
+            key = str(key).upper()
+        return self._price_statistics().get((scope, str(key)))
+    
+    def get_all_price_statistics(self, scope: str) -> Dict[str, Dict]:
+        """Materialized statistics of every group in a scope, keyed by state code / cell id."""
+        return {key: stats for (group_scope, key), stats in self._price_statistics().items() if group_scope == scope}
+    
+    @staticmethod
+    def _price_statistics() -> Dict[Tuple[str, str], Dict]:
+        
+        global _price_stats, _price_stats_loaded_at
+        
+        max_age = getattr(settings, 'PRICE_STATS_MAX_AGE_SECONDS', 60)
+        with _price_stats_lock:
+            if _price_stats is None or time.monotonic() - _price_stats_loaded_at > max_age:
+                _price_stats = {
+                    (row.scope, row.key): {
+                        'station_count': row.station_count,
+                        'min': row.min_price,
+                        'max': row.max_price,
+                        'mean': row.mean_price,
+                        'p10': row.p10_price,
+                        'p25': row.p25_price,
+                        'median': row.median_price,
+                        'p75': row.p75_price,
+                        'p90': row.p90_price,
+                        'updated_at': row.updated_at
+                    }
+                    for row in PriceStatistic.objects.all()
+                }
+                _price_stats_loaded_at = time.monotonic()
+            return _price_stats
+    
     def get_price_range(self) -> Tuple[float, float]:
         """
         Get the minimum and maximum fuel prices.
@@ -162,6 +365,11 @@ class FuelStationRepository:
         Returns:
             Tuple of (min_price, max_price)
         """
+        stats = self.get_price_statistics()
+        if stats is not None:
+            return (stats['min'], stats['max'])
+        
+        # Statistics not built yet (PriceStatsService.refresh)
         from django.db.models import Min, Max
         
         result = FuelStation.objects.filter(
@@ -186,6 +394,10 @@ class FuelStationRepository:
         Returns:
             Average price as float
         """
+        stats = self.get_price_statistics(PriceStatistic.SCOPE_STATE, state_code)
+        if stats is not None:
+            return stats['mean']
+        
         from django.db.models import Avg
         
         result = FuelStation.objects.filter(
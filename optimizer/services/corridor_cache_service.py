@@ -0,0 +1,142 @@
+import hashlib
+import numpy as np
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+from optimizer.models import LaneCorridor
+
+# One record per station inside a lane's corridor, sorted by id
+CORRIDOR_DTYPE = np.dtype([
+    ('id', np.int64),
+    ('lat', np.float64),
+    ('lon', np.float64),
+    ('milepost', np.float64),
+    ('lateral', np.float64),
+])
+
+# Bump when the way corridors are computed changes, old rows stop matching
+CORRIDOR_VERSION = 2
+
+# Hits refresh last_used_at at most this often, so hot lanes don't write per request
+TOUCH_INTERVAL_SECONDS = 60
+
+
+class CorridorCacheService:
+    """
+    Persisted corridor tables for repeated lanes.
+
+    A lane's corridor (which stations are near the route, at which milepost
+    and how far off it) only depends on the route geometry and station
+    coordinates. It is stored keyed by a fingerprint of the geometry and of
+    the station layout version the corridor was computed from, and later
+    requests for the same route join it with current prices instead of
+    redoing the corridor search and projection. A process still on older
+    station data can't reuse (or re-store over) a corridor from newer data,
+    nor the other way round. The least recently used lanes are evicted past
+    max_lanes; invalidate() drops rows early after a bulk reload.
+    """
+
+    def __init__(self, max_lanes=None):
+        self.max_lanes = (
+            max_lanes if max_lanes is not None
+            else getattr(settings, 'LANE_CORRIDOR_CACHE_MAX_LANES', 1000)
+        )
+
+    @property
+    def enabled(self):
+        return self.max_lanes > 0
+
+    @staticmethod
+    def fingerprint(route_array, corridor_width, segment_length, station_version):
+        """Stable key for a route geometry, the corridor parameters and the station layout version."""
+        digest = hashlib.sha1(np.ascontiguousarray(route_array, dtype=np.float32).tobytes())
+        digest.update(
+            f'|{corridor_width}|{segment_length}|{station_version}|v{CORRIDOR_VERSION}'.encode('utf-8')
+        )
+        return digest.hexdigest()
+
+    def get_stations(self, fingerprint, price_source):
+        """
+        Cached corridor joined with current prices, or None on a miss.
+
+        price_source is a FuelStationRepository or StationIndex; the result
+        has the same arrays as OptimizationService._get_stations_near_route,
+        in the price source's ordering.
+        """
+        if not self.enabled:
+            return None
+
+        row = LaneCorridor.objects.filter(fingerprint=fingerprint).values_list('stations', 'last_used_at').first()
+        if row is None:
+            return None
+        packed, last_used_at = row
+        self._touch(fingerprint, last_used_at)
+
+        records = np.frombuffer(bytes(packed), dtype=CORRIDOR_DTYPE)
+        current = price_source.get_station_prices(records['id'])
+        rows = records[np.searchsorted(records['id'], current['ids'])]
+
+        return {
+            'ids': current['ids'],
+            'lats': rows['lat'].copy(),
+            'lons': rows['lon'].copy(),
+            'prices': current['prices'],
+            'mileposts': rows['milepost'].copy(),
+            'laterals': rows['lateral'].copy()
+        }
+
+    def store(self, fingerprint, stations, route_length_miles):
+
+        if not self.enabled:
+            return
+
+        order = np.argsort(stations['ids'], kind='stable')
+        records = np.empty(len(order), dtype=CORRIDOR_DTYPE)
+        records['id'] = stations['ids'][order]
+        records['lat'] = stations['lats'][order]
+        records['lon'] = stations['lons'][order]
+        records['milepost'] = stations['mileposts'][order]
+        records['lateral'] = stations['laterals'][order]
+
+        # The cache is best effort: a busy database must not fail the request
+        try:
+            # One upsert statement: SQLite can't upgrade a read transaction to
+            # a write while other workers write, so avoid update_or_create
+            LaneCorridor.objects.bulk_create(
+                [LaneCorridor(
+                    fingerprint=fingerprint,
+                    route_length_miles=float(route_length_miles),
+                    station_count=len(records),
+                    stations=records.tobytes(),
+                    last_used_at=timezone.now()
+                )],
+                update_conflicts=True,
+                unique_fields=['fingerprint'],
+                update_fields=['route_length_miles', 'station_count', 'stations', 'last_used_at']
+            )
+
+            # Keep only the max_lanes most recently used corridors
+            stale = LaneCorridor.objects.order_by('-last_used_at').values_list('id', flat=True)[self.max_lanes:]
+            stale_ids = list(stale)
+            if stale_ids:
+                LaneCorridor.objects.filter(id__in=stale_ids).delete()
+        except DatabaseError as e:
+            print(f"Error storing lane corridor: {e}")
+
+    @staticmethod
+    def _touch(fingerprint, last_used_at):
+        """Mark a lane as recently used so eviction keeps it (LRU, not FIFO)."""
+        now = timezone.now()
+        if (now - last_used_at).total_seconds() < TOUCH_INTERVAL_SECONDS:
+            return
+        try:
+            LaneCorridor.objects.filter(fingerprint=fingerprint).update(last_used_at=now)
+        except DatabaseError:
+            # A missed touch only makes the lane look older, never wrong
+            pass
+
+    @staticmethod
+    def invalidate():
+        """Drop every cached corridor (after a bulk station reload, their rows can't match anymore)."""
+        deleted, _ = LaneCorridor.objects.all().delete()
+        return deleted
@@ -1,28 +1,32 @@
 
-import time
+from urllib.parse import urlsplit
 from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut, GeocoderServiceError
 from django.conf import settings
+from optimizer.utils.rate_limiter import get_rate_limiter
 
 class GeocodingService:
     
     def __init__(self):
-        self.geolocator = Nominatim(user_agent="fuel-route-optimizer-demo")
-        self.last_request_time = 0
-        self.rate_limit_seconds = getattr(settings, 'GEOCODING_RATE_LIMIT_SECONDS', 1.0)
+        base_url = urlsplit(getattr(settings, 'NOMINATIM_BASE_URL', 'https://nominatim.openstreetmap.org'))
+        self.geolocator = Nominatim(
+            user_agent="fuel-route-optimizer-demo",
+            domain=base_url.netloc + base_url.path.rstrip('/'),
+            scheme=base_url.scheme
+        )
+        # Same per-host budget as MapService, shared by every process
+        self.host = base_url.netloc
+        self.rate_limiter = get_rate_limiter(settings.RATE_LIMIT_DB)
+        self.rate = getattr(settings, 'UPSTREAM_RATE_LIMITS', {}).get(self.host)
 
     def geocode_station(self, city, state):
 
         query = f"{city}, {state}, USA"
         
-        # Enforce rate limiting
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.rate_limit_seconds:
-            time.sleep(self.rate_limit_seconds - time_since_last)
-            
         try:
-            self.last_request_time = time.time()
+            # Enforce rate limiting (batch geocoding waits as long as needed)
+            if self.rate:
+                self.rate_limiter.acquire(self.host, self.rate)
             location = self.geolocator.geocode(query, timeout=10)
             
             if location:
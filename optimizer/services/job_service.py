@@ -0,0 +1,254 @@
+import io
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management import call_command, get_commands, load_command_class
+from django.core.management.base import CommandError
+from django.db import DatabaseError, connection
+from django.db.models import F
+from django.utils import timezone
+from optimizer.models import Job
+
+# Job kind -> (management command, params passed as positional arguments)
+JOB_COMMANDS = {
+    Job.KIND_GEOCODE_STATIONS: ('geocode_stations', ()),
+    Job.KIND_LOAD_FUEL_STATIONS: ('load_fuel_stations', ()),
+    Job.KIND_PLAN_ROUTES: ('plan_routes', ('lanes',)),
+}
+
+LOG_TAIL_CHARS = 10000
+
+# Largest max_attempts the column (PositiveSmallIntegerField) holds
+MAX_ATTEMPTS_LIMIT = 32767
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def claimed_run(job):
+    """
+    The job's row while it is still this run's claim.
+
+    A claim is identified by its attempt number and start time: once the job
+    was requeued (or retried) and claimed again, writes from the earlier run
+    match nothing instead of overwriting the new run's state.
+    """
+    return Job.objects.filter(
+        pk=job.pk, status=Job.STATUS_RUNNING, attempts=job.attempts, started_at=job.started_at
+    )
+
+
+class JobContext:
+    """
+    Handed to the running command as its progress callback.
+
+    Progress is written at most every interval seconds; on the same write the
+    cancel flag is read back and JobCancelled is raised if someone asked the
+    job to stop, or if the job is no longer this run's (it was requeued).
+    """
+
+    def __init__(self, job, interval=1.0):
+        self.job = job
+        self.interval = interval
+        self._last_write = 0.0
+
+    def __call__(self, current, total=None, message=''):
+        now = time.monotonic()
+        if now - self._last_write < self.interval:
+            return
+        self._last_write = now
+
+        owned = claimed_run(self.job).update(
+            progress_current=current,
+            progress_total=total,
+            progress_message=str(message)[:255]
+        )
+        if not owned or claimed_run(self.job).filter(cancel_requested=True).exists():
+            raise JobCancelled()
+
+
+class JobHeartbeat:
+    """
+    Background thread stamping a running job's heartbeat_at every interval
+    seconds, for as long as the command runs. Commands may report progress
+    rarely (load_fuel_stations reports once), so liveness can't depend on it.
+    """
+
+    def __init__(self, job, interval):
+        self.job = job
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name=f'job-heartbeat-{job.pk}', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+
+    def _beat(self):
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    if not claimed_run(self.job).update(heartbeat_at=timezone.now()):
+                        return  # Requeued or finished, nothing left to keep alive
+                except DatabaseError as e:
+                    # e.g. SQLite busy while the command holds a write transaction
+                    print(f"Job {self.job.pk} heartbeat failed: {e}")
+        finally:
+            connection.close()
+
+
+class JobService:
+    """
+    Database-backed job queue, no broker needed.
+
+    Workers claim queued rows optimistically: pick the oldest runnable id,
+    then flip it to running with an UPDATE guarded by status='queued'. Only
+    one worker's UPDATE matches, the others move on to the next row. Failed
+    attempts are retried with exponential backoff up to max_attempts, and
+    jobs whose worker stopped heartbeating are put back in the queue.
+    """
+
+    def __init__(self):
+        self.stale_seconds = getattr(settings, 'JOB_STALE_SECONDS', 600)
+        self.backoff_seconds = getattr(settings, 'JOB_RETRY_BACKOFF_SECONDS', 30)
+
+    def submit(self, kind, params=None, max_attempts=None):
+        """Queue a job, returns it."""
+        self.validate(kind, params or {})
+        if max_attempts is None:
+            max_attempts = getattr(settings, 'JOB_MAX_ATTEMPTS', 3)
+        self.validate_max_attempts(max_attempts)
+        return Job.objects.create(kind=kind, params=params or {}, max_attempts=max_attempts)
+
+    def validate(self, kind, params):
+        """Raise ValueError for an unknown kind or options its command would reject."""
+        if kind not in JOB_COMMANDS:
+            raise ValueError(f"Unknown job kind '{kind}'")
+        if not isinstance(params, dict):
+            raise ValueError('Job parameters must be an object')
+
+        # Bad options fail at submit time rather than after max_attempts retries
+        command, positional = JOB_COMMANDS[kind]
+        parser = load_command_class(get_commands()[command], command).create_parser('manage.py', command)
+        try:
+            parser.parse_args(self._command_args(params, positional))
+        except CommandError as e:
+            raise ValueError(f'Invalid parameters for {kind}: {e}')
+
+    @staticmethod
+    def validate_max_attempts(max_attempts):
+        """Raise ValueError unless max_attempts is a whole number of attempts the column can hold."""
+        if isinstance(max_attempts, bool) or not isinstance(max_attempts, int) \
+                or not 1 <= max_attempts <= MAX_ATTEMPTS_LIMIT:
+            raise ValueError(f'max_attempts must be an integer between 1 and {MAX_ATTEMPTS_LIMIT}')
+
+    def cancel(self, job_id):
+        """Cancel a queued job at once, or ask a running one to stop. Returns False if already finished."""
+        now = timezone.now()
+        if Job.objects.filter(pk=job_id, status=Job.STATUS_QUEUED).update(
+                status=Job.STATUS_CANCELLED, finished_at=now):
+            return True
+        return bool(Job.objects.filter(pk=job_id, status=Job.STATUS_RUNNING).update(cancel_requested=True))
+
+    def retry(self, job_id):
+        """Queue a failed or cancelled job again with a fresh set of attempts."""
+        return bool(Job.objects.filter(
+            pk=job_id, status__in=[Job.STATUS_FAILED, Job.STATUS_CANCELLED]
+        ).update(
+            status=Job.STATUS_QUEUED, attempts=0, cancel_requested=False, error='',
+            progress_current=0, progress_total=None, progress_message='',
+            run_after=timezone.now(), started_at=None, finished_at=None
+        ))
+
+    def claim(self, worker, kinds=None):
+        """Take the oldest runnable job for this worker, or None."""
+        while True:
+            queued = Job.objects.filter(status=Job.STATUS_QUEUED, run_after__lte=timezone.now())
+            if kinds:
+                queued = queued.filter(kind__in=kinds)
+            job_id = queued.order_by('run_after', 'id').values_list('id', flat=True).first()
+            if job_id is None:
+                return None
+
+            now = timezone.now()
+            claimed = Job.objects.filter(pk=job_id, status=Job.STATUS_QUEUED).update(
+                status=Job.STATUS_RUNNING, worker=worker, attempts=F('attempts') + 1,
+                started_at=now, heartbeat_at=now, finished_at=None
+            )
+            if claimed:
+                return Job.objects.get(pk=job_id)
+            # Another worker got it first, try the next one
+
+    def requeue_stale(self):
+        """Give jobs whose worker stopped heartbeating back to the queue (or fail them). Returns the count."""
+        cutoff = timezone.now() - timedelta(seconds=self.stale_seconds)
+        stale = Job.objects.filter(status=Job.STATUS_RUNNING, heartbeat_at__lt=cutoff)
+
+        failed = stale.filter(attempts__gte=F('max_attempts')).update(
+            status=Job.STATUS_FAILED, error='Worker stopped responding', finished_at=timezone.now()
+        )
+        requeued = stale.filter(attempts__lt=F('max_attempts')).update(
+            status=Job.STATUS_QUEUED, error='Worker stopped responding', run_after=timezone.now()
+        )
+        return failed + requeued
+
+    def run(self, job):
+        """Execute a claimed job and record how it ended."""
+        command, positional = JOB_COMMANDS[job.kind]
+        output = io.StringIO()
+        context = JobContext(job)
+
+        try:
+            # Heartbeats come from their own thread, several per stale period
+            with JobHeartbeat(job, interval=max(1.0, self.stale_seconds / 4)):
+                call_command(command, *self._command_args(job.params, positional),
+                             stdout=output, stderr=output, progress=context)
+        except Exception as e:
+            # The command may wrap JobCancelled in its own error
+            if isinstance(e, JobCancelled) or claimed_run(job).filter(cancel_requested=True).exists():
+                self._finish(job, Job.STATUS_CANCELLED, output)
+            elif job.attempts < job.max_attempts:
+                delay = self.backoff_seconds * 2 ** (job.attempts - 1)
+                claimed_run(job).update(
+                    status=Job.STATUS_QUEUED, error=str(e), log=self._tail(output),
+                    run_after=timezone.now() + timedelta(seconds=delay)
+                )
+            else:
+                self._finish(job, Job.STATUS_FAILED, output, error=str(e))
+        else:
+            self._finish(job, Job.STATUS_SUCCEEDED, output, done=True)
+
+        job.refresh_from_db()
+        return job
+
+    @staticmethod
+    def _command_args(params, positional):
+
+        # Params are command options: {"limit": 500, "skip_tiles": true} -> --limit 500 --skip-tiles
+        args = [str(params[name]) for name in positional if name in params]
+        for name, value in params.items():
+            if name in positional or value is None or value is False:
+                continue
+            flag = '--' + name.replace('_', '-')
+            args.extend([flag] if value is True else [flag, str(value)])
+        return args
+
+    def _finish(self, job, status, output, error='', done=False):
+
+        # Only while the claim is still ours: a run that was requeued for a
+        # missed heartbeat must not overwrite the status of the run after it
+        finished = claimed_run(job)
+        if done:
+            # Jobs with a known amount of work end at 100%
+            finished.filter(progress_total__isnull=False).update(progress_current=F('progress_total'))
+        finished.update(status=status, error=error, log=self._tail(output), finished_at=timezone.now())
+
+    @staticmethod
+    def _tail(output):
+        return output.getvalue()[-LOG_TAIL_CHARS:]
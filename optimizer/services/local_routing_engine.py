@@ -0,0 +1,294 @@
+import heapq
+import json
+import math
+from pathlib import Path
+import numpy as np
+from optimizer.utils.constants import EARTH_RADIUS_MILES, MILES_TO_KM
+from optimizer.utils.grid import GRID_COLUMNS, grid_cell_array
+
+EARTH_RADIUS_METERS = EARTH_RADIUS_MILES * MILES_TO_KM * 1000
+
+# Files making up a prebuilt graph directory (see build_road_graph command)
+GRAPH_ARRAYS = (
+    'node_lat', 'node_lon',                 # float64 per node
+    'indptr', 'indices',                    # forward CSR (int64 / int32)
+    'distance', 'duration',                 # float32 per forward edge (m, s)
+    'rev_indptr', 'rev_indices', 'rev_edge',  # reverse CSR, rev_edge -> forward edge id
+    'node_cell_order', 'node_sorted_cells',  # nodes sorted by grid cell, for snapping
+)
+
+
+class RoadGraph:
+    """
+    Compact directed road graph stored as CSR arrays, memory-mapped read-only
+    so every process shares the same page-cache copy.
+    """
+
+    def __init__(self, graph_dir):
+        self.graph_dir = Path(graph_dir)
+        for name in GRAPH_ARRAYS:
+            setattr(self, name, np.load(self.graph_dir / f'{name}.npy', mmap_mode='r'))
+
+        with open(self.graph_dir / 'meta.json', 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        # Fastest edge in the graph, keeps the A* time heuristic admissible
+        self.max_speed_mps = float(self.meta['max_speed_mps'])
+
+    @property
+    def node_count(self):
+        return len(self.node_lat)
+
+    @staticmethod
+    def build(graph_dir, node_lats, node_lons, sources, targets, distances, durations):
+        """Write a graph directory from plain edge arrays (node ids are 0..n-1)."""
+        graph_dir = Path(graph_dir)
+        graph_dir.mkdir(parents=True, exist_ok=True)
+
+        node_lats = np.asarray(node_lats, dtype=np.float64)
+        node_lons = np.asarray(node_lons, dtype=np.float64)
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        distances = np.asarray(distances, dtype=np.float32)
+        durations = np.maximum(np.asarray(durations, dtype=np.float32), 1e-3)
+        n = len(node_lats)
+
+        order = np.argsort(sources, kind='stable')
+        sources, targets = sources[order], targets[order]
+        distances, durations = distances[order], durations[order]
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+
+        rev_order = np.argsort(targets, kind='stable')
+        rev_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(targets, minlength=n), out=rev_indptr[1:])
+
+        cells = grid_cell_array(node_lats, node_lons)
+        cell_order = np.argsort(cells, kind='stable')
+
+        arrays = {
+            'node_lat': node_lats,
+            'node_lon': node_lons,
+            'indptr': indptr,
+            'indices': targets.astype(np.int32),
+            'distance': distances,
+            'duration': durations,
+            'rev_indptr': rev_indptr,
+            'rev_indices': sources[rev_order].astype(np.int32),
+            'rev_edge': rev_order.astype(np.int64),
+            'node_cell_order': cell_order.astype(np.int64),
+            'node_sorted_cells': cells[cell_order],
+        }
+        for name, values in arrays.items():
+            np.save(graph_dir / f'{name}.npy', values)
+
+        meta = {
+            'nodes': int(n),
+            'edges': int(len(targets)),
+            'max_speed_mps': float((distances / durations).max()) if len(distances) else 1.0
+        }
+        with open(graph_dir / 'meta.json', 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        return meta
+
+
+class LocalRoutingEngine:
+
+    # Answers route queries on a RoadGraph with bidirectional A* (fastest path)
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def route(self, coordinates):
+        """
+        Route through (lat, lon) coordinates in order.
+
+        Returns the same shape as the OSRM /route response used by
+        MapService.get_route, or None when no path exists.
+        """
+        nodes = [self.nearest_node(lat, lon) for lat, lon in coordinates]
+        if any(node is None for node in nodes):
+            return None
+
+        path_nodes, legs = [nodes[0]], []
+        for source, target in zip(nodes[:-1], nodes[1:]):
+            leg = self.shortest_path(source, target)
+            if leg is None:
+                return None
+            leg_nodes, leg_edges = leg
+            legs.append({
+                'distance': float(self.graph.distance[leg_edges].sum()) if leg_edges else 0.0,
+                'duration': float(self.graph.duration[leg_edges].sum()) if leg_edges else 0.0,
+                'steps': [],
+                'summary': ''
+            })
+            path_nodes.extend(leg_nodes[1:])
+
+        path = np.array(path_nodes, dtype=np.int64)
+        geometry = np.column_stack((self.graph.node_lon[path], self.graph.node_lat[path]))
+
+        distance = sum(leg['distance'] for leg in legs)
+        duration = sum(leg['duration'] for leg in legs)
+        return {
+            'code': 'Ok',
+            'routes': [{
+                'distance': distance,
+                'duration': duration,
+                'weight': duration,
+                'weight_name': 'duration',
+                'geometry': {'type': 'LineString', 'coordinates': geometry.tolist()},
+                'legs': legs
+            }],
+            'waypoints': [
+                {
+                    'name': '',
+                    'location': [float(self.graph.node_lon[node]), float(self.graph.node_lat[node])]
+                }
+                for node in nodes
+            ]
+        }
+
+    def nearest_node(self, lat, lon, max_rings=4):
+
+        # Search growing rings of grid cells around the query point. Once a
+        # ring has nodes, one more ring is included so a closer node just
+        # across a cell edge is not missed.
+        graph = self.graph
+        center = int(grid_cell_array(np.array([lat]), np.array([lon]))[0])
+        row, col = divmod(center, GRID_COLUMNS)
+
+        found_at = None
+        for ring in range(max_rings + 1):
+            nodes = self._nodes_within_ring(row, col, ring)
+            if len(nodes) and found_at is None:
+                found_at = ring
+            if found_at is not None and (ring > found_at or ring == max_rings):
+                distances = self._haversine_m(lat, lon, graph.node_lat[nodes], graph.node_lon[nodes])
+                return int(nodes[distances.argmin()])
+
+        return None
+
+    def _nodes_within_ring(self, row, col, ring):
+
+        graph = self.graph
+        cells = [
+            (row + dr) * GRID_COLUMNS + (col + dc)
+            for dr in range(-ring, ring + 1) for dc in range(-ring, ring + 1)
+        ]
+        starts = np.searchsorted(graph.node_sorted_cells, cells, side='left')
+        ends = np.searchsorted(graph.node_sorted_cells, cells, side='right')
+        chunks = [graph.node_cell_order[a:b] for a, b in zip(starts, ends) if b > a]
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
+
+    def shortest_path(self, source, target):
+        """
+        Bidirectional A* with averaged potentials.
+
+        p(v) = (h_target(v) - h_source(v)) / 2 is consistent for both
+        directions, so both searches run Dijkstra on the same reduced costs
+        and can stop as soon as top_forward + top_backward >= best meeting cost.
+        """
+        if source == target:
+            return [source], []
+
+        graph = self.graph
+        s_lat, s_lon = float(graph.node_lat[source]), float(graph.node_lon[source])
+        t_lat, t_lon = float(graph.node_lat[target]), float(graph.node_lon[target])
+        speed = graph.max_speed_mps
+        potentials = {}
+
+        def potential(node):
+            value = potentials.get(node)
+            if value is None:
+                lat, lon = float(graph.node_lat[node]), float(graph.node_lon[node])
+                value = (self._haversine_scalar(lat, lon, t_lat, t_lon)
+                         - self._haversine_scalar(lat, lon, s_lat, s_lon)) / (2 * speed)
+                potentials[node] = value
+            return value
+
+        cost = ({source: 0.0}, {target: 0.0})
+        parent = ({source: (None, None)}, {target: (None, None)})
+        settled = (set(), set())
+        heaps = ([(potential(source), source)], [(-potential(target), target)])
+        best, meeting = math.inf, None
+
+        while heaps[0] and heaps[1]:
+            if heaps[0][0][0] + heaps[1][0][0] >= best:
+                break
+
+            side = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+            _, node = heapq.heappop(heaps[side])
+            if node in settled[side]:
+                continue
+            settled[side].add(node)
+
+            if side == 0:
+                start, end = graph.indptr[node], graph.indptr[node + 1]
+                neighbors = graph.indices[start:end]
+                edges = np.arange(start, end)
+            else:
+                start, end = graph.rev_indptr[node], graph.rev_indptr[node + 1]
+                neighbors = graph.rev_indices[start:end]
+                edges = graph.rev_edge[start:end]
+            durations = graph.duration[edges]
+
+            node_cost = cost[side][node]
+            for neighbor, edge, duration in zip(neighbors.tolist(), edges.tolist(), durations.tolist()):
+                new_cost = node_cost + duration
+                if new_cost < cost[side].get(neighbor, math.inf):
+                    cost[side][neighbor] = new_cost
+                    parent[side][neighbor] = (node, edge)
+                    sign = 1 if side == 0 else -1
+                    heapq.heappush(heaps[side], (new_cost + sign * potential(neighbor), neighbor))
+
+                    other = cost[1 - side].get(neighbor)
+                    if other is not None and new_cost + other < best:
+                        best, meeting = new_cost + other, neighbor
+
+        if meeting is None:
+            return None
+
+        # Walk back to the source, then forward to the target
+        nodes, edges = [meeting], []
+        node = meeting
+        while parent[0][node][0] is not None:
+            node, edge = parent[0][node]
+            nodes.append(node)
+            edges.append(edge)
+        nodes.reverse()
+        edges.reverse()
+
+        node = meeting
+        while parent[1][node][0] is not None:
+            node, edge = parent[1][node]
+            nodes.append(node)
+            edges.append(edge)
+
+        return nodes, edges
+
+    @staticmethod
+    def _haversine_scalar(lat1, lon1, lat2, lon2):
+
+        lat1_rad, lat2_rad = math.radians(lat1), math.radians(lat2)
+        a = (math.sin(math.radians(lat2 - lat1) / 2) ** 2 +
+             math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+        return EARTH_RADIUS_METERS * 2 * math.asin(math.sqrt(min(1.0, a)))
+
+    @staticmethod
+    def _haversine_m(lat, lon, lats, lons):
+
+        lat_rad, lats_rad = np.radians(lat), np.radians(lats)
+        a = (np.sin((lats_rad - lat_rad) / 2) ** 2 +
+             np.cos(lat_rad) * np.cos(lats_rad) * np.sin(np.radians(lons - lon) / 2) ** 2)
+        return EARTH_RADIUS_METERS * 2 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+_engine = None
+
+
+def get_local_routing_engine(graph_dir):
+
+    # One engine per process; the arrays are memory-mapped so this is cheap
+    global _engine
+    if _engine is None or str(_engine.graph.graph_dir) != str(graph_dir):
+        _engine = LocalRoutingEngine(RoadGraph(graph_dir))
+    return _engine
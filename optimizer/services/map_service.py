@@ -1,17 +1,63 @@
-
 import requests
 import json
+import hashlib
 from decimal import Decimal
+from urllib.parse import urlsplit
+from django.conf import settings
+from django.core.cache import caches
+from optimizer.utils.rate_limiter import get_rate_limiter
+from optimizer.utils.singleflight import get_single_flight
 
 class MapService:
 
     OSRM_BASE_URL = "http://router.project-osrm.org"
-    
+    NOMINATIM_BASE_URL = "https://nominatim.openstreetmap.org"
+    CACHE_ALIAS = 'upstream'
+
+    def __init__(self):
+        # Overridable so tests and load tests can point at mock_upstreams
+        self.osrm_base_url = getattr(settings, 'OSRM_BASE_URL', self.OSRM_BASE_URL).rstrip('/')
+        self.nominatim_base_url = getattr(settings, 'NOMINATIM_BASE_URL', self.NOMINATIM_BASE_URL).rstrip('/')
+        # Shared (file based) cache so every process reuses upstream answers
+        self.cache = caches[self.CACHE_ALIAS]
+        # Concurrent identical lookups share one upstream call
+        self.flight = get_single_flight(
+            'upstream',
+            lock_dir=getattr(settings, 'SINGLEFLIGHT_LOCK_DIR', '') or None,
+            handoff_cache=self.cache,
+            handoff_seconds=getattr(settings, 'SINGLEFLIGHT_HANDOFF_SECONDS', 30)
+        )
+        self.rate_limiter = get_rate_limiter(settings.RATE_LIMIT_DB)
+        self.rate_limits = getattr(settings, 'UPSTREAM_RATE_LIMITS', {})
+
+    def _throttle(self, url):
+
+        # Shared per-host budget, raises RateLimitExceeded if the queue is too long
+        host = urlsplit(url).netloc
+        rate = self.rate_limits.get(host)
+        if rate:
+            self.rate_limiter.acquire(
+                host, rate, timeout=getattr(settings, 'UPSTREAM_RATE_LIMIT_TIMEOUT_SECONDS', None)
+            )
+
+    def _cache_key(self, kind, value):
+        digest = hashlib.sha1(value.encode('utf-8')).hexdigest()
+        return f"{kind}:{digest}"
+
     def get_coordinates(self, location_query):
 
-        # Using Nominatim directly here for simplicity in this service, 
+        cache_key = self._cache_key('geocode', location_query.strip().lower())
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return tuple(cached)
+
+        return self.flight.do(cache_key, self._fetch_coordinates, location_query, cache_key)
+
+    def _fetch_coordinates(self, location_query, cache_key):
+
+        # Using Nominatim directly here for simplicity in this service,
         # but in a real app better to reuse GeocodingService
-        url = "https://nominatim.openstreetmap.org/search"
+        url = f"{self.nominatim_base_url}/search"
         params = {
             'q': location_query,
             'format': 'json',
@@ -19,37 +65,81 @@ class MapService:
             'countrycodes': 'us'
         }
         headers = {'User-Agent': 'fuel-route-optimizer-demo'}
-        
+
         try:
+            self._throttle(url)
             response = requests.get(url, params=params, headers=headers, timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 if data:
-                    return (float(data[0]['lat']), float(data[0]['lon']))
+                    coords = (float(data[0]['lat']), float(data[0]['lon']))
+                    self.cache.set(cache_key, coords)
+                    return coords
             return None
         except Exception as e:
             print(f"Error geocoding {location_query}: {e}")
             return None
 
-    def get_route(self, start_coords, end_coords):
+    def get_route(self, start_coords, end_coords, alternatives=0):
 
         # OSRM expects "lon,lat"
         start_str = f"{start_coords[1]},{start_coords[0]}"
         end_str = f"{end_coords[1]},{end_coords[0]}"
-        
-        url = f"{self.OSRM_BASE_URL}/route/v1/driving/{start_str};{end_str}"
+
+        coordinates = f"{start_str};{end_str}"
+
+        # alternatives=n also asks for up to n alternative routes, cached apart
+        # from the plain answer (its routes[0] is the same route)
+        cache_key = self._cache_key('route', f"{coordinates}|alt={alternatives}" if alternatives else coordinates)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        return self.flight.do(
+            cache_key, self._fetch_route, start_coords, end_coords, coordinates, cache_key, alternatives
+        )
+
+    def _fetch_route(self, start_coords, end_coords, coordinates, cache_key, alternatives=0):
+
+        if getattr(settings, 'ROUTING_BACKEND', 'osrm') == 'local':
+            # The local graph only knows the shortest route
+            return self._get_local_route(start_coords, end_coords, cache_key)
+
+        url = f"{self.osrm_base_url}/route/v1/driving/{coordinates}"
         params = {
             'overview': 'full',
             'geometries': 'geojson',
             'steps': 'true'
         }
-        
+        if alternatives:
+            params['alternatives'] = str(alternatives)
+
         try:
+            self._throttle(url)
             response = requests.get(url, params=params, timeout=30)
             if response.status_code == 200:
                 json_response = response.json()
+                if json_response.get('routes'):
+                    self.cache.set(cache_key, json_response)
                 return json_response
             return None
         except Exception as e:
             print(f"Error getting route: {e}")
             return None
+
+    def _get_local_route(self, start_coords, end_coords, cache_key):
+
+        # Same response shape as OSRM, answered from the memory-mapped road graph
+        # (imported here: the OSRM path never needs NumPy)
+        from optimizer.services.local_routing_engine import get_local_routing_engine
+        try:
+            engine = get_local_routing_engine(settings.ROAD_GRAPH_DIR)
+            json_response = engine.route([start_coords, end_coords])
+        except Exception as e:
+            print(f"Error getting local route: {e}")
+            return None
+
+        if json_response is None:
+            return None
+        self.cache.set(cache_key, json_response)
+        return json_response
@@ -0,0 +1,266 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+import requests
+from optimizer.utils.distance import haversine
+from optimizer.utils.constants import MILES_TO_KM
+
+# Continental US box used for synthetic geocodes
+SYNTHETIC_LAT_RANGE = (25.0, 48.5)
+SYNTHETIC_LON_RANGE = (-123.0, -70.0)
+
+# Synthetic routes: road distance vs great circle, and average speed
+SYNTHETIC_DETOUR_FACTOR = 1.2
+SYNTHETIC_SPEED_MPS = 25.0
+SYNTHETIC_POINTS_PER_MILE = 1
+
+
+class MockUpstreamServer:
+    """
+    Local stand-in for the Nominatim /search and OSRM /route/v1 endpoints.
+
+    Responses come from recorded fixtures when one exists for the request,
+    otherwise they are synthesized deterministically from the query. In
+    record mode, misses are proxied to the real upstreams and saved as
+    fixtures so later runs replay them offline.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8089, fixtures_dir=None, record=False,
+                 osrm_upstream=None, nominatim_upstream=None, known_places=None,
+                 latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, seed=None):
+        self.fixtures_dir = Path(fixtures_dir) if fixtures_dir else None
+        self.record = record
+        self.osrm_upstream = osrm_upstream
+        self.nominatim_upstream = nominatim_upstream
+        # {'city, st': (lat, lon)} answered before falling back to a hashed location
+        self.known_places = known_places or {}
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self.stats = {'requests': 0, 'fixtures': 0, 'synthetic': 0, 'recorded': 0, 'errors': 0}
+        self._stats_lock = threading.Lock()
+
+        if self.fixtures_dir:
+            self.fixtures_dir.mkdir(parents=True, exist_ok=True)
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def address(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def start(self):
+        """Serve on a background thread (handy for scripts), returns the thread."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handler_class(self):
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                status, body = server.respond(self.path)
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass  # request logging would dominate load-test output
+
+        return Handler
+
+    def respond(self, path):
+        """Return (status, json body) for a request path, applying latency and errors."""
+        self._count('requests')
+        delay, fail = self._draw()
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            self._count('errors')
+            return 503, {'code': 'InjectedError', 'message': 'Injected upstream failure'}
+
+        parts = urlsplit(path)
+        params = {key: values[0] for key, values in parse_qs(parts.query).items()}
+
+        if parts.path.rstrip('/') == '/search':
+            kind, upstream = 'nominatim', self.nominatim_upstream
+        elif parts.path.startswith('/route/v1/'):
+            kind, upstream = 'osrm', self.osrm_upstream
+        else:
+            return 404, {'code': 'NotFound', 'message': f'Unknown path {parts.path}'}
+
+        fixture = self._fixture_path(kind, parts.path, params)
+        if fixture and fixture.exists():
+            self._count('fixtures')
+            with open(fixture, 'r', encoding='utf-8') as f:
+                return 200, json.load(f)
+
+        if self.record and upstream and fixture:
+            body = self._proxy(upstream, path)
+            if body is not None:
+                fixture.parent.mkdir(parents=True, exist_ok=True)
+                with open(fixture, 'w', encoding='utf-8') as f:
+                    json.dump(body, f)
+                self._count('recorded')
+                return 200, body
+
+        self._count('synthetic')
+        if kind == 'nominatim':
+            return 200, self.synthetic_geocode(params.get('q', ''), self.known_places)
+        return self._synthetic_route_response(parts.path, params)
+
+    def _draw(self):
+
+        with self._random_lock:
+            delay = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            fail = self._random.random() < self.error_rate
+        return delay, fail
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _fixture_path(self, kind, path, params):
+
+        if not self.fixtures_dir:
+            return None
+        # Only the parameters that change the answer are part of the key
+        if kind == 'nominatim':
+            key = params.get('q', '').strip().lower()
+        else:
+            key = path
+            if params.get('alternatives', 'false') != 'false':
+                key += f"?alternatives={params['alternatives']}"
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return self.fixtures_dir / kind / f'{digest}.json'
+
+    def _proxy(self, upstream, path):
+
+        try:
+            response = requests.get(
+                upstream.rstrip('/') + path,
+                headers={'User-Agent': 'fuel-route-optimizer-demo'},
+                timeout=30
+            )
+            if response.status_code == 200:
+                return response.json()
+        except Exception as e:
+            print(f"Error recording {path}: {e}")
+        return None
+
+    @staticmethod
+    def synthetic_geocode(query, known_places=None):
+        """Known place coordinates, else a deterministic pseudo location inside the continental US."""
+        if not query.strip():
+            return []
+
+        place = ', '.join(part.strip() for part in query.lower().split(',')[:2])
+        if known_places and place in known_places:
+            lat, lon = known_places[place]
+            return [{'lat': f'{lat:.7f}', 'lon': f'{lon:.7f}', 'display_name': query}]
+
+        seed = int(hashlib.sha1(query.strip().lower().encode('utf-8')).hexdigest()[:12], 16)
+        rng = random.Random(seed)
+        lat = rng.uniform(*SYNTHETIC_LAT_RANGE)
+        lon = rng.uniform(*SYNTHETIC_LON_RANGE)
+        return [{'lat': f'{lat:.7f}', 'lon': f'{lon:.7f}', 'display_name': query}]
+
+    def _synthetic_route_response(self, path, params=None):
+
+        try:
+            coordinates = path.rsplit('/', 1)[-1].split(';')
+            points = [tuple(float(value) for value in pair.split(',')) for pair in coordinates]
+        except ValueError:
+            return 400, {'code': 'InvalidQuery', 'message': 'Could not parse coordinates'}
+        if len(points) < 2:
+            return 400, {'code': 'InvalidQuery', 'message': 'At least two coordinates are required'}
+
+        # OSRM coordinates are lon,lat; alternatives=true|n (two-point routes only)
+        alternatives = (params or {}).get('alternatives', 'false')
+        count = 0 if alternatives == 'false' or len(points) != 2 else (1 if alternatives == 'true' else int(alternatives))
+        return 200, self.synthetic_route([(lat, lon) for lon, lat in points], alternatives=count)
+
+    @classmethod
+    def synthetic_route(cls, points, alternatives=0):
+        """
+        OSRM-shaped route through (lat, lon) points with a gently winding path.
+
+        With alternatives, up to that many longer routes follow the primary one,
+        each bowing out through a detour point on alternating sides.
+        """
+        routes = [cls._synthetic_path(points)]
+        if alternatives and len(points) == 2:
+            (lat1, lon1), (lat2, lon2) = points
+            for k in range(1, alternatives + 1):
+                # Perpendicular offset of the midpoint, a fraction of the straight line
+                side = 0.12 * ((k + 1) // 2) * (1 if k % 2 else -1)
+                via = ((lat1 + lat2) / 2 - (lon2 - lon1) * side, (lon1 + lon2) / 2 + (lat2 - lat1) * side)
+                route = cls._synthetic_path([points[0], via, points[1]])
+                # OSRM alternatives are single-leg routes
+                route['legs'] = [{
+                    'distance': route['distance'],
+                    'duration': route['duration'],
+                    'steps': [],
+                    'summary': ''
+                }]
+                routes.append(route)
+
+        return {
+            'code': 'Ok',
+            'routes': routes,
+            'waypoints': [{'name': '', 'location': [lon, lat]} for lat, lon in points]
+        }
+
+    @staticmethod
+    def _synthetic_path(points):
+
+        geometry, legs = [], []
+        for (lat1, lon1), (lat2, lon2) in zip(points[:-1], points[1:]):
+            miles = haversine(lat1, lon1, lat2, lon2)
+            steps = max(2, int(miles * SYNTHETIC_POINTS_PER_MILE))
+            for i in range(0 if not geometry else 1, steps + 1):
+                t = i / steps
+                # Small offset that vanishes at both ends keeps the endpoints exact
+                offset = 0.05 * (1 - (2 * t - 1) ** 2) * random.Random(i).uniform(-1, 1)
+                geometry.append([lon1 + (lon2 - lon1) * t + offset, lat1 + (lat2 - lat1) * t + offset])
+
+            distance = miles * SYNTHETIC_DETOUR_FACTOR * MILES_TO_KM * 1000
+            legs.append({
+                'distance': distance,
+                'duration': distance / SYNTHETIC_SPEED_MPS,
+                'steps': [],
+                'summary': ''
+            })
+
+        distance = sum(leg['distance'] for leg in legs)
+        duration = sum(leg['duration'] for leg in legs)
+        return {
+            'distance': distance,
+            'duration': duration,
+            'weight': duration,
+            'weight_name': 'duration',
+            'geometry': {'type': 'LineString', 'coordinates': geometry},
+            'legs': legs
+        }
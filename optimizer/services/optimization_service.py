@@ -1,45 +1,310 @@
-from optimizer.models import FuelStation
-from geopy.distance import geodesic
+from django.conf import settings
+from optimizer.models import PriceStatistic
+from optimizer.repositories import FuelStationRepository
+from optimizer.services.corridor_cache_service import CorridorCacheService
+from optimizer.utils.constants import (
+    CORRIDOR_WIDTH_MILES,
+    CORRIDOR_NARROW_WIDTH_MILES,
+    CORRIDOR_MAX_WIDTH_MILES,
+    CORRIDOR_SEGMENT_MILES,
+    CORRIDOR_GATE_SPACING_MILES,
+    DETOUR_PENALTY,
+    REGIONAL_PRICE_SAMPLES,
+)
+from optimizer.utils.distance import calculate_bounding_box
+from optimizer.utils.grid import grid_cell_for
+from optimizer.utils.linear_referencing import RouteLinearReference
+from optimizer.utils.pipeline import LazyPipeline
+from bisect import bisect_left, bisect_right
 import numpy as np
 import math
 
 class OptimizationService:
 
     
-    def __init__(self, tank_range=500, mpg=10):
+    def __init__(self, tank_range=500, mpg=10, repository=None, station_index=None,
+                 corridor_width=None, segment_length=CORRIDOR_SEGMENT_MILES,
+                 detour_penalty=None, corridor_cache=None, max_corridor_width=CORRIDOR_MAX_WIDTH_MILES,
+                 adaptive_corridor=None):
         self.tank_range = tank_range
         self.mpg = mpg
+        self.repository = repository or FuelStationRepository()
+        # Optional in-memory StationIndex, used instead of the database for
+        # corridor candidates (the repository still resolves stop details)
+        self.station_index = station_index
+        # Adaptive corridors start narrow and widen around coverage gaps, up
+        # to max_corridor_width; otherwise the corridor width is fixed
+        if adaptive_corridor is None:
+            adaptive_corridor = getattr(settings, 'ADAPTIVE_CORRIDOR', False)
+        self.adaptive_corridor = adaptive_corridor
+        if corridor_width is None:
+            corridor_width = CORRIDOR_NARROW_WIDTH_MILES if adaptive_corridor else CORRIDOR_WIDTH_MILES
+        self.corridor_width = corridor_width
+        self.max_corridor_width = max(max_corridor_width, corridor_width)
+        self.segment_length = segment_length
+        # Weight of a station's off-route round trip when ranking it
+        self.detour_penalty = (
+            detour_penalty if detour_penalty is not None
+            else getattr(settings, 'DETOUR_PENALTY', DETOUR_PENALTY)
+        )
+        # Persisted per-lane corridors, so repeated routes skip the geometry work
+        self.corridor_cache = corridor_cache or CorridorCacheService()
         self._distance_cache = {}
         
-    def find_optimal_stops(self, route_geometry, total_distance_meters):
+    def find_optimal_stops(self, route_geometry, total_distance_meters, leg_boundaries=None):
+        """
+        Fuel stops along a route, fuel state carried across all of it.
 
+        Multi-leg routes arrive as one stitched geometry, with leg_boundaries
+        holding the vertex index where each leg after the first starts (the
+        waypoint, shared with the previous leg). Corridors are looked up and
+        cached per leg, so editing one waypoint only recomputes the legs
+        around it; their mileposts are offset onto the whole route and a
+        station near a waypoint keeps its closest approach, as if matched
+        once over the stitched line. The stop solver runs once over them.
+
+        Stages run lazily: a trip within tank range needs no stops, so it is
+        priced from the regional statistics without any corridor work. The
+        stages that ran (ms) and were skipped are in solver_stats['stages'].
+        """
         self._distance_cache.clear()
         
-        total_distance_miles = total_distance_meters * 0.000621371
-        route_coords = route_geometry['coordinates']
-        route_points = [(c[1], c[0]) for c in route_coords]
+        pipeline = self.build_pipeline(route_geometry, total_distance_meters, leg_boundaries)
+        result = self.pipeline_result(pipeline, total_distance_meters)
         
-        # Convert to numpy array for vectorized operations
-        route_array = np.array(route_points, dtype=np.float32)
+        self._distance_cache.clear()
+        return result
+
+    def is_short_trip(self, total_distance_meters):
+        """True when the trip needs no fuel stop (it starts with a full tank)."""
+        return total_distance_meters * 0.000621371 <= self.tank_range
+
+    def pipeline_result(self, pipeline, total_distance_meters):
+        """
+        Stops and costs from a build_pipeline() pipeline, running only the
+        stages still needed (callers may have read earlier ones already, e.g.
+        'stations_on_path' to report candidates). The stages' timings and the
+        skipped ones are attached as solver_stats['stages'].
+        """
+        result = pipeline['short_trip' if self.is_short_trip(total_distance_meters) else 'stops']
+        if 'solver_stats' in result:
+            result['solver_stats']['stages'] = pipeline.stats()
+        return result
+
+    def build_pipeline(self, route_geometry, total_distance_meters, leg_boundaries=None):
+        """
+        Lazy stages of find_optimal_stops: route_array -> corridor ->
+        stations_on_path -> stops, and regional_price -> short_trip for trips
+        within tank range. Nothing runs until a stage is read.
+        """
+
+        def route_array(pipeline):
+            # Convert to numpy array for vectorized operations
+            return np.array([(c[1], c[0]) for c in route_geometry['coordinates']], dtype=np.float32)
+
+        def corridor(pipeline):
+            # Find fuel stations near the route, with their milepost and off-route
+            # distance (from the lane's cached corridor when there is one)
+            if leg_boundaries:
+                return self._get_multi_leg_corridor(pipeline['route_array'], leg_boundaries)
+            return self._get_corridor(pipeline['route_array'])[0]
+
+        def stations_on_path(pipeline):
+            # Order stations by their position along the route path
+            return self._order_stations_by_path(self._collapse_colocated(pipeline['corridor']))
+
+        return LazyPipeline([
+            ('route_array', route_array),
+            ('corridor', corridor),
+            ('stations_on_path', stations_on_path),
+            ('stops', lambda pipeline: self.solve_stops(
+                pipeline['stations_on_path'], total_distance_meters, route_geometry
+            )),
+            ('regional_price', lambda pipeline: self._regional_price(route_geometry)),
+            ('short_trip', lambda pipeline: self._short_trip_result(
+                total_distance_meters * 0.000621371, pipeline['regional_price']
+            )),
+        ])
+
+    def _regional_price(self, route_geometry):
+        """
+        Expected price along a route from the materialized statistics: the mean
+        of the grid cells under REGIONAL_PRICE_SAMPLES route points, so cells
+        the route spends more of its length in weigh more.
+        """
+        coordinates = route_geometry['coordinates']
+        step = max(1, len(coordinates) // REGIONAL_PRICE_SAMPLES)
         
-        # Pre-compute cumulative distances along route
-        cum_dist = self._precompute_cumulative_distances_fast(route_array)
+        # Consecutive points mostly share a cell, look each one up once
+        cell_means = {}
+        means = []
+        for point in coordinates[::step]:
+            cell = grid_cell_for(point[1], point[0])
+            if cell not in cell_means:
+                stats = self.repository.get_price_statistics(PriceStatistic.SCOPE_CELL, cell)
+                cell_means[cell] = stats['mean'] if stats else None
+            if cell_means[cell] is not None:
+                means.append(cell_means[cell])
         
-        # Find fuel stations near the route
-        stations = self._get_stations_near_route(route_array, cum_dist)
+        return sum(means) / len(means) if means else self._national_average_price()
+
+    def _national_average_price(self):
+
+        # From the materialized statistics, 3.50 until they are built
+        national = self.repository.get_price_statistics()
+        return national['mean'] if national else 3.50
+
+    def _short_trip_result(self, total_distance_miles, price):
+
+        # Starts with a full tank, no stop needed: only the fuel burned is paid
+        return {
+            'stops': [],
+            'total_cost': round(float(total_distance_miles / self.mpg * price), 2),
+            'fuel_consumed_gallons': round(float(total_distance_miles) / self.mpg, 2),
+            'solver_stats': {'stations': 0, 'pruned': 0, 'widened': 0}
+        }
+
+    def solve_stops(self, stations_on_path, total_distance_meters, route_geometry=None):
+        """
+        Fuel stops and cost over the ordered corridor candidates ('stops' stage).
+
+        With adaptive corridors and the route geometry, a stretch the solver
+        cannot cross doesn't end the plan: the corridor is widened (doubling, up to max_corridor_width)
+        around that stretch only, its extra stations are fetched and the solve
+        is retried. The rest of the route keeps the narrow corridor.
+        """
+        total_distance_miles = total_distance_meters * 0.000621371
         
-        if not stations and total_distance_miles > self.tank_range:
+        if not stations_on_path and total_distance_miles > self.tank_range and route_geometry is None:
             return {'error': 'No fuel stations found along route, cannot complete trip'}
-            
-        # Map stations to their position along the route path
-        stations_on_path = self._order_stations_by_path(stations, route_array, cum_dist)
         
         # Calculate optimal stops and total cost
         result = self._calculate_greedy_stops(stations_on_path, total_distance_miles)
         
-        self._distance_cache.clear()
+        widened = []  # (from milepost, to milepost, width)
+        reference = None
+        while self.adaptive_corridor and 'gap' in result and route_geometry is not None:
+            gap_start, gap_end = result['gap']
+            width = max(
+                [w for start, end, w in widened if start < gap_end and gap_start < end],
+                default=self.corridor_width
+            )
+            if width >= self.max_corridor_width:
+                break
+            width = min(width * 2, self.max_corridor_width)
+            
+            if reference is None:
+                reference = self._route_reference(route_geometry)
+            
+            stations_on_path = self._widen_corridor(reference, stations_on_path, gap_start, gap_end, width)
+            widened.append((gap_start, gap_end, width))
+            result = self._calculate_greedy_stops(stations_on_path, total_distance_miles)
+        
+        gap = result.pop('gap', None)
+        if gap is not None and route_geometry is not None:
+            # Say where on the map the driver would run dry
+            reference = reference or self._route_reference(route_geometry)
+            lats, lons = reference.locate([gap[0]])
+            result['error'] = (
+                f'Stranded at mile {gap[0]:.1f} ({lats[0]:.4f}, {lons[0]:.4f}). No stations in range.'
+            )
+        if 'error' in result and not stations_on_path:
+            return {'error': 'No fuel stations found along route, cannot complete trip'}
+        if 'solver_stats' in result:
+            result['solver_stats']['widened'] = len(widened)
         return result
 
+    def _route_reference(self, route_geometry):
+
+        route_array = np.array([(c[1], c[0]) for c in route_geometry['coordinates']], dtype=np.float32)
+        return RouteLinearReference(route_array, self._precompute_cumulative_distances_fast(route_array))
+
+    def _widen_corridor(self, reference, stations_on_path, gap_start, gap_end, width):
+        """Stations within width miles of the route between two mileposts, merged into stations_on_path."""
+        # The stretch of route exactly between the gap's mileposts: the
+        # interpolated end points plus the vertices in between
+        first = int(np.searchsorted(reference.cum_dist, gap_start, side='right'))
+        last = int(np.searchsorted(reference.cum_dist, gap_end, side='left'))
+        end_lats, end_lons = reference.locate([gap_start, gap_end])
+        route_array = np.column_stack((
+            np.concatenate(([end_lats[0]], reference.lats[first:last], [end_lats[1]])),
+            np.concatenate(([end_lons[0]], reference.lons[first:last], [end_lons[1]]))
+        ))
+        cum_dist = np.concatenate(([gap_start], reference.cum_dist[first:last], [gap_end])) - gap_start
+        
+        boxes = self._build_corridor_boxes(route_array, cum_dist, width)
+        source = self.station_index if self.station_index is not None else self.repository
+        candidates = source.get_station_arrays_in_bounding_boxes(boxes)
+        
+        # Coordinates already in the corridor brought every station there
+        # (co-located ones were collapsed into them), only new points count
+        known = {(s['lat'], s['lon']) for s in stations_on_path}
+        new = np.array([
+            (float(lat), float(lon)) not in known
+            for lat, lon in zip(candidates['lats'], candidates['lons'])
+        ], dtype=bool)
+        candidates = {key: values[new] for key, values in candidates.items()}
+        
+        # Mileposts along the whole route, like the rest of the corridor
+        mileposts, laterals, _ = reference.project(candidates['lats'], candidates['lons'])
+        within = laterals < width
+        extra = {key: values[within] for key, values in candidates.items()}
+        extra['mileposts'] = mileposts[within]
+        extra['laterals'] = laterals[within]
+        
+        extra = self._order_stations_by_path(self._collapse_colocated(extra))
+        return sorted(stations_on_path + extra, key=lambda x: x['dist_from_start'])
+
+    def _get_corridor(self, route_array):
+        """
+        Corridor stations of a route (or one leg), from the lane corridor
+        cache when it has them, and the route length in miles (None when it
+        came from the cache).
+        """
+        fingerprint = None
+        if self.corridor_cache.enabled:
+            source = self.station_index if self.station_index is not None else self.repository
+            fingerprint = self.corridor_cache.fingerprint(
+                route_array, self.corridor_width, self.segment_length, source.get_station_layout_version()
+            )
+            stations = self.corridor_cache.get_stations(fingerprint, source)
+            if stations is not None:
+                return stations, None
+        
+        # Pre-compute cumulative distances along route
+        cum_dist = self._precompute_cumulative_distances_fast(route_array)
+        stations = self._get_stations_near_route(route_array, cum_dist)
+        if fingerprint is not None:
+            self.corridor_cache.store(fingerprint, stations, cum_dist[-1])
+        return stations, float(cum_dist[-1])
+
+    def _get_multi_leg_corridor(self, route_array, leg_boundaries):
+
+        bounds = [0] + [int(b) for b in leg_boundaries] + [len(route_array) - 1]
+        parts = []
+        offset = 0.0
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            leg = route_array[start:end + 1]
+            stations, length = self._get_corridor(leg)
+            if length is None:
+                length = float(self._precompute_cumulative_distances_fast(leg)[-1])
+            
+            # Leg mileposts -> route mileposts
+            stations['mileposts'] = stations['mileposts'] + offset
+            parts.append(stations)
+            offset += length
+        
+        merged = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+        
+        # A station near a waypoint is in both legs' corridors, keep its
+        # closest approach like a projection onto the stitched line would
+        # (leg order is kept for downstream tie-breaking)
+        order = np.lexsort((merged['laterals'], merged['ids']))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = merged['ids'][order][1:] != merged['ids'][order][:-1]
+        kept = np.sort(order[first])
+        return {key: values[kept] for key, values in merged.items()}
+
     def _precompute_cumulative_distances_fast(self, route_array):
 
         lat1, lon1 = route_array[:-1, 0], route_array[:-1, 1]
@@ -56,127 +321,214 @@ class OptimizationService:
         
         return np.concatenate(([0], np.cumsum(distances)))
 
-    def _haversine_vectorized(self, lat1, lon1, lat2_array, lon2_array):
-        """Calculate distances from a point to multiple points using Haversine formula."""
-        R = 3959
-        lat1_rad, lat2_rad = np.radians(lat1), np.radians(lat2_array)
-        delta_lat, delta_lon = np.radians(lat2_array - lat1), np.radians(lon2_array - lon1)
+    def _build_corridor_boxes(self, route_array, cum_dist, width=None):
+        """
+        Split the route into ~segment_length mile pieces and return one tight
+        bounding box per piece, padded by the corridor width (or width).
+
+        Longitude padding is latitude-correct (via calculate_bounding_box), so a
+        diagonal route is covered by a thin staircase of boxes instead of one
+        box spanning the whole country.
+        """
+        width = width or self.corridor_width
+        total = float(cum_dist[-1])
+        n_segments = max(1, int(math.ceil(total / self.segment_length)))
         
-        a = (np.sin(delta_lat/2)**2 + 
-             np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(delta_lon/2)**2)
-        return R * 2 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+        # Vertex index where each segment starts; consecutive segments share
+        # their boundary vertex so the polyline between them stays covered
+        boundaries = np.searchsorted(cum_dist, np.arange(n_segments) * (total / n_segments))
+        boundaries = np.unique(np.clip(boundaries, 0, len(route_array) - 1))
+        ends = np.append(boundaries[1:], len(route_array) - 1)
+        
+        boxes = []
+        for start, end in zip(boundaries, ends):
+            segment = route_array[start:end + 1]
+            min_lat, max_lat = float(segment[:, 0].min()), float(segment[:, 0].max())
+            min_lon, max_lon = float(segment[:, 1].min()), float(segment[:, 1].max())
+            
+            # Pad every corner: the longitude padding is widest at the
+            # latitude farthest from the equator
+            corners = [
+                calculate_bounding_box(lat, lon, width)
+                for lat in (min_lat, max_lat) for lon in (min_lon, max_lon)
+            ]
+            boxes.append({
+                'min_lat': min(c['min_lat'] for c in corners),
+                'max_lat': max(c['max_lat'] for c in corners),
+                'min_lng': min(c['min_lng'] for c in corners),
+                'max_lng': max(c['max_lng'] for c in corners)
+            })
+        
+        return boxes
 
-    def _get_stations_near_route(self, route_array, cum_dist):
+    def _collapse_colocated(self, candidates):
+        """
+        Keep only the cheapest station per exact coordinate.
 
-        lats, lons = route_array[:, 0], route_array[:, 1]
+        City-level geocoding puts dozens of stations on the same point. They
+        all share one position along the route, so only the cheapest (first
+        in query order on ties) can ever be picked; the others only count
+        towards the short-trip average, which is preserved via counts/sums.
+        """
+        n = len(candidates['ids'])
+        order = np.lexsort((np.arange(n), candidates['prices'], candidates['lons'], candidates['lats']))
         
-        # Phase 1: Bounding box filter (database-level)
-        candidates = FuelStation.objects.filter(
-            geocoded=True,
-            latitude__gte=float(lats.min()) - 0.3, 
-            latitude__lte=float(lats.max()) + 0.3,
-            longitude__gte=float(lons.min()) - 0.3, 
-            longitude__lte=float(lons.max()) + 0.3
-        )
+        lats, lons = candidates['lats'][order], candidates['lons'][order]
+        group_start = np.ones(n, dtype=bool)
+        group_start[1:] = (lats[1:] != lats[:-1]) | (lons[1:] != lons[:-1])
+        starts = np.flatnonzero(group_start)
         
-        # Simplify route for proximity checks (performance optimization)
-        step = max(1, len(route_array) // 150)
-        simplified_lats = route_array[::step, 0].astype(np.float32)
-        simplified_lons = route_array[::step, 1].astype(np.float32)
+        counts = np.diff(np.append(starts, n))
+        price_sums = np.add.reduceat(candidates['prices'][order], starts) if n else np.empty(0)
         
-        valid_stations = []
-        for station in candidates:
-            s_lat, s_lon = np.float32(station.latitude), np.float32(station.longitude)
-            
-            # Phase 2: Fast Euclidean approximation
-            d_lat = np.abs(simplified_lats - s_lat)
-            d_lon = np.abs(simplified_lons - s_lon)
-            if not ((d_lat <= 0.15) & (d_lon <= 0.15)).any():
-                continue
-                
-            # Phase 3: Precise Haversine calculation
-            distances = self._haversine_vectorized(s_lat, s_lon, simplified_lats, simplified_lons)
-            if distances.min() < 10:  # 10 miles corridor
-                valid_stations.append(station)
+        # Back to query order so downstream tie-breaking is unchanged
+        kept = order[starts]
+        restore = np.argsort(kept, kind='stable')
         
-        return valid_stations
+        collapsed = {key: values[kept[restore]] for key, values in candidates.items()}
+        collapsed['counts'] = counts[restore]
+        collapsed['price_sums'] = price_sums[restore]
+        return collapsed
 
-    def _order_stations_by_path(self, stations, route_array, cum_dist):
+    def _get_stations_near_route(self, route_array, cum_dist):
 
-        station_data = []
-        step = max(1, len(route_array) // 300)
+        # Phase 1: Per-segment bounding boxes, all in one OR query (database-level)
+        boxes = self._build_corridor_boxes(route_array, cum_dist)
+        source = self.station_index if self.station_index is not None else self.repository
+        candidates = source.get_station_arrays_in_bounding_boxes(boxes)
+        
+        # Simplify route for proximity checks (performance optimization), at
+        # least every CORRIDOR_GATE_SPACING_MILES so long and stitched
+        # multi-leg routes are gated as finely as short ones
+        points = max(150, int(math.ceil(float(cum_dist[-1]) / CORRIDOR_GATE_SPACING_MILES)))
+        step = max(1, len(route_array) // points)
         simplified_lats = route_array[::step, 0].astype(np.float32)
         simplified_lons = route_array[::step, 1].astype(np.float32)
-        simplified_indices = np.arange(len(route_array))[::step]
         
-        for station in stations:
-            s_lat, s_lon = np.float32(station.latitude), np.float32(station.longitude)
-            distances = self._haversine_vectorized(s_lat, s_lon, simplified_lats, simplified_lons)
-            best_idx = int(simplified_indices[distances.argmin()])
-            
-            station_data.append({
-                'station': station,
-                'dist_from_start': float(cum_dist[best_idx]),
-                'price': float(station.retail_price)
-            })
+        s_lats = candidates['lats'].astype(np.float32)
+        s_lons = candidates['lons'].astype(np.float32)
+        
+        # Phase 2: Fast Euclidean approximation, all candidates at once
+        gate = np.zeros(len(s_lats), dtype=bool)
+        for start in range(0, len(s_lats), 2048):
+            d_lat = np.abs(simplified_lats[None, :] - s_lats[start:start + 2048, None])
+            d_lon = np.abs(simplified_lons[None, :] - s_lons[start:start + 2048, None])
+            gate[start:start + 2048] = ((d_lat <= 0.15) & (d_lon <= 0.15)).any(axis=1)
+        
+        # Phase 3: Exact projection onto the route segments for the survivors,
+        # giving each station its milepost and lateral (off-route) distance
+        keep = np.flatnonzero(gate)
+        reference = RouteLinearReference(route_array, cum_dist)
+        mileposts, laterals, _ = reference.project(candidates['lats'][keep], candidates['lons'][keep])
+        within = laterals < self.corridor_width
+        
+        stations = {key: values[keep[within]] for key, values in candidates.items()}
+        stations['mileposts'] = mileposts[within]
+        stations['laterals'] = laterals[within]
+        return stations
+
+    def _order_stations_by_path(self, stations):
+
+        dist_from_start, lateral = stations['mileposts'], stations['laterals']
+        
+        station_data = [
+            {
+                'id': int(stations['ids'][i]),
+                'lat': float(stations['lats'][i]),
+                'lon': float(stations['lons'][i]),
+                'dist_from_start': float(dist_from_start[i]),
+                'lateral': float(lateral[i]),
+                'price': float(stations['prices'][i]),
+                'count': int(stations['counts'][i]),
+                'price_sum': float(stations['price_sums'][i])
+            }
+            for i in range(len(stations['ids']))
+        ]
         
         return sorted(station_data, key=lambda x: x['dist_from_start'])
 
     def _calculate_greedy_stops(self, stations, total_distance):
         """
-        Greedy algorithm: Select cheapest reachable fuel station at each stop.
+        Greedy algorithm: Select the cheapest reachable fuel station at each stop.
         
         Cost calculation approach:
         Vehicle starts with a full tank (500 miles range)
-        At each refuel stop, we pay for the gallons consumed since last fill
+        Reaching a station l miles off-route costs l miles of range on the way
+          in and again on the way back, so after filling up there the range
+          left at the route is tank_range - l
+        At each refuel stop, we pay for the gallons consumed since last fill,
+          detours included
+        Stations are ranked by price plus the detour's fuel cost spread over
+          a tank (weighted by detour_penalty), so a slightly cheaper station
+          far off the road does not win by default
         Final leg cost is calculated using the last refuel price
         For short trips (<500 miles) with no stops, we estimate cost using 
           average fuel price along the route
 
         """
-        stops = []
+        # Stations are sorted by milepost, so reachable ones form a window
+        mileposts = np.array([s['dist_from_start'] for s in stations], dtype=np.float64)
+        laterals = np.array([s['lateral'] for s in stations], dtype=np.float64)
+        prices = np.array([s['price'] for s in stations], dtype=np.float64)
+        effective_prices = prices * (1 + self.detour_penalty * 2 * laterals / self.tank_range)
+        
+        # Short trips are priced with the average of every corridor station,
+        # so take it before pruning (co-located stations were collapsed,
+        # weight by their counts)
+        counted = sum(s['count'] for s in stations)
+        avg_price = sum(s['price_sum'] for s in stations) / counted if counted else None
+        
+        # Drop stations that can never be picked, the stops are unchanged
+        keep = self._undominated_stations(mileposts, laterals, effective_prices)
+        pruned = len(stations) - len(keep)
+        mileposts, laterals = mileposts[keep], laterals[keep]
+        prices, effective_prices = prices[keep], effective_prices[keep]
+        stations = [stations[i] for i in keep]
+        
+        chosen = []
         current_pos = 0
+        current_lateral = 0  # Off-route distance of the last stop (still to drive back)
         current_fuel_range = self.tank_range  # Miles we can travel from current position
         total_cost = 0
+        detour_miles = 0
         last_refill_price = None
         
         # Find optimal fuel stops along the route
         while current_pos + current_fuel_range < total_distance:
             max_reach = current_pos + current_fuel_range
             
-            # Find all stations reachable from current position
-            reachable = [s for s in stations 
-                        if current_pos < s['dist_from_start'] <= max_reach]
+            # Find all stations reachable from current position, detour included
+            lo = np.searchsorted(mileposts, current_pos, side='right')
+            hi = np.searchsorted(mileposts, max_reach, side='right')
+            window = lo + np.flatnonzero(mileposts[lo:hi] + laterals[lo:hi] <= max_reach)
             
-            if not reachable:
-                return {'error': f'Stranded at mile {current_pos:.1f}. No stations in range.'}
+            if not len(window):
+                # The gap is where a wider corridor could help (see solve_stops)
+                return {
+                    'error': f'Stranded at mile {current_pos:.1f}. No stations in range.',
+                    'gap': (float(current_pos), float(max_reach))
+                }
             
             # Greedy strategy: Choose cheapest station (tie-break by going further)
-            best_stop = min(reachable, key=lambda x: (x['price'], -x['dist_from_start']))
+            best = window[np.lexsort((-mileposts[window], effective_prices[window]))[0]]
+            best_stop = stations[best]
             
-            # Calculate fuel consumed to reach this station
-            miles_traveled = best_stop['dist_from_start'] - current_pos
+            # Fuel consumed since the last fill: back to the route, along it, out to the station
+            miles_traveled = current_lateral + (mileposts[best] - current_pos) + laterals[best]
             gallons_consumed = miles_traveled / self.mpg
-            cost_at_stop = gallons_consumed * best_stop['price']
+            cost_at_stop = gallons_consumed * prices[best]
             
-            stops.append({
-                'station': best_stop['station'].name,
-                'city': best_stop['station'].city,
-                'state': best_stop['station'].state,
-                'price': f"${best_stop['price']:.3f}/gal",
-                'lat': float(best_stop['station'].latitude),
-                'lon': float(best_stop['station'].longitude),
-                'refill_gallons': round(gallons_consumed, 2),
-                'cost': round(cost_at_stop, 2)
-            })
+            chosen.append((best_stop, gallons_consumed, cost_at_stop))
             
             total_cost += cost_at_stop
-            current_pos = best_stop['dist_from_start']
-            current_fuel_range = self.tank_range  # Refilled to full tank
-            last_refill_price = best_stop['price']
+            detour_miles += 2 * laterals[best]
+            current_pos = mileposts[best]
+            current_lateral = laterals[best]
+            current_fuel_range = self.tank_range - current_lateral  # Refilled, minus the way back
+            last_refill_price = prices[best]
         
         # Calculate cost for remaining distance to destination
-        distance_remaining = total_distance - current_pos
+        distance_remaining = current_lateral + total_distance - current_pos
         
         if distance_remaining > 0:
             gallons_needed = distance_remaining / self.mpg
@@ -187,17 +539,86 @@ class OptimizationService:
             else:
                 # Short trip with no refuel stops needed
                 # Estimate cost using average price from nearby stations
-                if stations:
-                    avg_price = sum(s['price'] for s in stations) / len(stations)
-                else:
-                    # Fallback to US national average if no stations found
-                    avg_price = 3.50
+                if avg_price is None:
+                    # No stations along the route: national average
+                    avg_price = self._national_average_price()
                 final_leg_cost = gallons_needed * avg_price
             
             total_cost += final_leg_cost
 
         return {
-            'stops': stops,
-            'total_cost': round(total_cost, 2),
-            'fuel_consumed_gallons': round(total_distance / self.mpg, 2)
-        }
\ No newline at end of file
+            'stops': self._build_stops(chosen),
+            'total_cost': round(float(total_cost), 2),
+            'fuel_consumed_gallons': round(float(total_distance + detour_miles) / self.mpg, 2),
+            'solver_stats': {'stations': len(stations) + pruned, 'pruned': pruned}
+        }
+
+    def _undominated_stations(self, mileposts, laterals, effective_prices):
+        """
+        Indices (in milepost order) of the stations the greedy solver can pick.
+
+        Station j is dominated by i when i is at or past j's milepost, needs
+        no more route to reach (milepost + lateral <= j's) and ranks ahead of
+        it (cheaper, or as cheap and further along). Every window holding j
+        then holds i, so j is never picked and dropping it leaves the stops
+        unchanged. Dominance is transitive, so all of them go at once.
+
+        Scanning stations by decreasing milepost, j's candidates are the ones
+        already seen, and it is dominated when one of them with reach <= j's
+        ranks ahead. Undominated stations seen so far form a staircase: rank
+        falls as reach grows, so the best rank within j's reach is one binary
+        search away. A sort plus one search per station, O(n log n) however
+        wide the windows are.
+        """
+        n = len(mileposts)
+        if n < 2:
+            return np.arange(n)
+        
+        # Same order as the solver's pick: price, then further along, then first
+        rank = np.empty(n, dtype=np.int64)
+        rank[np.lexsort((-mileposts, effective_prices))] = np.arange(n)
+        reach = mileposts + laterals
+        
+        # Further along first; at a shared milepost a station's dominators
+        # (no more reach, better rank) come before it
+        order = np.lexsort((rank, reach, -mileposts))
+        stair_reach, stair_rank = [], []
+        dominated = np.zeros(n, dtype=bool)
+        
+        for j, j_reach, j_rank in zip(order.tolist(), reach[order].tolist(), rank[order].tolist()):
+            within = bisect_right(stair_reach, j_reach)
+            if within and stair_rank[within - 1] < j_rank:
+                dominated[j] = True
+                continue
+            
+            # j takes its place on the staircase, dropping the steps it beats
+            start = bisect_left(stair_reach, j_reach)
+            end = start
+            while end < len(stair_rank) and stair_rank[end] > j_rank:
+                end += 1
+            stair_reach[start:end] = [j_reach]
+            stair_rank[start:end] = [j_rank]
+        
+        return np.flatnonzero(~dominated)
+
+    def _build_stops(self, chosen):
+
+        # Display fields are only fetched for the few stations actually chosen
+        details = self.repository.get_station_details([entry['id'] for entry, _, _ in chosen])
+        
+        stops = []
+        for entry, gallons, cost in chosen:
+            station = details.get(entry['id'], {})
+            stops.append({
+                'station': station.get('name', ''),
+                'city': station.get('city', ''),
+                'state': station.get('state', ''),
+                'price': f"${entry['price']:.3f}/gal",
+                'lat': entry['lat'],
+                'lon': entry['lon'],
+                'detour_miles': round(2 * entry['lateral'], 1),
+                'refill_gallons': round(float(gallons), 2),
+                'cost': round(float(cost), 2)
+            })
+        
+        return stops
\ No newline at end of file
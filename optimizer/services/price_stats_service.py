@@ -0,0 +1,91 @@
+import numpy as np
+from django.db import transaction
+from django.db.models import FloatField, Q
+from django.db.models.functions import Cast
+from optimizer.models import FuelStation, PriceStatistic
+from optimizer.repositories.fuel_station_repository import reset_price_statistics
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+class PriceStatsService:
+    """
+    Keeps the PriceStatistic table in sync with station prices.
+
+    Ingestion (load_fuel_stations, geocode_stations) passes the states and
+    grid cells it touched, and only those groups (plus the all-stations row)
+    are recomputed. Reads go through FuelStationRepository.get_price_statistics,
+    which serves them from memory.
+    """
+
+    def refresh(self, states=None, cells=None):
+        """
+        Recompute the statistics of the given states/cells, or of every group
+        when both are None. Returns the number of groups written and removed.
+        """
+        full = states is None and cells is None
+        states = {state.upper() for state in states or []}
+        cells = {int(cell) for cell in cells or []}
+
+        stations = FuelStation.objects.filter(geocoded=True).annotate(price=Cast('retail_price', FloatField()))
+        rows = stations if full else stations.filter(Q(state__in=states) | Q(grid_cell__in=cells))
+        rows = list(rows.values_list('state', 'grid_cell', 'price'))
+
+        groups = {}
+        for state, cell, price in rows:
+            if full or state in states:
+                groups.setdefault((PriceStatistic.SCOPE_STATE, state), []).append(price)
+            if cell is not None and (full or cell in cells):
+                groups.setdefault((PriceStatistic.SCOPE_CELL, str(cell)), []).append(price)
+
+        # The all-stations row changes with any group, it is one cheap query
+        prices = list(stations.values_list('price', flat=True))
+        if prices:
+            groups[(PriceStatistic.SCOPE_ALL, '')] = prices
+
+        records = [self._summarize(scope, key, values) for (scope, key), values in groups.items()]
+
+        with transaction.atomic():
+            if records:
+                PriceStatistic.objects.bulk_create(
+                    records,
+                    update_conflicts=True,
+                    unique_fields=['scope', 'key'],
+                    update_fields=[
+                        'station_count', 'min_price', 'max_price', 'mean_price',
+                        'p10_price', 'p25_price', 'median_price', 'p75_price', 'p90_price', 'updated_at'
+                    ]
+                )
+
+            # Groups left without stations are dropped
+            touched = {(PriceStatistic.SCOPE_ALL, '')}
+            touched |= {(PriceStatistic.SCOPE_STATE, state) for state in states}
+            touched |= {(PriceStatistic.SCOPE_CELL, str(cell)) for cell in cells}
+            stale = [
+                row_id for row_id, scope, key in PriceStatistic.objects.values_list('id', 'scope', 'key')
+                if (scope, key) not in groups and (full or (scope, key) in touched)
+            ]
+            removed = PriceStatistic.objects.filter(id__in=stale).delete()[0] if stale else 0
+
+        reset_price_statistics()
+        return {'written': len(records), 'removed': removed}
+
+    @staticmethod
+    def _summarize(scope, key, values):
+
+        prices = np.asarray(values, dtype=np.float64)
+        p10, p25, p50, p75, p90 = np.percentile(prices, PERCENTILES)
+        return PriceStatistic(
+            scope=scope,
+            key=key,
+            station_count=len(prices),
+            min_price=float(prices.min()),
+            max_price=float(prices.max()),
+            mean_price=float(prices.mean()),
+            p10_price=float(p10),
+            p25_price=float(p25),
+            median_price=float(p50),
+            p75_price=float(p75),
+            p90_price=float(p90)
+        )
+
@@ -1,54 +1,373 @@
-
+import json
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from django.conf import settings
+from django.core.cache import caches
 from optimizer.services.map_service import MapService
 from optimizer.services.optimization_service import OptimizationService
+from optimizer.services.station_index import get_process_station_index
+from optimizer.utils.constants import MAX_ROUTE_ALTERNATIVES
+from optimizer.utils.singleflight import get_single_flight
 
 class RoutingService:
-    
+
     #Service to orchestrate route planning and optimization.
-    
-    
-    def __init__(self):
+
+
+    def __init__(self, optimization_pool=None):
         self.map_service = MapService()
-        self.optimization_service = OptimizationService()
-        
-    def calculate_optimal_route(self, start_location, end_location):
-   
+        # Without a pool, optimize against this process's in-memory station index
+        self.optimization_service = OptimizationService(
+            station_index=None if optimization_pool is not None else get_process_station_index()
+        )
+        # Optional OptimizationWorkerPool, optimizations are dispatched to it
+        self.optimization_pool = optimization_pool
+        # Concurrent requests for the same lane share one plan
+        self.route_flight = get_single_flight(
+            'routes',
+            lock_dir=getattr(settings, 'SINGLEFLIGHT_LOCK_DIR', '') or None,
+            handoff_cache=caches[MapService.CACHE_ALIAS],
+            handoff_seconds=getattr(settings, 'SINGLEFLIGHT_HANDOFF_SECONDS', 30),
+            is_shareable=lambda result: 'error' not in result
+        )
+
+    def calculate_optimal_route(self, start_location, end_location, waypoints=None,
+                                alternatives=False, cost_per_mile=0.0):
+
+        waypoints = list(waypoints or [])
+        # JSON keeps the locations apart, a '|' inside one can't shift the boundary
+        locations = [location.strip().lower() for location in [start_location, *waypoints, end_location]]
+        if alternatives:
+            return self.route_flight.do(
+                json.dumps(['alternatives', cost_per_mile, locations]),
+                self._calculate_cheapest_route, start_location, end_location, cost_per_mile
+            )
+        return self.route_flight.do(
+            json.dumps(locations), self._calculate_optimal_route, start_location, end_location, waypoints
+        )
+
+    def _calculate_optimal_route(self, start_location, end_location, waypoints=None):
+
+        # 1-2. Geocode and fetch route
+        prepared = self.prepare_route(start_location, end_location, waypoints)
+        if 'error' in prepared:
+            return prepared
+
+        # 3. Optimize fuel stops
+        if self.optimization_pool is not None:
+            optimization_result = self.optimization_pool.submit(
+                prepared['geometry'], prepared['distance_meters'], prepared['leg_boundaries']
+            ).result()
+        else:
+            optimization_result = self.optimization_service.find_optimal_stops(
+                prepared['geometry'],
+                prepared['distance_meters'],
+                prepared['leg_boundaries']
+            )
+
+        return self.build_result(prepared, optimization_result)
+
+    def _calculate_cheapest_route(self, start_location, end_location, cost_per_mile=0.0):
+        """
+        Plan fuel on every OSRM alternative and return the cheapest trip.
+
+        A slightly longer route through cheaper-fuel states can cost less
+        overall, so each alternative is scored by its fuel cost plus
+        cost_per_mile (driver, wear, tolls...) for its length. The result is the
+        usual plan for the winner plus an 'alternatives' comparison table.
+        """
+        candidates = self.prepare_alternatives(start_location, end_location)
+        if isinstance(candidates, dict):
+            return candidates
+
+        results = self._optimize_all(candidates)
+
+        comparison, best = [], None
+        for index, (prepared, optimization_result) in enumerate(zip(candidates, results)):
+            distance_miles = prepared['distance_meters'] * 0.000621371
+            row = {
+                'index': index,
+                'distance_miles': round(distance_miles, 1),
+                'duration_hours': round(prepared['duration_seconds'] / 3600, 1)
+            }
+            if 'error' in optimization_result:
+                row['error'] = optimization_result['error']
+            else:
+                mileage_cost = distance_miles * cost_per_mile
+                row.update({
+                    'stops': len(optimization_result['stops']),
+                    'fuel_cost': optimization_result['total_cost'],
+                    'mileage_cost': round(mileage_cost, 2),
+                    'trip_cost': round(optimization_result['total_cost'] + mileage_cost, 2)
+                })
+                if best is None or row['trip_cost'] < comparison[best]['trip_cost']:
+                    best = index
+            comparison.append(row)
+
+        if best is None:
+            return {'error': results[0]['error']}
+
+        for row in comparison:
+            row['selected'] = row['index'] == best
+
+        result = self.build_result(candidates[best], results[best])
+        result['trip_cost'] = comparison[best]['trip_cost']
+        result['cost_per_mile'] = cost_per_mile
+        result['alternatives'] = comparison
+        return result
+
+    def _optimize_all(self, candidates):
+
+        # Every candidate is optimized at once: on the worker pool when set,
+        # else on threads sharing this process's station index
+        if self.optimization_pool is not None:
+            futures = [
+                self.optimization_pool.submit(prepared['geometry'], prepared['distance_meters'], prepared['leg_boundaries'])
+                for prepared in candidates
+            ]
+        else:
+            def optimize(prepared):
+                # One service per route, the service keeps per-call scratch state
+                return OptimizationService(
+                    repository=self.optimization_service.repository,
+                    station_index=self.optimization_service.station_index
+                ).find_optimal_stops(prepared['geometry'], prepared['distance_meters'], prepared['leg_boundaries'])
+
+            with ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+                futures = [executor.submit(optimize, prepared) for prepared in candidates]
+
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append({'error': f'Optimization failed: {e}'})
+        return results
+
+    def calculate_optimal_routes(self, lanes, upstream_concurrency=1):
+        """Plan several (start_location, end_location) lanes, results in input order."""
+        return [
+            result for _, result in
+            self.iter_optimal_routes(lanes, upstream_concurrency=upstream_concurrency)
+        ]
+
+    def iter_optimal_routes(self, lanes, upstream_concurrency=4, max_in_flight=None):
+        """
+        Stream (lane, result) pairs for an iterable of lanes, in input order.
+
+        Each lane is a (start_location, end_location, ...) tuple; extra items
+        are passed through untouched. Geocoding/routing run on at most
+        upstream_concurrency threads, and as soon as a lane is routed its
+        optimization is handed to the worker pool (when set). At most
+        max_in_flight lanes are held in memory, so the input can be any size.
+        """
+        max_in_flight = max_in_flight or 4 * upstream_concurrency
+        if self.optimization_pool is not None:
+            max_in_flight = max(max_in_flight, 2 * self.optimization_pool.workers)
+
+        window = deque()
+        with ThreadPoolExecutor(max_workers=upstream_concurrency) as upstream:
+            for lane in lanes:
+                window.append((lane, self._submit_lane(upstream, lane[0], lane[1])))
+                if len(window) >= max_in_flight:
+                    lane_done, outcome = window.popleft()
+                    yield lane_done, outcome.result()
+
+            while window:
+                lane_done, outcome = window.popleft()
+                yield lane_done, outcome.result()
+
+    def _submit_lane(self, upstream, start_location, end_location):
+
+        # Chains prepare_route (upstream thread) -> optimization (pool) without
+        # blocking an upstream thread while the optimization runs
+        outcome = Future()
+
+        def on_optimized(prepared, future):
+            try:
+                outcome.set_result(self.build_result(prepared, future.result()))
+            except Exception as e:
+                outcome.set_result({'error': f'Optimization failed: {e}'})
+
+        def on_prepared(future):
+            try:
+                prepared = future.result()
+                if 'error' in prepared:
+                    outcome.set_result(prepared)
+                elif self.optimization_pool is not None:
+                    self.optimization_pool.submit(
+                        prepared['geometry'], prepared['distance_meters'], prepared['leg_boundaries']
+                    ).add_done_callback(lambda f: on_optimized(prepared, f))
+                else:
+                    # One service per lane, the service keeps per-call scratch state
+                    result = OptimizationService(
+                        repository=self.optimization_service.repository,
+                        station_index=self.optimization_service.station_index
+                    ).find_optimal_stops(prepared['geometry'], prepared['distance_meters'], prepared['leg_boundaries'])
+                    outcome.set_result(self.build_result(prepared, result))
+            except Exception as e:
+                outcome.set_result({'error': f'Route planning failed: {e}'})
+
+        upstream.submit(self.prepare_route, start_location, end_location).add_done_callback(on_prepared)
+        return outcome
+
+    def stream_optimal_route(self, start_location, end_location, waypoints=None):
+        """
+        Plan a route stage by stage, yielding (event, data) as each one ends:
+        'geocoded', 'routed' (route summary with geometry), 'candidates'
+        (corridor stations found, skipped for trips within tank range) and
+        'stops' (stops and costs), or 'error'.
+
+        'routed' plus 'stops' carry the same fields as calculate_optimal_route.
+        Streams are not shared between identical requests.
+        """
+        locations = [start_location, *(waypoints or []), end_location]
+
+        coords = self.geocode_locations(locations)
+        if coords is None:
+            yield 'error', {'error': 'Could not geocode locations'}
+            return
+        yield 'geocoded', {
+            'locations': [
+                {'location': location, 'lat': lat, 'lon': lon}
+                for location, (lat, lon) in zip(locations, coords)
+            ]
+        }
+
+        prepared = self.route_locations(locations, coords, waypoints)
+        if 'error' in prepared:
+            yield 'error', prepared
+            return
+        yield 'routed', {'route': self.summarize_route(prepared)}
+
+        # Same lazy stages as find_optimal_stops, read one at a time so the
+        # candidates can be reported before the stops are solved
+        service = self.optimization_service
+        pipeline = service.build_pipeline(prepared['geometry'], prepared['distance_meters'], prepared['leg_boundaries'])
+        if not service.is_short_trip(prepared['distance_meters']):
+            # Trips within tank range skip the corridor search (no 'candidates')
+            yield 'candidates', {'stations': len(pipeline['stations_on_path'])}
+        optimization_result = service.pipeline_result(pipeline, prepared['distance_meters'])
+        result = self.build_result(prepared, optimization_result)
+        if 'error' in result:
+            yield 'error', result
+            return
+        yield 'stops', {key: value for key, value in result.items() if key != 'route'}
+
+    def prepare_route(self, start_location, end_location, waypoints=None):
+
+        locations = [start_location, *(waypoints or []), end_location]
+
         # 1. Get coordinates
-        start_coords = self.map_service.get_coordinates(start_location)
-        end_coords = self.map_service.get_coordinates(end_location)
-         
-        if not start_coords or not end_coords:
+        coords = self.geocode_locations(locations)
+        if coords is None:
             return {'error': 'Could not geocode locations'}
-            
-        # 2. Get route from OSRM
-        route_data = self.map_service.get_route(start_coords, end_coords)
-        
-        if not route_data or 'routes' not in route_data:
+
+        return self.route_locations(locations, coords, waypoints)
+
+    def geocode_locations(self, locations):
+        """(lat, lon) of every location, None if any of them is not found."""
+        coords = [self.map_service.get_coordinates(location) for location in locations]
+        return coords if all(coords) else None
+
+    def route_locations(self, locations, coords, waypoints=None):
+        """Route through geocoded locations, in the shape returned by prepare_route."""
+        start_location, end_location = locations[0], locations[-1]
+
+        # 2. Get route from OSRM, one cached request per leg so editing a
+        # waypoint only refetches the two legs around it
+        legs = []
+        for leg_start, leg_end in zip(coords[:-1], coords[1:]):
+            route_data = self.map_service.get_route(leg_start, leg_end)
+            if not route_data or 'routes' not in route_data:
+                return {'error': 'Could not find route'}
+            legs.append(route_data['routes'][0])
+
+        geometry = legs[0]['geometry'] # GeoJSON
+        leg_boundaries = None
+        if len(legs) > 1:
+            # Stitch the legs into one line, each leg starts at the previous
+            # one's last vertex; corridors are still matched and cached per leg
+            coordinates = list(geometry['coordinates'])
+            leg_boundaries = []
+            for leg in legs[1:]:
+                leg_boundaries.append(len(coordinates) - 1)
+                coordinates.extend(leg['geometry']['coordinates'][1:])
+            geometry = {'type': 'LineString', 'coordinates': coordinates}
+
+        prepared = {
+            'start': start_location,
+            'end': end_location,
+            'distance_meters': sum(leg['distance'] for leg in legs),
+            'duration_seconds': sum(leg['duration'] for leg in legs),
+            'geometry': geometry,
+            'leg_boundaries': leg_boundaries
+        }
+        if waypoints:
+            prepared['waypoints'] = list(waypoints)
+            prepared['legs'] = [
+                {'start': leg_start, 'end': leg_end, 'distance_meters': leg['distance'], 'duration_seconds': leg['duration']}
+                for leg_start, leg_end, leg in zip(locations[:-1], locations[1:], legs)
+            ]
+        return prepared
+
+    def prepare_alternatives(self, start_location, end_location):
+        """The primary route and up to MAX_ROUTE_ALTERNATIVES - 1 alternatives, one prepare_route-style dict each."""
+        coords = self.geocode_locations([start_location, end_location])
+        if coords is None:
+            return {'error': 'Could not geocode locations'}
+
+        # All alternatives come back in one OSRM response
+        route_data = self.map_service.get_route(coords[0], coords[1], alternatives=MAX_ROUTE_ALTERNATIVES - 1)
+        if not route_data or not route_data.get('routes'):
             return {'error': 'Could not find route'}
-            
-        route = route_data['routes'][0]
-        distance_meters = route['distance']
-        duration_seconds = route['duration']
-        geometry = route['geometry'] # GeoJSON
-        
-        # 3. Optimize fuel stops
-        optimization_result = self.optimization_service.find_optimal_stops(
-            geometry, 
-            distance_meters
-        )
-        
-        if 'error' in optimization_result:
-            return {'error': optimization_result['error']}
-            
-        return {
-            'route': {
+
+        return [
+            {
                 'start': start_location,
                 'end': end_location,
-                'distance_miles': round(distance_meters * 0.000621371, 1),
-                'duration_hours': round(duration_seconds / 3600, 1),
-                'geometry': geometry
-            },
+                'distance_meters': route['distance'],
+                'duration_seconds': route['duration'],
+                'geometry': route['geometry'],
+                'leg_boundaries': None
+            }
+            for route in route_data['routes'][:MAX_ROUTE_ALTERNATIVES]
+        ]
+
+    def build_result(self, prepared, optimization_result):
+
+        if 'error' in optimization_result:
+            return {'error': optimization_result['error']}
+
+        result = {
+            'route': self.summarize_route(prepared),
             'stops': optimization_result['stops'],
             'total_cost': optimization_result['total_cost'],
             'fuel_consumed_gallons': optimization_result['fuel_consumed_gallons']
         }
+        # Candidates, pruned and widened counts (and stage timings) of the solve
+        if 'solver_stats' in optimization_result:
+            result['solver_stats'] = optimization_result['solver_stats']
+        return result
+
+    def summarize_route(self, prepared):
+
+        route = {
+            'start': prepared['start'],
+            'end': prepared['end'],
+            'distance_miles': round(prepared['distance_meters'] * 0.000621371, 1),
+            'duration_hours': round(prepared['duration_seconds'] / 3600, 1),
+            'geometry': prepared['geometry']
+        }
+        if prepared.get('waypoints'):
+            route['waypoints'] = prepared['waypoints']
+            route['legs'] = [
+                {
+                    'start': leg['start'],
+                    'end': leg['end'],
+                    'distance_miles': round(leg['distance_meters'] * 0.000621371, 1),
+                    'duration_hours': round(leg['duration_seconds'] / 3600, 1)
+                }
+                for leg in prepared['legs']
+            ]
+        return route
@@ -0,0 +1,320 @@
+import hashlib
+import os
+import shutil
+import threading
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from django.conf import settings
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+from optimizer.models import FuelStation
+from optimizer.utils.grid import grid_cell_array, grid_cells_for_box
+
+# One record per geocoded station, in the database's default ordering
+# (retail_price, name) so lookups break ties exactly like the ORM query.
+STATION_DTYPE = np.dtype([
+    ('id', np.int64),
+    ('lat', np.float64),
+    ('lon', np.float64),
+    ('price', np.float64),
+    ('cell', np.int64),
+])
+
+# Snapshot versions kept on disk; older ones are removed on publish
+SNAPSHOT_KEEP_VERSIONS = 2
+
+
+class SharedStationIndexHandle:
+
+    # Small picklable reference to an index living in shared memory
+
+    def __init__(self, name, count):
+        self.name = name
+        self.count = count
+
+
+class StationSnapshotHandle:
+
+    # Reference to a published snapshot version, workers map the files themselves
+
+    def __init__(self, directory, version):
+        self.directory = directory
+        self.version = version
+
+
+class StationIndex:
+    """
+    In-memory station table (ids, float coordinates, prices) with a grid
+    cell lookup. Exposes the same get_station_arrays_in_bounding_boxes()
+    as FuelStationRepository, so OptimizationService can use either.
+
+    The arrays can live in a shared memory block so worker processes map
+    the same pages instead of unpickling a copy per task.
+    """
+
+    def __init__(self, records, cell_order, shm=None):
+        self.records = records
+        # Record positions sorted by grid cell, for range lookups per cell
+        self.cell_order = cell_order
+        self.sorted_cells = records['cell'][cell_order]
+        self._id_order = None
+        self._layout_version = None
+        self._shm = shm
+        # Published snapshot version the index maps, None when built in memory
+        self.snapshot_version = None
+
+    @classmethod
+    def from_database(cls):
+
+        rows = list(
+            FuelStation.objects.filter(geocoded=True, lat__isnull=False, lon__isnull=False)
+            .annotate(price=Cast('retail_price', FloatField()))
+            .values_list('id', 'lat', 'lon', 'price')
+        )
+        return cls.from_rows(rows)
+
+    @classmethod
+    def from_rows(cls, rows):
+
+        records = np.empty(len(rows), dtype=STATION_DTYPE)
+        if rows:
+            ids, lats, lons, prices = zip(*rows)
+            records['id'] = ids
+            records['lat'] = lats
+            records['lon'] = lons
+            records['price'] = prices
+            records['cell'] = grid_cell_array(records['lat'], records['lon'])
+
+        return cls(records, np.argsort(records['cell'], kind='stable'))
+
+    @classmethod
+    def from_snapshot(cls, directory, version=None):
+        """
+        Index over a published snapshot (the current one by default), None if
+        there is none. Newer publishes can prune a version between reading
+        CURRENT and opening its files; the load is then retried once with the
+        version CURRENT points at by now (see snapshot_version).
+        """
+        version = version or current_snapshot_version(directory)
+        if version is None:
+            return None
+
+        try:
+            return cls._map_snapshot(directory, version)
+        except FileNotFoundError:
+            latest = current_snapshot_version(directory)
+            if latest is None or latest == version:
+                raise
+            return cls._map_snapshot(directory, latest)
+
+    @classmethod
+    def _map_snapshot(cls, directory, version):
+
+        # Read-only maps: every process shares the page cache copy (plain
+        # ndarray views, so slices don't come back as memmap objects)
+        path = os.path.join(directory, version)
+        records = np.asarray(np.load(os.path.join(path, 'records.npy'), mmap_mode='r'))
+        cell_order = np.asarray(np.load(os.path.join(path, 'cell_order.npy'), mmap_mode='r'))
+        index = cls(records, cell_order)
+        index.snapshot_version = version
+        return index
+
+    def __len__(self):
+        return len(self.records)
+
+    def get_station_arrays_in_bounding_boxes(self, boxes):
+
+        cells = np.array(sorted({cell for box in boxes for cell in grid_cells_for_box(box)}), dtype=np.int64)
+        starts = np.searchsorted(self.sorted_cells, cells, side='left')
+        ends = np.searchsorted(self.sorted_cells, cells, side='right')
+
+        positions = [self.cell_order[a:b] for a, b in zip(starts, ends) if b > a]
+        positions = np.sort(np.concatenate(positions)) if positions else np.empty(0, dtype=np.int64)
+
+        lats = self.records['lat'][positions]
+        lons = self.records['lon'][positions]
+        inside = np.zeros(len(positions), dtype=bool)
+        for box in boxes:
+            inside |= (
+                (lats >= box['min_lat']) & (lats <= box['max_lat']) &
+                (lons >= box['min_lng']) & (lons <= box['max_lng'])
+            )
+
+        selected = self.records[positions[inside]]
+        return {
+            'ids': selected['id'].copy(),
+            'lats': selected['lat'].copy(),
+            'lons': selected['lon'].copy(),
+            'prices': selected['price'].copy()
+        }
+
+    def get_station_layout_version(self):
+
+        # Same contract as FuelStationRepository.get_station_layout_version:
+        # a digest of ids and coordinates, computed once per loaded index
+        if self._layout_version is None:
+            order = np.argsort(self.records['id'], kind='stable')
+            digest = hashlib.sha1()
+            for field in ('id', 'lat', 'lon'):
+                digest.update(np.ascontiguousarray(self.records[field][order]).tobytes())
+            self._layout_version = 'index:' + digest.hexdigest()[:16]
+        return self._layout_version
+
+    def get_station_prices(self, station_ids):
+
+        # Same contract as FuelStationRepository.get_station_prices
+        if self._id_order is None:
+            self._id_order = np.argsort(self.records['id'], kind='stable')
+        sorted_ids = self.records['id'][self._id_order]
+
+        station_ids = np.asarray(station_ids, dtype=np.int64)
+        found = np.searchsorted(sorted_ids, station_ids).clip(0, max(len(sorted_ids) - 1, 0))
+        known = (sorted_ids[found] == station_ids) if len(sorted_ids) else np.zeros(len(station_ids), dtype=bool)
+
+        # Record order is the database's default ordering
+        positions = np.sort(self._id_order[found[known]])
+        return {
+            'ids': self.records['id'][positions].copy(),
+            'prices': self.records['price'][positions].copy()
+        }
+
+    # Snapshot files
+
+    def write_snapshot(self, directory):
+        """
+        Publish the index as a new snapshot version, returns the version.
+
+        A version is a directory holding records.npy and cell_order.npy; it is
+        written under a temporary name and renamed into place, then CURRENT is
+        atomically replaced to point at it. Readers never see a partial
+        version, and processes still mapping an older one keep their pages.
+        """
+        os.makedirs(directory, exist_ok=True)
+        version = str(time.time_ns())
+        temp = os.path.join(directory, f'.{version}.{os.getpid()}.tmp')
+        os.makedirs(temp)
+        np.save(os.path.join(temp, 'records.npy'), np.ascontiguousarray(self.records))
+        np.save(os.path.join(temp, 'cell_order.npy'), np.ascontiguousarray(self.cell_order, dtype=np.int64))
+        os.replace(temp, os.path.join(directory, version))
+
+        pointer = os.path.join(directory, f'.CURRENT.{os.getpid()}.tmp')
+        with open(pointer, 'w') as f:
+            f.write(version)
+        os.replace(pointer, os.path.join(directory, 'CURRENT'))
+
+        # Old versions go; a process may still have one mapped (POSIX keeps
+        # the pages until it lets go, elsewhere the removal just fails)
+        versions = sorted(name for name in os.listdir(directory) if name.isdigit())
+        for old in versions[:-SNAPSHOT_KEEP_VERSIONS]:
+            shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+
+        return version
+
+    # Shared memory
+
+    def to_shared_memory(self):
+        """
+        Copy the index into a new shared memory block.
+
+        Returns (index backed by the block, handle to pass to workers). The
+        caller owns the block and must call close(unlink=True) when done.
+        """
+        count = len(self.records)
+        size = max(1, count * (STATION_DTYPE.itemsize + np.dtype(np.int64).itemsize))
+        shm = shared_memory.SharedMemory(create=True, size=size)
+
+        shared = self._views(shm, count)
+        shared[0][:] = self.records
+        shared[1][:] = self.cell_order
+
+        return StationIndex(shared[0], shared[1], shm=shm), SharedStationIndexHandle(shm.name, count)
+
+    @classmethod
+    def attach(cls, handle):
+
+        shm = shared_memory.SharedMemory(name=handle.name)
+        records, cell_order = cls._views(shm, handle.count)
+        return cls(records, cell_order, shm=shm)
+
+    @staticmethod
+    def _views(shm, count):
+
+        records = np.ndarray((count,), dtype=STATION_DTYPE, buffer=shm.buf)
+        cell_order = np.ndarray(
+            (count,), dtype=np.int64, buffer=shm.buf, offset=count * STATION_DTYPE.itemsize
+        )
+        return records, cell_order
+
+    def close(self, unlink=False):
+
+        if self._shm is None:
+            return
+        # Drop the views first, the buffer can't be released while exported
+        self.records = self.cell_order = self.sorted_cells = self._id_order = None
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+        self._shm = None
+
+
+def current_snapshot_version(directory):
+    """Version CURRENT points at, None when nothing has been published."""
+    try:
+        with open(os.path.join(directory, 'CURRENT')) as f:
+            version = f.read().strip()
+    except OSError:
+        return None
+    return version if version and os.path.isdir(os.path.join(directory, version)) else None
+
+
+def publish_station_snapshot():
+    """Write the database's stations as a new snapshot, returns the version (None when disabled)."""
+    directory = getattr(settings, 'STATION_SNAPSHOT_DIR', '')
+    if not directory:
+        return None
+    return StationIndex.from_database().write_snapshot(directory)
+
+
+_process_index = None
+_process_index_loaded_at = 0.0
+_process_index_version = None
+_process_index_checked_at = 0.0
+_process_index_lock = threading.Lock()
+
+
+def get_process_station_index(refresh=False):
+    """
+    Station index shared by every request in this process. With a published
+    snapshot it is the memory-mapped current version, re-checked every
+    STATION_SNAPSHOT_CHECK_SECONDS; otherwise it is reloaded from the
+    database once older than STATION_INDEX_MAX_AGE_SECONDS (so price updates
+    show up). Returns None when that setting is 0 (query per request).
+    """
+    global _process_index, _process_index_loaded_at, _process_index_version, _process_index_checked_at
+
+    max_age = getattr(settings, 'STATION_INDEX_MAX_AGE_SECONDS', 300)
+    if max_age <= 0:
+        return None
+
+    directory = getattr(settings, 'STATION_SNAPSHOT_DIR', '')
+    check_every = getattr(settings, 'STATION_SNAPSHOT_CHECK_SECONDS', 5)
+
+    with _process_index_lock:
+        now = time.monotonic()
+        if directory and (refresh or _process_index is None or now - _process_index_checked_at > check_every):
+            _process_index_checked_at = now
+            version = current_snapshot_version(directory)
+            if version is not None and (refresh or version != _process_index_version):
+                _process_index = StationIndex.from_snapshot(directory, version)
+                _process_index_version = _process_index.snapshot_version
+                _process_index_loaded_at = now
+            elif version is None and _process_index_version is not None:
+                # Snapshot withdrawn, back to the database
+                _process_index = _process_index_version = None
+
+        if _process_index_version is None and (
+                refresh or _process_index is None or now - _process_index_loaded_at > max_age):
+            _process_index = StationIndex.from_database()
+            _process_index_loaded_at = now
+        return _process_index
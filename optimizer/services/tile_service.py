@@ -0,0 +1,168 @@
+import hashlib
+import json
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+from optimizer.models import FuelStation, StationTile
+from optimizer.utils.constants import (
+    TILE_MIN_ZOOM,
+    TILE_MAX_ZOOM,
+    TILE_CLUSTER_MAX_ZOOM,
+    TILE_CLUSTER_GRID_BITS,
+)
+from optimizer.utils.tiles import lat_lon_to_tile_array
+
+
+class TileService:
+
+    # Builds the precomputed z/x/y station tiles consumed by the frontend map.
+    # Low zooms hold clusters, high zooms hold individual stations with price.
+
+    def __init__(self, min_zoom=TILE_MIN_ZOOM, max_zoom=TILE_MAX_ZOOM,
+                 cluster_max_zoom=TILE_CLUSTER_MAX_ZOOM):
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.cluster_max_zoom = cluster_max_zoom
+
+    def rebuild_tiles(self):
+        """
+        Recompute every tile in memory and persist only the ones that changed.
+
+        Unchanged tiles keep their ETag so browser caches stay valid after a
+        price load that only touched a handful of stations.
+        """
+        stations = self._load_stations()
+        tiles = self._build_tiles(stations)
+
+        existing = {
+            (tile.zoom, tile.x, tile.y): tile
+            for tile in StationTile.objects.only('id', 'zoom', 'x', 'y', 'etag')
+        }
+
+        # bulk_update skips auto_now, changed tiles get their timestamp here
+        now = timezone.now()
+        to_create, to_update = [], []
+        for key, (content, count) in tiles.items():
+            etag = self.compute_etag(content)
+            tile = existing.pop(key, None)
+            if tile is None:
+                to_create.append(StationTile(
+                    zoom=key[0], x=key[1], y=key[2],
+                    content=content, etag=etag, station_count=count
+                ))
+            elif tile.etag != etag:
+                tile.content = content
+                tile.etag = etag
+                tile.station_count = count
+                tile.updated_at = now
+                to_update.append(tile)
+
+        # Whatever is left no longer contains any station
+        stale_ids = [tile.id for tile in existing.values()]
+
+        with transaction.atomic():
+            StationTile.objects.bulk_create(to_create, batch_size=500)
+            StationTile.objects.bulk_update(
+                to_update, ['content', 'etag', 'station_count', 'updated_at'], batch_size=500
+            )
+            StationTile.objects.filter(id__in=stale_ids).delete()
+
+        return {
+            'created': len(to_create),
+            'updated': len(to_update),
+            'deleted': len(stale_ids),
+            'unchanged': len(tiles) - len(to_create) - len(to_update)
+        }
+
+    @staticmethod
+    def compute_etag(content):
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def empty_tile_content():
+        return json.dumps({'type': 'stations', 'features': []}, separators=(',', ':'))
+
+    def _load_stations(self):
+
+        rows = list(
+            FuelStation.objects.filter(geocoded=True, lat__isnull=False, lon__isnull=False)
+            .order_by('id')
+            .values_list('id', 'name', 'city', 'state', 'retail_price', 'lat', 'lon')
+        )
+
+        return {
+            'ids': [r[0] for r in rows],
+            'names': [r[1] for r in rows],
+            'cities': [r[2] for r in rows],
+            'states': [r[3] for r in rows],
+            'prices': np.array([float(r[4]) for r in rows], dtype=np.float64),
+            'lats': np.array([r[5] for r in rows], dtype=np.float64),
+            'lons': np.array([r[6] for r in rows], dtype=np.float64),
+        }
+
+    def _build_tiles(self, stations):
+
+        tiles = {}
+        if not stations['ids']:
+            return tiles
+
+        lats, lons, prices = stations['lats'], stations['lons'], stations['prices']
+
+        for zoom in range(self.min_zoom, self.max_zoom + 1):
+            if zoom <= self.cluster_max_zoom:
+                tiles.update(self._build_cluster_tiles(zoom, lats, lons, prices))
+            else:
+                tiles.update(self._build_station_tiles(zoom, stations))
+
+        return tiles
+
+    def _build_cluster_tiles(self, zoom, lats, lons, prices):
+
+        # A cluster cell is simply a tile a few zoom levels deeper
+        cell_x, cell_y = lat_lon_to_tile_array(lats, lons, zoom + TILE_CLUSTER_GRID_BITS)
+
+        clusters = {}
+        for i in range(len(lats)):
+            key = (int(cell_x[i]), int(cell_y[i]))
+            clusters.setdefault(key, []).append(i)
+
+        grouped = {}
+        for (cx, cy), members in clusters.items():
+            idx = np.array(members)
+            tile_key = (zoom, cx >> TILE_CLUSTER_GRID_BITS, cy >> TILE_CLUSTER_GRID_BITS)
+            grouped.setdefault(tile_key, []).append({
+                'count': len(members),
+                'lat': round(float(lats[idx].mean()), 5),
+                'lon': round(float(lons[idx].mean()), 5),
+                'min_price': round(float(prices[idx].min()), 3),
+                'avg_price': round(float(prices[idx].mean()), 3)
+            })
+
+        tiles = {}
+        for tile_key, features in grouped.items():
+            features.sort(key=lambda f: (f['lat'], f['lon']))
+            content = json.dumps({'type': 'clusters', 'features': features}, separators=(',', ':'))
+            tiles[tile_key] = (content, sum(f['count'] for f in features))
+
+        return tiles
+
+    def _build_station_tiles(self, zoom, stations):
+
+        tile_x, tile_y = lat_lon_to_tile_array(stations['lats'], stations['lons'], zoom)
+
+        grouped = {}
+        for i, station_id in enumerate(stations['ids']):
+            grouped.setdefault((zoom, int(tile_x[i]), int(tile_y[i])), []).append({
+                'id': station_id,
+                'station': stations['names'][i],
+                'city': stations['cities'][i],
+                'state': stations['states'][i],
+                'price': round(float(stations['prices'][i]), 3),
+                'lat': round(float(stations['lats'][i]), 6),
+                'lon': round(float(stations['lons'][i]), 6)
+            })
+
+        return {
+            tile_key: (json.dumps({'type': 'stations', 'features': features}, separators=(',', ':')), len(features))
+            for tile_key, features in grouped.items()
+        }
@@ -0,0 +1,144 @@
+import csv
+import json
+import os
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from django.conf import settings
+
+# Process-wide warmup state, reported by the health endpoint
+_state = {
+    'status': 'cold',  # cold -> warming -> ready | failed
+    'started_at': None,
+    'finished_at': None,
+    'stations': 0,
+    'lanes_warmed': 0,
+    'lanes_failed': 0,
+    'lanes_error': None,
+    'error': None,
+}
+_state_lock = threading.Lock()
+# Process that started the warmup thread, a forked child doesn't have it
+_warmup_pid = None
+
+
+class WarmupService:
+    """
+    Fill the per-process and shared caches before taking traffic: the
+    in-memory station index, plus geocodes, routes and lane corridors for
+    the most requested lanes.
+
+    Lanes come from a CSV or JSONL file with start_location/end_location
+    (and an optional count column). A request log with one row per request
+    works as-is: duplicate lanes are counted and the top N are warmed.
+    """
+
+    def __init__(self, lanes_file=None, top_lanes=None, upstream_concurrency=2):
+        self.lanes_file = lanes_file if lanes_file is not None else getattr(settings, 'WARMUP_LANES_FILE', '')
+        self.top_lanes = top_lanes if top_lanes is not None else getattr(settings, 'WARMUP_TOP_LANES', 100)
+        self.upstream_concurrency = upstream_concurrency
+
+    @staticmethod
+    def status():
+        with _state_lock:
+            return dict(_state)
+
+    @staticmethod
+    def is_ready():
+        with _state_lock:
+            return _state['status'] == 'ready'
+
+    def start_background(self):
+        """Run the warmup on a daemon thread (once per process)."""
+        global _warmup_pid
+        with _state_lock:
+            if _state['status'] != 'cold':
+                return False
+            _state['status'] = 'warming'
+            _warmup_pid = os.getpid()
+
+        threading.Thread(target=self.run, name='optimizer-warmup', daemon=True).start()
+        return True
+
+    @staticmethod
+    def resume_after_fork():
+        """
+        Restart a warmup this process inherited half-way through.
+
+        With gunicorn --preload the warmup starts in the master, and forked
+        workers copy its 'warming' state but not the thread, so they would
+        never become ready. Called by the health endpoint, which only
+        serving processes answer.
+        """
+        with _state_lock:
+            if _state['status'] != 'warming' or _warmup_pid in (None, os.getpid()):
+                return False
+            _state['status'] = 'cold'
+        return WarmupService().start_background()
+
+    def run(self):
+        """Warm everything synchronously and return the final status."""
+        # Imported here so the health endpoint (status only) stays light
+        from optimizer.services.station_index import get_process_station_index
+
+        self._update(status='warming', started_at=time.time(), finished_at=None, error=None,
+                     lanes_warmed=0, lanes_failed=0, lanes_error=None)
+        try:
+            index = get_process_station_index(refresh=True)
+            self._update(stations=len(index) if index is not None else 0)
+        except Exception as e:
+            # Without stations the worker can't serve anything useful
+            print(f"Warmup failed: {e}")
+            self._update(status='failed', error=str(e), finished_at=time.time())
+            return self.status()
+
+        # Lanes only save first requests some latency: a bad lanes file (or
+        # setting) is reported like a failed lane and doesn't block readiness
+        try:
+            lanes = self.read_top_lanes(self.lanes_file, self.top_lanes) if self.lanes_file else []
+            self._warm_lanes(lanes)
+        except Exception as e:
+            print(f"Warmup lanes skipped: {e}")
+            self._update(lanes_error=str(e))
+
+        self._update(status='ready', finished_at=time.time())
+        return self.status()
+
+    def _warm_lanes(self, lanes):
+
+        from optimizer.services.routing_service import RoutingService
+
+        # Lane failures (bad address, upstream down) don't block readiness
+        service = RoutingService()
+        results = service.iter_optimal_routes(
+            ((start, end) for start, end in lanes),
+            upstream_concurrency=max(1, self.upstream_concurrency)
+        )
+        for _, result in results:
+            with _state_lock:
+                _state['lanes_failed' if 'error' in result else 'lanes_warmed'] += 1
+
+    @staticmethod
+    def read_top_lanes(path, top_n):
+        """The top_n most frequent (start_location, end_location) lanes in a CSV/JSONL file."""
+        lanes_file = Path(path)
+        counts = Counter()
+        with open(lanes_file, 'r', encoding='utf-8') as f:
+            if lanes_file.suffix.lower() == '.jsonl':
+                rows = (json.loads(line) for line in f if line.strip())
+            else:
+                rows = csv.DictReader(f)
+
+            for row in rows:
+                start = (row.get('start_location') or '').strip()
+                end = (row.get('end_location') or '').strip()
+                if start and end:
+                    counts[(start, end)] += int(row.get('count') or 1)
+
+        return [lane for lane, _ in counts.most_common(top_n)]
+
+    @staticmethod
+    def _update(**fields):
+        with _state_lock:
+            _state.update(fields)
@@ -0,0 +1,119 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from django.conf import settings
+from django.db import connections
+from optimizer.services.optimization_service import OptimizationService
+from optimizer.services.station_index import (
+    StationIndex,
+    StationSnapshotHandle,
+    current_snapshot_version,
+)
+
+# Set in each worker process by _init_process_worker
+_worker_index = None
+_worker_options = {}
+
+
+def _init_process_worker(handle, tank_range, mpg):
+
+    global _worker_index, _worker_options
+
+    # Spawned (non-forked) workers start without Django configured
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+    if isinstance(handle, StationSnapshotHandle):
+        _worker_index = StationIndex.from_snapshot(handle.directory, handle.version)
+    else:
+        _worker_index = StationIndex.attach(handle)
+    _worker_options = {'tank_range': tank_range, 'mpg': mpg}
+
+
+def _optimize_in_process(route_geometry, total_distance_meters, leg_boundaries=None):
+
+    service = OptimizationService(station_index=_worker_index, **_worker_options)
+    return service.find_optimal_stops(route_geometry, total_distance_meters, leg_boundaries)
+
+
+class OptimizationWorkerPool:
+    """
+    Runs OptimizationService.find_optimal_stops on a pool of workers.
+
+    mode='process' has every worker process map the published station
+    snapshot (or, without one, a shared memory copy of the index made once),
+    so only the route itself is pickled per task.
+    mode='thread' shares the same in-memory index between threads; it is
+    cheaper to start and fine when NumPy releases the GIL for most of the work.
+    """
+
+    MODES = ('process', 'thread')
+
+    def __init__(self, mode=None, workers=None, station_index=None, tank_range=500, mpg=10):
+        self.mode = mode or getattr(settings, 'OPTIMIZATION_POOL_MODE', 'process')
+        if self.mode not in self.MODES:
+            raise ValueError(f"Unknown pool mode '{self.mode}', expected one of {self.MODES}")
+
+        self.workers = workers or getattr(settings, 'OPTIMIZATION_POOL_WORKERS', 0) or os.cpu_count() or 1
+        self.tank_range = tank_range
+        self.mpg = mpg
+
+        snapshot_dir = getattr(settings, 'STATION_SNAPSHOT_DIR', '')
+        version = current_snapshot_version(snapshot_dir) if station_index is None and snapshot_dir else None
+
+        if self.mode == 'process':
+            if version is not None:
+                # Pinned to this version, a newer one doesn't change a running pool
+                self._shared_index, handle = None, StationSnapshotHandle(snapshot_dir, version)
+            else:
+                index = station_index if station_index is not None else StationIndex.from_database()
+                self._shared_index, handle = index.to_shared_memory()
+            # Forked children must not inherit open database connections
+            connections.close_all()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_process_worker,
+                initargs=(handle, tank_range, mpg)
+            )
+        else:
+            if version is not None:
+                self._shared_index = StationIndex.from_snapshot(snapshot_dir, version)
+            else:
+                self._shared_index = station_index if station_index is not None else StationIndex.from_database()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers)
+
+    def submit(self, route_geometry, total_distance_meters, leg_boundaries=None):
+        """Schedule one optimization, returns a concurrent.futures.Future."""
+        if self.mode == 'process':
+            return self._executor.submit(
+                _optimize_in_process, route_geometry, total_distance_meters, leg_boundaries
+            )
+        return self._executor.submit(
+            self._optimize_in_thread, route_geometry, total_distance_meters, leg_boundaries
+        )
+
+    def map(self, routes):
+        """Optimize (route_geometry, total_distance_meters) pairs, results in input order."""
+        futures = [self.submit(geometry, distance) for geometry, distance in routes]
+        return [future.result() for future in futures]
+
+    def _optimize_in_thread(self, route_geometry, total_distance_meters, leg_boundaries=None):
+
+        # One service per task, the service keeps per-call scratch state
+        service = OptimizationService(
+            station_index=self._shared_index, tank_range=self.tank_range, mpg=self.mpg
+        )
+        return service.find_optimal_stops(route_geometry, total_distance_meters, leg_boundaries)
+
+    def close(self):
+
+        self._executor.shutdown(wait=True)
+        if self.mode == 'process' and self._shared_index is not None:
+            self._shared_index.close(unlink=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,44 @@
+from django.test import SimpleTestCase
+from optimizer.management.commands.check_import_time import (
+    SCENARIOS,
+    forbidden_imports,
+    measure_import_time,
+    parse_import_time,
+)
+
+
+class ParseImportTimeTests(SimpleTestCase):
+
+    def test_totals_top_level_imports_only(self):
+        stderr = '\n'.join([
+            'import time: self [us] | cumulative | imported package',
+            'import time:       120 |        120 |   json.decoder',
+            'import time:       300 |        420 | json',
+            'import time:        50 |         50 | optimizer.utils',
+            'some unrelated warning',
+        ])
+        total_us, modules = parse_import_time(stderr)
+
+        self.assertEqual(total_us, 470)
+        self.assertEqual(modules['json'], (420, 0))
+        self.assertEqual(modules['json.decoder'], (120, 1))
+
+    def test_forbidden_matches_submodules(self):
+        modules = {'numpy.core': (10, 1), 'numpyro': (5, 0), 'django': (20, 0)}
+
+        self.assertEqual(forbidden_imports(modules, ('numpy', 'pandas')), ['numpy'])
+
+
+class ImportTimeBudgetTests(SimpleTestCase):
+
+    # Same scenarios and budgets as `manage.py check_import_time`, each run
+    # in a fresh interpreter under python -X importtime (best of 3)
+
+    def test_scenarios_within_budget(self):
+        for name, (code, budget_ms, forbidden) in SCENARIOS.items():
+            with self.subTest(scenario=name):
+                runs = [measure_import_time(code) for _ in range(3)]
+                total_us, modules = min(runs, key=lambda run: run[0])
+
+                self.assertEqual(forbidden_imports(modules, forbidden), [])
+                self.assertLessEqual(total_us / 1000, budget_ms)
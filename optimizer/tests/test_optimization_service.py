@@ -0,0 +1,120 @@
+from itertools import product
+from unittest import mock
+import numpy as np
+from django.test import SimpleTestCase
+from optimizer.services.optimization_service import OptimizationService
+
+
+class StubRepository:
+
+    # Stop display fields only, the solver never needs the database otherwise
+
+    def get_station_details(self, station_ids):
+        return {}
+
+
+def make_service(**kwargs):
+    return OptimizationService(repository=StubRepository(), station_index=object(), **kwargs)
+
+
+def random_corridor(rng, n, length):
+    mileposts = np.sort(rng.uniform(0, length, n))
+    # Few distinct values so ties in milepost, reach and price all happen
+    mileposts = np.round(mileposts / 5) * 5
+    return [
+        {
+            'id': i,
+            'lat': 0.0,
+            'lon': float(i),
+            'dist_from_start': float(mileposts[i]),
+            'lateral': float(rng.choice([0.0, 0.5, 1.0, 2.5, 4.0])),
+            'price': float(rng.choice([3.1, 3.2, 3.25, 3.4, 3.6])),
+            'count': 1,
+            'price_sum': 0.0,
+        }
+        for i in range(n)
+    ]
+
+
+class UndominatedStationsTests(SimpleTestCase):
+
+    def brute_force(self, mileposts, laterals, effective_prices):
+        n = len(mileposts)
+        rank = np.empty(n, dtype=np.int64)
+        rank[np.lexsort((-mileposts, effective_prices))] = np.arange(n)
+        reach = mileposts + laterals
+        return np.array([
+            j for j in range(n)
+            if not any(
+                i != j and mileposts[i] >= mileposts[j] and reach[i] <= reach[j] and rank[i] < rank[j]
+                for i in range(n)
+            )
+        ], dtype=np.int64)
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(7)
+        service = make_service()
+        for _ in range(300):
+            n = int(rng.integers(0, 40))
+            mileposts = np.sort(np.round(rng.uniform(0, 100, n)))
+            laterals = rng.choice([0.0, 1.0, 2.0, 3.0], n)
+            prices = rng.choice([3.0, 3.1, 3.2], n)
+
+            np.testing.assert_array_equal(
+                service._undominated_stations(mileposts, laterals, prices),
+                self.brute_force(mileposts, laterals, prices)
+            )
+
+    def test_pruning_leaves_the_plan_unchanged(self):
+        rng = np.random.default_rng(11)
+        for seed, tank_range in product(range(60), (150, 300)):
+            stations = random_corridor(np.random.default_rng(seed), int(rng.integers(5, 120)), 1500)
+            service = make_service(tank_range=tank_range)
+
+            pruned = service._calculate_greedy_stops(stations, 1400)
+            with mock.patch.object(
+                    OptimizationService, '_undominated_stations',
+                    lambda self, mileposts, laterals, prices: np.arange(len(mileposts))):
+                unpruned = service._calculate_greedy_stops(stations, 1400)
+
+            with self.subTest(seed=seed, tank_range=tank_range):
+                self.assertEqual(pruned.get('error'), unpruned.get('error'))
+                self.assertEqual(pruned.get('stops'), unpruned.get('stops'))
+                self.assertEqual(pruned.get('total_cost'), unpruned.get('total_cost'))
+
+
+class CollapseColocatedTests(SimpleTestCase):
+
+    def test_keeps_cheapest_per_point_in_query_order(self):
+        candidates = {
+            'ids': np.array([10, 11, 12, 13, 14], dtype=np.int64),
+            'lats': np.array([35.0, 36.0, 35.0, 35.0, 36.5]),
+            'lons': np.array([-97.0, -98.0, -97.0, -97.0, -98.5]),
+            'prices': np.array([3.50, 3.40, 3.20, 3.20, 3.60]),
+        }
+        collapsed = make_service()._collapse_colocated(candidates)
+
+        # 12 and 13 tie on price at the shared point, the first one queried wins
+        np.testing.assert_array_equal(collapsed['ids'], [11, 12, 14])
+        np.testing.assert_array_equal(collapsed['counts'], [1, 3, 1])
+        np.testing.assert_allclose(collapsed['price_sums'], [3.40, 9.90, 3.60])
+
+    def test_collapsed_station_keeps_the_corridor_average(self):
+        stations = [
+            {'id': 1, 'lat': 35.0, 'lon': -97.0, 'dist_from_start': 10.0, 'lateral': 0.0,
+             'price': 3.0, 'count': 3, 'price_sum': 10.5},
+            {'id': 2, 'lat': 35.5, 'lon': -97.5, 'dist_from_start': 40.0, 'lateral': 0.0,
+             'price': 4.5, 'count': 1, 'price_sum': 4.5},
+        ]
+        result = make_service()._calculate_greedy_stops(stations, 100)
+
+        # No stop needed: the trip is priced at (10.5 + 4.5) / 4 per gallon
+        self.assertEqual(result['stops'], [])
+        self.assertAlmostEqual(result['total_cost'], 100 / 10 * 3.75, places=2)
+
+    def test_empty(self):
+        empty = {key: np.empty(0) for key in ('ids', 'lats', 'lons', 'prices')}
+        collapsed = make_service()._collapse_colocated(empty)
+
+        self.assertEqual(len(collapsed['ids']), 0)
+        self.assertEqual(len(collapsed['counts']), 0)
@@ -0,0 +1,57 @@
+from decimal import Decimal
+from django.test import TestCase
+from django.urls import reverse
+from optimizer.models import FuelStation, StationTile
+from optimizer.services.tile_service import TileService
+from optimizer.utils.constants import TILE_MAX_ZOOM
+from optimizer.utils.tiles import lat_lon_to_tile
+
+
+class StationTileETagTests(TestCase):
+
+    def setUp(self):
+        self.station = FuelStation.objects.create(
+            opis_id='1001', name='Test Truck Stop', address='I-35, EXIT 1',
+            city='Oklahoma City', state='OK', retail_price=Decimal('3.199'),
+            latitude=Decimal('35.467600'), longitude=Decimal('-97.516400'), geocoded=True
+        )
+        TileService().rebuild_tiles()
+        x, y = lat_lon_to_tile(35.4676, -97.5164, TILE_MAX_ZOOM)
+        self.url = reverse('optimizer_api:station-tiles', args=[TILE_MAX_ZOOM, x, y])
+
+    def test_matching_etag_gets_304(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Test Truck Stop', response.content.decode())
+        etag = response['ETag']
+
+        cached = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"stale", {etag}')
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], etag)
+        self.assertEqual(cached.content, b'')
+
+    def test_unchanged_rebuild_keeps_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        updated_at = StationTile.objects.values_list('updated_at', flat=True).first()
+
+        TileService().rebuild_tiles()
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(StationTile.objects.values_list('updated_at', flat=True).first(), updated_at)
+
+    def test_price_change_invalidates_etag(self):
+        etag = self.client.get(self.url)['ETag']
+
+        self.station.retail_price = Decimal('2.999')
+        self.station.save()
+        TileService().rebuild_tiles()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_empty_tile_has_stable_etag(self):
+        url = reverse('optimizer_api:station-tiles', args=[TILE_MAX_ZOOM, 0, 0])
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
@@ -10,6 +10,15 @@ EARTH_RADIUS_MILES = 3959  # Earth's radius in miles (for haversine calculations
 # Route optimization parameters
 SEARCH_BUFFER_MILES = 20  # How far from route to search for stations
 STOP_TOLERANCE_MILES = 100  # Tolerance window for ideal stop location
+CORRIDOR_WIDTH_MILES = 10  # Max distance from the route for a station to be a candidate
+CORRIDOR_NARROW_WIDTH_MILES = 5  # Starting width with ADAPTIVE_CORRIDOR, widened only around coverage gaps
+CORRIDOR_MAX_WIDTH_MILES = 40  # Widest a corridor gets around a gap before the route is reported stranded
+CORRIDOR_SEGMENT_MILES = 50  # Route length covered by each prefilter bounding box
+CORRIDOR_GATE_SPACING_MILES = 5  # Widest gap between the simplified route points of the proximity prefilter
+DETOUR_PENALTY = 1.0  # Weight of the off-route round trip when ranking stations (1.0 = its fuel cost)
+REGIONAL_PRICE_SAMPLES = 64  # Route points whose grid cell prices the fuel of a trip within tank range
+MAX_ROUTE_WAYPOINTS = 10  # Intermediate stops accepted per optimization request
+MAX_ROUTE_ALTERNATIVES = 3  # Alternative routes evaluated when asked for the cheapest one
 
 # Geocoding settings
 MAX_STATIONS_TO_GEOCODE = 1000  # Maximum stations to geocode by default
@@ -19,6 +28,19 @@ GEOCODING_RATE_LIMIT_SECONDS = 1.0  # Delay between geocoding requests (Nominati
 OPENROUTE_BASE_URL = 'https://api.openrouteservice.org'
 OPENROUTE_TIMEOUT_SECONDS = 30
 
+# Spatial grid used to index station coordinates (FuelStation.grid_cell)
+GRID_CELL_DEGREES = 0.5
+
+# Station map tiles (z/x/y)
+TILE_MIN_ZOOM = 0
+TILE_MAX_ZOOM = 12  # Deeper zooms reuse the zoom-12 tiles on the client
+TILE_CLUSTER_MAX_ZOOM = 9  # Up to this zoom stations are aggregated into clusters
+TILE_CLUSTER_GRID_BITS = 3  # Each tile is split into a 2^3 x 2^3 grid of clusters
+TILE_CACHE_MAX_AGE_SECONDS = 300
+
+# Background jobs
+JOB_LIST_LIMIT = 50  # Most recent jobs returned by GET /jobs
+
 # Distance conversion
 KM_TO_MILES = 0.621371
 MILES_TO_KM = 1.60934
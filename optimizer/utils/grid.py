@@ -0,0 +1,47 @@
+#Fixed lat/lon grid used to bucket stations into indexable cells.
+
+import math
+from typing import TYPE_CHECKING, Dict, List
+
+from .constants import GRID_CELL_DEGREES
+
+GRID_COLUMNS = int(round(360 / GRID_CELL_DEGREES))
+GRID_ROWS = int(round(180 / GRID_CELL_DEGREES))
+
+
+def grid_cell_for(lat: float, lng: float) -> int:
+
+    # Cells are numbered row-major from (-90, -180)
+    row = min(max(int(math.floor((lat + 90.0) / GRID_CELL_DEGREES)), 0), GRID_ROWS - 1)
+    col = min(max(int(math.floor((lng + 180.0) / GRID_CELL_DEGREES)), 0), GRID_COLUMNS - 1)
+    return row * GRID_COLUMNS + col
+
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+def grid_cell_array(lats: 'np.ndarray', lngs: 'np.ndarray') -> 'np.ndarray':
+
+    # NumPy is imported lazily: models import this module on every startup
+    import numpy as np
+
+    rows = np.clip(np.floor((lats + 90.0) / GRID_CELL_DEGREES).astype(np.int64), 0, GRID_ROWS - 1)
+    cols = np.clip(np.floor((lngs + 180.0) / GRID_CELL_DEGREES).astype(np.int64), 0, GRID_COLUMNS - 1)
+    return rows * GRID_COLUMNS + cols
+
+
+def grid_cells_for_box(box: Dict[str, float]) -> List[int]:
+
+    # Every cell touched by a bounding box (calculate_bounding_box format)
+    first = grid_cell_for(box['min_lat'], box['min_lng'])
+    last = grid_cell_for(box['max_lat'], box['max_lng'])
+    min_row, min_col = divmod(first, GRID_COLUMNS)
+    max_row, max_col = divmod(last, GRID_COLUMNS)
+
+    return [
+        row * GRID_COLUMNS + col
+        for row in range(min_row, max_row + 1)
+        for col in range(min_col, max_col + 1)
+    ]
+
@@ -0,0 +1,117 @@
+#Linear referencing along a route polyline: point -> milepost (+ lateral offset) and milepost -> point.
+
+import numpy as np
+
+from .constants import EARTH_RADIUS_MILES
+
+# Stations are first matched to the nearest of ~this many route vertices,
+# then projected exactly onto the full-resolution segments around it
+COARSE_VERTICES = 300
+
+
+class RouteLinearReference:
+    """
+    Along-route distance index for one route.
+
+    Built from the (lat, lon) vertex array and its cumulative distances in
+    miles (OptimizationService._precompute_cumulative_distances_fast), so
+    mileposts agree with the route length used everywhere else. Segments are
+    projected in a local equirectangular frame, which is accurate to well
+    under 0.1% over segment-scale distances.
+    """
+
+    def __init__(self, route_array, cum_dist):
+        route = np.asarray(route_array, dtype=np.float64)
+        self.lats = route[:, 0]
+        self.lons = route[:, 1]
+        self.cum_dist = np.asarray(cum_dist, dtype=np.float64)
+        self.length = float(self.cum_dist[-1]) if len(self.cum_dist) else 0.0
+
+        # Per segment: start vertex, local frame scale and end offset in miles
+        mid_lat = np.radians((self.lats[:-1] + self.lats[1:]) / 2)
+        self._cos = np.cos(mid_lat)
+        self._dx = EARTH_RADIUS_MILES * np.radians(self.lons[1:] - self.lons[:-1]) * self._cos
+        self._dy = EARTH_RADIUS_MILES * np.radians(self.lats[1:] - self.lats[:-1])
+        self._len_sq = self._dx ** 2 + self._dy ** 2
+        self._seg_miles = np.diff(self.cum_dist)
+
+    @property
+    def segment_count(self):
+        return len(self._dx)
+
+    def project(self, lats, lons, chunk_size=2048):
+        """
+        Project points onto the route.
+
+        Returns (mileposts, lateral_miles, segment_index) arrays: the
+        interpolated distance from the route start of the closest point on
+        the route, the distance to it, and the segment it lies on.
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        n = len(lats)
+        mileposts = np.zeros(n)
+        lateral = np.zeros(n)
+        segments = np.zeros(n, dtype=np.int64)
+        if n == 0:
+            return mileposts, lateral, segments
+
+        if self.segment_count == 0:
+            lateral[:] = self._haversine(lats, lons, self.lats[0], self.lons[0])
+            return mileposts, lateral, segments
+
+        # Coarse pass: nearest vertex of a strided copy of the route
+        stride = max(1, len(self.lats) // COARSE_VERTICES)
+        coarse = np.arange(0, len(self.lats), stride)
+        offsets = np.arange(-2 * stride, 2 * stride + 1)
+
+        for start in range(0, n, chunk_size):
+            p_lats = lats[start:start + chunk_size]
+            p_lons = lons[start:start + chunk_size]
+
+            nearest = self._haversine(
+                p_lats[:, None], p_lons[:, None], self.lats[coarse][None, :], self.lons[coarse][None, :]
+            ).argmin(axis=1)
+
+            # Exact pass: every full-resolution segment around that vertex
+            seg = np.clip(coarse[nearest][:, None] + offsets[None, :], 0, self.segment_count - 1)
+            cos = self._cos[seg]
+            px = EARTH_RADIUS_MILES * np.radians(p_lons[:, None] - self.lons[seg]) * cos
+            py = EARTH_RADIUS_MILES * np.radians(p_lats[:, None] - self.lats[seg])
+            dx, dy, len_sq = self._dx[seg], self._dy[seg], self._len_sq[seg]
+
+            t = np.clip((px * dx + py * dy) / np.maximum(len_sq, 1e-12), 0.0, 1.0)
+            dist = np.hypot(px - t * dx, py - t * dy)
+
+            best = dist.argmin(axis=1)
+            rows = np.arange(len(p_lats))
+            best_seg = seg[rows, best]
+
+            segments[start:start + chunk_size] = best_seg
+            lateral[start:start + chunk_size] = dist[rows, best]
+            mileposts[start:start + chunk_size] = (
+                self.cum_dist[best_seg] + t[rows, best] * self._seg_miles[best_seg]
+            )
+
+        return mileposts, lateral, segments
+
+    def locate(self, mileposts):
+        """Coordinates (lats, lons) at the given mileposts, by binary search on the cumulative distances."""
+        mileposts = np.clip(np.asarray(mileposts, dtype=np.float64), 0.0, self.length)
+        if self.segment_count == 0:
+            return np.full(len(mileposts), self.lats[0]), np.full(len(mileposts), self.lons[0])
+
+        seg = np.clip(np.searchsorted(self.cum_dist, mileposts, side='right') - 1, 0, self.segment_count - 1)
+        t = (mileposts - self.cum_dist[seg]) / np.maximum(self._seg_miles[seg], 1e-12)
+        t = np.clip(t, 0.0, 1.0)
+        lats = self.lats[seg] + t * (self.lats[seg + 1] - self.lats[seg])
+        lons = self.lons[seg] + t * (self.lons[seg + 1] - self.lons[seg])
+        return lats, lons
+
+    @staticmethod
+    def _haversine(lat1, lon1, lat2, lon2):
+
+        lat1_rad, lat2_rad = np.radians(lat1), np.radians(lat2)
+        a = (np.sin(np.radians(lat2 - lat1) / 2) ** 2 +
+             np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(np.radians(lon2 - lon1) / 2) ** 2)
+        return EARTH_RADIUS_MILES * 2 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
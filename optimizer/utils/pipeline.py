@@ -0,0 +1,42 @@
+#Lazily evaluated, instrumented stages: each runs on first use and at most once.
+
+import time
+
+
+class LazyPipeline:
+    """
+    Named stages, each a function of the pipeline itself.
+
+    A stage runs the first time something reads it (pipeline['name']), which
+    in turn pulls the stages it reads. Whatever nothing asked for never runs
+    and is reported as skipped, next to the time each stage that did run
+    took (its own work, without the stages it pulled in).
+    """
+
+    def __init__(self, stages):
+        self._stages = dict(stages)
+        self._values = {}
+        self._timings = {}
+        self._nested = 0.0
+
+    def __getitem__(self, name):
+        if name not in self._values:
+            outer_nested = self._nested
+            self._nested = 0.0
+            started = time.perf_counter()
+            self._values[name] = self._stages[name](self)
+            elapsed = time.perf_counter() - started
+
+            self._timings[name] = round((elapsed - self._nested) * 1000, 3)
+            self._nested = outer_nested + elapsed
+        return self._values[name]
+
+    def __contains__(self, name):
+        return name in self._values
+
+    def stats(self):
+        """{'ran': {stage: ms, ...} in the order they finished, 'skipped': [stage, ...]}"""
+        return {
+            'ran': dict(self._timings),
+            'skipped': [name for name in self._stages if name not in self._values]
+        }
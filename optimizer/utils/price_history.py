@@ -0,0 +1,187 @@
+#Append-only columnar fuel price history: one pair of .npy columns per feed, partitioned by date.
+
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+# Station key (OPIS Truckstop ID) and price columns
+ID_DTYPE = np.int32
+PRICE_DTYPE = np.float32
+
+PARTITION_PREFIX = 'date='
+
+
+class PriceHistoryStore:
+    """
+    Fuel price feeds kept as immutable columns on disk.
+
+    Each feed is written once as {root}/date=YYYY-MM-DD/{epoch}.ids.npy and
+    .prices.npy, sorted by station id. Files are opened memory-mapped, so a
+    query only pages in the partitions and id ranges it binary-searches, and
+    the whole history never has to fit in RAM. The ids column is renamed into
+    place last: a feed without it is still being written and is ignored.
+    """
+
+    def __init__(self, root):
+        self.root = str(root)
+        self._columns = {}
+        self._lock = threading.Lock()
+
+    def append(self, station_ids, prices, when=None):
+        """Store one feed observed at when (UTC, default now), returns its timestamp."""
+        when = _as_utc(when or datetime.now(timezone.utc))
+        ids = np.asarray(station_ids, dtype=ID_DTYPE)
+        values = np.asarray(prices, dtype=PRICE_DTYPE)
+        if not len(ids):
+            raise ValueError('Cannot store an empty feed')
+
+        # One price per station, the lowest when the feed repeats a site
+        order = np.lexsort((values, ids))
+        ids, values = ids[order], values[order]
+        first = np.ones(len(ids), dtype=bool)
+        first[1:] = ids[1:] != ids[:-1]
+        ids, values = ids[first], values[first]
+
+        directory = os.path.join(self.root, PARTITION_PREFIX + when.strftime('%Y-%m-%d'))
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, str(int(when.timestamp())))
+        if os.path.exists(base + '.ids.npy'):
+            raise FileExistsError(f'A feed at {when.isoformat()} is already stored')
+
+        for suffix, column in (('.prices.npy', values), ('.ids.npy', ids)):
+            temp = f'{base}{suffix}.{os.getpid()}.tmp'
+            with open(temp, 'wb') as f:
+                np.save(f, column)
+            os.replace(temp, base + suffix)
+
+        return when
+
+    def feeds(self, start=None, end=None):
+        """Timestamps (UTC datetimes, ascending) of the stored feeds in [start, end]."""
+        start = _as_utc(start) if start is not None else None
+        end = _as_utc(end) if end is not None else None
+        if not os.path.isdir(self.root):
+            return []
+
+        stamps = []
+        for name in sorted(os.listdir(self.root)):
+            if not name.startswith(PARTITION_PREFIX):
+                continue
+            # Whole partitions outside the range are skipped by name
+            day = name[len(PARTITION_PREFIX):]
+            if (start is not None and day < start.strftime('%Y-%m-%d')) or \
+                    (end is not None and day > end.strftime('%Y-%m-%d')):
+                continue
+            for filename in os.listdir(os.path.join(self.root, name)):
+                if filename.endswith('.ids.npy'):
+                    stamp = datetime.fromtimestamp(int(filename.split('.')[0]), timezone.utc)
+                    if (start is None or stamp >= start) and (end is None or stamp <= end):
+                        stamps.append(stamp)
+
+        return sorted(stamps)
+
+    def price_at(self, station_ids, when):
+        """
+        Price of each station as of when: its value in the latest feed at or
+        before that time that lists it, NaN if none does.
+        """
+        ids = np.asarray(station_ids, dtype=ID_DTYPE)
+        result = np.full(len(ids), np.nan, dtype=np.float64)
+        missing = np.arange(len(ids))
+
+        # Newest feed first, stop as soon as every station has a price
+        for stamp in reversed(self.feeds(end=when)):
+            if not len(missing):
+                break
+            found, values = self._lookup(stamp, ids[missing])
+            result[missing[found]] = values
+            missing = missing[~found]
+
+        return result
+
+    def station_averages(self, station_ids, end, window_days=7):
+        """Mean price of each station over the feeds in the window_days up to end, NaN without data."""
+        end = _as_utc(end)
+        prices = self.series(station_ids, end - timedelta(days=window_days), end)[1]
+        counts = np.isfinite(prices).sum(axis=0)
+        sums = np.nansum(prices, axis=0)
+        return np.divide(sums, counts, out=np.full(len(counts), np.nan), where=counts > 0)
+
+    def rolling_average(self, station_ids, start, end, window_days=7):
+        """
+        Rolling mean price across a set of stations (e.g. a corridor).
+
+        Returns (timestamps, averages): for each feed in [start, end], the mean
+        of every price those stations reported in the window_days up to it.
+        """
+        start, end = _as_utc(start), _as_utc(end)
+        stamps, prices = self.series(station_ids, start - timedelta(days=window_days), end)
+        if not stamps:
+            return [], np.empty(0)
+
+        # Per-feed sums and counts, then windowed differences of their prefix sums
+        sums = np.concatenate(([0.0], np.cumsum(np.nansum(prices, axis=1))))
+        counts = np.concatenate(([0], np.cumsum(np.isfinite(prices).sum(axis=1))))
+        seconds = np.array([stamp.timestamp() for stamp in stamps])
+        window_start = np.searchsorted(seconds, seconds - window_days * 86400, side='right')
+
+        positions = np.arange(len(stamps))
+        total = sums[positions + 1] - sums[window_start]
+        count = counts[positions + 1] - counts[window_start]
+        averages = np.divide(total, count, out=np.full(len(stamps), np.nan), where=count > 0)
+
+        shown = seconds >= start.timestamp()
+        return [stamp for stamp, keep in zip(stamps, shown) if keep], averages[shown]
+
+    def series(self, station_ids, start, end):
+        """Feeds in [start, end] and a (feeds x stations) price matrix, NaN where a feed lacks a station."""
+        ids = np.asarray(station_ids, dtype=ID_DTYPE)
+        stamps = self.feeds(start, end)
+        prices = np.full((len(stamps), len(ids)), np.nan, dtype=np.float64)
+        for row, stamp in enumerate(stamps):
+            found, values = self._lookup(stamp, ids)
+            prices[row, found] = values
+        return stamps, prices
+
+    def _lookup(self, stamp, ids):
+
+        feed_ids, feed_prices = self._open(stamp)
+        positions = np.searchsorted(feed_ids, ids)
+        positions = np.minimum(positions, max(len(feed_ids) - 1, 0))
+        found = (feed_ids[positions] == ids) if len(feed_ids) else np.zeros(len(ids), dtype=bool)
+        return found, feed_prices[positions[found]].astype(np.float64)
+
+    def _open(self, stamp):
+
+        # Feeds never change once written, so their maps are kept open
+        base = os.path.join(self.root, PARTITION_PREFIX + stamp.strftime('%Y-%m-%d'), str(int(stamp.timestamp())))
+        with self._lock:
+            columns = self._columns.get(base)
+            if columns is None:
+                columns = self._columns[base] = (
+                    np.load(base + '.ids.npy', mmap_mode='r'),
+                    np.load(base + '.prices.npy', mmap_mode='r'),
+                )
+            return columns
+
+
+def _as_utc(when):
+
+    if when.tzinfo is None:
+        return when.replace(tzinfo=timezone.utc)
+    return when.astimezone(timezone.utc)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_price_history_store(root):
+    """Process-wide PriceHistoryStore for a directory."""
+    with _stores_lock:
+        store = _stores.get(str(root))
+        if store is None:
+            store = _stores[str(root)] = PriceHistoryStore(root)
+        return store
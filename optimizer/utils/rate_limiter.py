@@ -0,0 +1,146 @@
+#Token bucket rate limiter whose state lives in SQLite, so every process shares one budget per key.
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+
+class RateLimitExceeded(Exception):
+
+    def __init__(self, key, wait_seconds):
+        super().__init__(f"Rate limit for {key} would need a {wait_seconds:.1f}s wait")
+        self.key = key
+        self.wait_seconds = wait_seconds
+
+
+class RateLimiter:
+    """
+    Token buckets keyed by name (e.g. upstream host).
+
+    acquire() reserves a token atomically (BEGIN IMMEDIATE) and then sleeps
+    until the reservation is due, so concurrent callers across threads and
+    processes queue in arrival order. The bucket may go negative: that is
+    the queue. If the wait would pass the caller's timeout, nothing is
+    reserved and RateLimitExceeded is raised straight away.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        self._local = threading.local()
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS buckets ('
+                'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)'
+            )
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS stats ('
+                'key TEXT PRIMARY KEY, acquired INTEGER NOT NULL, rejected INTEGER NOT NULL, '
+                'wait_total REAL NOT NULL, wait_max REAL NOT NULL)'
+            )
+
+    def _connection(self):
+
+        # sqlite3 connections are per thread
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+        return connection
+
+    def reserve(self, key, rate, burst=1, timeout=None):
+        """Take one token and return the seconds to wait before using it."""
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            row = connection.execute(
+                'SELECT tokens, updated_at FROM buckets WHERE key = ?', (key,)
+            ).fetchone()
+            tokens, updated_at = row if row else (burst, now)
+
+            tokens = min(burst, tokens + max(0.0, now - updated_at) * rate) - 1
+            wait = -tokens / rate if tokens < 0 else 0.0
+
+            if timeout is not None and wait > timeout:
+                # Nothing reserved, only the rejection is counted
+                self._record(connection, key, None)
+                connection.execute('COMMIT')
+                raise RateLimitExceeded(key, wait)
+
+            connection.execute(
+                'INSERT OR REPLACE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)',
+                (key, tokens, now)
+            )
+            self._record(connection, key, wait)
+            connection.execute('COMMIT')
+        except RateLimitExceeded:
+            raise
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+        return wait
+
+    def acquire(self, key, rate, burst=1, timeout=None):
+        """Block until a token for key is available, returns the seconds waited."""
+        wait = self.reserve(key, rate, burst, timeout)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, key, rate, burst=1, timeout=None):
+        """Async acquire: the reservation runs in a thread, the wait does not block the loop."""
+        wait = await asyncio.to_thread(self.reserve, key, rate, burst, timeout)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def read_stats(self):
+        """{key: {'acquired', 'rejected', 'wait_total', 'wait_max'}} across every process using the file."""
+        rows = self._connection().execute(
+            'SELECT key, acquired, rejected, wait_total, wait_max FROM stats ORDER BY key'
+        ).fetchall()
+        return {
+            key: {'acquired': acquired, 'rejected': rejected, 'wait_total': wait_total, 'wait_max': wait_max}
+            for key, acquired, rejected, wait_total, wait_max in rows
+        }
+
+    @staticmethod
+    def _record(connection, key, wait):
+
+        # Runs inside reserve()'s transaction
+        acquired, rejected, wait = (0, 1, 0.0) if wait is None else (1, 0, wait)
+        connection.execute(
+            'INSERT INTO stats (key, acquired, rejected, wait_total, wait_max) VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET acquired = acquired + excluded.acquired, '
+            'rejected = rejected + excluded.rejected, wait_total = wait_total + excluded.wait_total, '
+            'wait_max = MAX(wait_max, excluded.wait_max)',
+            (key, acquired, rejected, wait, wait)
+        )
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(db_path):
+    """Process-wide RateLimiter for a state file."""
+    with _limiters_lock:
+        limiter = _limiters.get(str(db_path))
+        if limiter is None:
+            limiter = _limiters[str(db_path)] = RateLimiter(db_path)
+        return limiter
+
+
+def read_rate_limit_stats(db_path):
+    """Shared limiter stats for a state file, {} when nothing was ever rate limited."""
+    if not os.path.exists(str(db_path)):
+        return {}
+    return get_rate_limiter(db_path).read_stats()
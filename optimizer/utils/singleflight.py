@@ -0,0 +1,119 @@
+#Request coalescing: concurrent calls with the same key share one execution.
+
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: cross-process coalescing is unavailable
+    fcntl = None
+
+
+class _Call:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls.
+
+    Within a process, the first caller for a key (the leader) runs the
+    function and every caller arriving before it finishes waits for and
+    receives the same result (or exception). Results are shared, so
+    callers must treat them as read-only.
+
+    With lock_dir and handoff_cache set, leaders in different processes
+    also serialize on a per-key lock file; the winner stores its result in
+    the shared cache for handoff_seconds and the others pick it up when
+    they get the lock instead of recomputing. Only values accepted by
+    is_shareable are handed off (by default anything but None).
+    """
+
+    def __init__(self, lock_dir=None, handoff_cache=None, handoff_seconds=30, is_shareable=None):
+        self.lock_dir = lock_dir if fcntl is not None else None
+        self.handoff_cache = handoff_cache
+        self.handoff_seconds = handoff_seconds
+        self.is_shareable = is_shareable or (lambda value: value is not None)
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {'leaders': 0, 'shared': 0, 'handoffs': 0}
+
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    def do(self, key, fn, *args, **kwargs):
+        """Return fn(*args, **kwargs), shared with concurrent callers using the same key."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats['leaders'] += 1
+            else:
+                self.stats['shared'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = self._run(key, fn, args, kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value
+
+    def _run(self, key, fn, args, kwargs):
+
+        if not self.lock_dir or self.handoff_cache is None:
+            return fn(*args, **kwargs)
+
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        handoff_key = f'singleflight:{digest}'
+        with self._file_lock(digest):
+            value = self.handoff_cache.get(handoff_key)
+            if value is not None:
+                with self._lock:
+                    self.stats['handoffs'] += 1
+                return value
+
+            value = fn(*args, **kwargs)
+            if self.is_shareable(value):
+                self.handoff_cache.set(handoff_key, value, self.handoff_seconds)
+            return value
+
+    @contextmanager
+    def _file_lock(self, digest):
+
+        path = os.path.join(self.lock_dir, f'{digest}.lock')
+        with open(path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def get_single_flight(namespace, **options):
+    """Process-wide SingleFlight for a namespace, created with options on first use."""
+    with _flights_lock:
+        flight = _flights.get(namespace)
+        if flight is None:
+            flight = _flights[namespace] = SingleFlight(**options)
+        return flight
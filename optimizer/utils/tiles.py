@@ -0,0 +1,58 @@
+#Slippy-map (z/x/y) tile math shared by the tile builder and the tile endpoint.
+
+import math
+from typing import TYPE_CHECKING, Dict, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Web Mercator cannot represent the poles, clamp like Leaflet does
+MAX_MERCATOR_LATITUDE = 85.05112878
+
+
+def lat_lon_to_tile(lat: float, lon: float, zoom: int) -> Tuple[int, int]:
+
+    lat = max(min(lat, MAX_MERCATOR_LATITUDE), -MAX_MERCATOR_LATITUDE)
+    n = 2 ** zoom
+    lat_rad = math.radians(lat)
+
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+
+    # Points exactly on the east/south edge belong to the last tile
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def lat_lon_to_tile_array(lats: 'np.ndarray', lons: 'np.ndarray', zoom: int) -> Tuple['np.ndarray', 'np.ndarray']:
+
+    # Vectorized version of lat_lon_to_tile for bulk tile assignment
+    import numpy as np
+
+    n = 2 ** zoom
+    lat_rad = np.radians(np.clip(lats, -MAX_MERCATOR_LATITUDE, MAX_MERCATOR_LATITUDE))
+
+    x = np.floor((lons + 180.0) / 360.0 * n).astype(np.int64)
+    y = np.floor((1.0 - np.arcsinh(np.tan(lat_rad)) / np.pi) / 2.0 * n).astype(np.int64)
+
+    return np.clip(x, 0, n - 1), np.clip(y, 0, n - 1)
+
+
+def tile_bounds(zoom: int, x: int, y: int) -> Dict[str, float]:
+
+    n = 2 ** zoom
+
+    def _lat(tile_y):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / n))))
+
+    return {
+        'min_lat': _lat(y + 1),
+        'max_lat': _lat(y),
+        'min_lng': x / n * 360.0 - 180.0,
+        'max_lng': (x + 1) / n * 360.0 - 180.0
+    }
+
+
+def is_valid_tile(zoom: int, x: int, y: int) -> bool:
+
+    n = 2 ** zoom
+    return 0 <= x < n and 0 <= y < n
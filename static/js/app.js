@@ -71,7 +71,8 @@ form.addEventListener('submit', async (e) => {
     const end = endInput.value;
 
     try {
-        const response = await fetch('/api/v1/route/optimize', {
+        // Streamed: the route is drawn as soon as it is known, stops follow
+        const response = await fetch('/api/v1/route/optimize?stream=ndjson', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -87,18 +88,39 @@ form.addEventListener('submit', async (e) => {
             throw new Error(errData.error || errData.detail || 'Failed to optimize route');
         }
 
-        const data = await response.json();
-
-        renderRoute(data);
+        const data = {};
+        await readEvents(response, (event) => {
+            switch (event.event) {
+                case 'geocoded':
+                    btnText.textContent = 'Routing...';
+                    break;
+                case 'routed':
+                    data.route = event.route;
+                    renderRouteLine(data.route);
+                    btnText.textContent = 'Finding stations...';
+                    break;
+                case 'candidates':
+                    btnText.textContent = `Choosing stops (${event.stations} stations)...`;
+                    break;
+                case 'stops':
+                    Object.assign(data, event);
+                    renderStops(data.stops);
+                    try {
+                        updateStats(data);
+                    } catch (e) {
+                        console.error("Error updating stats:", e);
+                    }
+                    resultsPanel.classList.remove('hidden');
+                    break;
+                case 'error':
+                    throw new Error(event.error || 'Failed to optimize route');
+            }
+        });
 
-        try {
-            updateStats(data);
-        } catch (e) {
-            console.error("Error updating stats:", e);
+        if (!data.stops) {
+            throw new Error('Route optimization ended early');
         }
 
-        resultsPanel.classList.remove('hidden');
-
     } catch (error) {
         console.error(error);
         errorMessage.textContent = error.message;
@@ -110,13 +132,32 @@ form.addEventListener('submit', async (e) => {
     }
 });
 
-function renderRoute(data) {
-    if (data.route && data.route.geometry && data.route.geometry.coordinates) {
+// Reads an NDJSON response, calling onEvent with each object as its line arrives
+async function readEvents(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+
+        const lines = buffer.split('\n');
+        buffer = lines.pop(); // Incomplete last line, wait for the rest
+        lines.filter(line => line.trim()).forEach(line => onEvent(JSON.parse(line)));
+
+        if (done) break;
+    }
+    if (buffer.trim()) onEvent(JSON.parse(buffer));
+}
+
+function renderRouteLine(route) {
+    if (route && route.geometry && route.geometry.coordinates) {
         // Decode geometry if needed (OSRM might return polyline string or geojson)
         // Our backend returns GeoJSON coordinates directly from OSRM
         // Note: OSRM uses [lon, lat], Leaflet expects [lat, lon] usually
 
-        const coords = data.route.geometry.coordinates.map(c => [c[1], c[0]]); // Swap to lat,lon
+        const coords = route.geometry.coordinates.map(c => [c[1], c[0]]); // Swap to lat,lon
 
         const polyline = L.polyline(coords, {
             color: '#388bfd',
@@ -131,21 +172,23 @@ function renderRoute(data) {
         // Start Marker
         if (coords.length > 0) {
             L.marker(coords[0], { icon: startIcon })
-                .bindPopup(`<b>Start</b><br>${data.route.start || 'Start'}`)
+                .bindPopup(`<b>Start</b><br>${route.start || 'Start'}`)
                 .addTo(markersLayer);
 
             // End Marker
             L.marker(coords[coords.length - 1], { icon: endIcon })
-                .bindPopup(`<b>End</b><br>${data.route.end || 'End'}`)
+                .bindPopup(`<b>End</b><br>${route.end || 'End'}`)
                 .addTo(markersLayer);
         }
     }
+}
 
+function renderStops(stops) {
     // Fuel Stops
-    if (data.stops && data.stops.length > 0) {
+    if (stops && stops.length > 0) {
         stopsList.innerHTML = '';
 
-        data.stops.forEach((stop, index) => {
+        stops.forEach((stop, index) => {
             // Render on Map
             L.marker([stop.lat, stop.lon], { icon: fuelIcon })
                 .bindPopup(`<b>${stop.station}</b><br>Price: ${stop.price}<br>City: ${stop.city}, ${stop.state}`)
@@ -337,4 +380,114 @@ function displayNearbyStations(stations, centerLat, centerLon) {
     const allLatLngs = [[centerLat, centerLon], ...stations.map(s => [s.lat, s.lon])];
     const bounds = L.latLngBounds(allLatLngs);
     map.fitBounds(bounds, { padding: [50, 50] });
-}
\ No newline at end of file
+}
+// ============================================
+// STATION TILES LAYER
+// ============================================
+
+// Precomputed tiles: clusters up to zoom 9, individual stations from zoom 10.
+// Tiles are cached by the browser (ETag) and in memory, so panning back
+// over an area never refetches or rebuilds its markers.
+const STATION_TILE_MAX_ZOOM = 12;
+const stationTileRenderer = L.canvas({ padding: 0.5 });
+const stationTilesLayer = L.layerGroup().addTo(map);
+const stationTileCache = new Map(); // "z/x/y" -> L.LayerGroup
+const stationTilePending = new Set();
+
+function tileRangeForBounds(bounds, zoom) {
+    const n = Math.pow(2, zoom);
+    const toTileX = lon => Math.min(n - 1, Math.max(0, Math.floor((lon + 180) / 360 * n)));
+    const toTileY = lat => {
+        const clamped = Math.max(Math.min(lat, 85.0511), -85.0511);
+        const rad = clamped * Math.PI / 180;
+        const y = Math.floor((1 - Math.log(Math.tan(rad) + 1 / Math.cos(rad)) / Math.PI) / 2 * n);
+        return Math.min(n - 1, Math.max(0, y));
+    };
+
+    return {
+        minX: toTileX(bounds.getWest()),
+        maxX: toTileX(bounds.getEast()),
+        minY: toTileY(bounds.getNorth()),
+        maxY: toTileY(bounds.getSouth())
+    };
+}
+
+function buildStationTileLayer(tile) {
+    const group = L.layerGroup();
+
+    if (tile.type === 'clusters') {
+        tile.features.forEach(cluster => {
+            L.circleMarker([cluster.lat, cluster.lon], {
+                renderer: stationTileRenderer,
+                radius: Math.min(22, 4 + Math.log2(cluster.count + 1) * 2.5),
+                color: '#58a6ff',
+                weight: 1,
+                fillColor: '#388bfd',
+                fillOpacity: 0.45
+            })
+                .bindTooltip(`${cluster.count} stations<br>From $${cluster.min_price.toFixed(3)}/gal (avg $${cluster.avg_price.toFixed(3)})`)
+                .addTo(group);
+        });
+    } else {
+        tile.features.forEach(station => {
+            L.circleMarker([station.lat, station.lon], {
+                renderer: stationTileRenderer,
+                radius: 5,
+                color: '#ffffff',
+                weight: 1,
+                fillColor: '#3fb950',
+                fillOpacity: 0.9
+            })
+                .bindPopup(`<b>${station.station}</b><br>Price: $${station.price.toFixed(3)}/gal<br>${station.city}, ${station.state}`)
+                .addTo(group);
+        });
+    }
+
+    return group;
+}
+
+async function loadStationTile(key) {
+    if (stationTileCache.has(key) || stationTilePending.has(key)) return;
+    stationTilePending.add(key);
+
+    try {
+        const response = await fetch(`/api/v1/stations/tiles/${key}`);
+        if (!response.ok) return;
+        const tile = await response.json();
+        stationTileCache.set(key, buildStationTileLayer(tile));
+        refreshStationTiles();
+    } catch (error) {
+        console.warn(`Could not load station tile ${key}`, error);
+    } finally {
+        stationTilePending.delete(key);
+    }
+}
+
+function refreshStationTiles() {
+    const zoom = Math.min(Math.round(map.getZoom()), STATION_TILE_MAX_ZOOM);
+    const range = tileRangeForBounds(map.getBounds(), zoom);
+    const visible = new Set();
+
+    for (let x = range.minX; x <= range.maxX; x++) {
+        for (let y = range.minY; y <= range.maxY; y++) {
+            const key = `${zoom}/${x}/${y}`;
+            visible.add(key);
+            if (stationTileCache.has(key)) {
+                const group = stationTileCache.get(key);
+                if (!stationTilesLayer.hasLayer(group)) stationTilesLayer.addLayer(group);
+            } else {
+                loadStationTile(key);
+            }
+        }
+    }
+
+    // Drop tiles that are off-screen or from another zoom level
+    stationTileCache.forEach((group, key) => {
+        if (!visible.has(key) && stationTilesLayer.hasLayer(group)) {
+            stationTilesLayer.removeLayer(group);
+        }
+    });
+}
+
+map.on('moveend', refreshStationTiles);
+refreshStationTiles();